@@ -1,3 +1,1350 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from io import StringIO
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.utils import ConnectionHandler
+from django.db.models import Q, Count
+from django.db.models.functions import TruncDay
+from django.contrib import admin
+from django.test import (
+    AsyncClient, Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.http import Http404
+from django.urls import reverse
+from django.utils import timezone
+
+from moodle import admission, attempts, availability, db_pool, jobs, live_events, metrics, profiling, request_timing, scheduler, slow_queries, write_queue
+from moodle.answer_store import LEGACY_SESSION_KEY, AnswerStore
+from moodle.availability import live_now_filter
+from moodle.management.commands.warm_assessments import Command as WarmAssessmentsCommand
+from moodle.month_calendar import get_calendar_version, month_bounds
+from moodle.question_nav import get_question_at, get_question_nav
+from moodle.startup import warm_up
+from moodle.models import (
+    UserTable, Course, Assignment, Quiz, Exam, CalendarEvent, Question, Option, SystemConfig, Job, Attempt,
+    AdmissionCounter, AssessmentIndex,
+)
+from moodle.synthetic import SYNTHETIC, seed
+
+
+# ---------------------------------------------------------
+# 1. QUERY PLANS (indexes on scheduling / activity columns)
+# ---------------------------------------------------------
+# Full-table scans look like "SCAN moodle_quiz" on SQLite and
+# "Seq Scan on moodle_quiz" on Postgres. Index scans are fine.
+SEQ_SCAN_RE = re.compile(r"(\bSCAN (moodle_\w+)(?! USING))|(Seq Scan on moodle_\w+)")
+
+
+class QueryPlanTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.now = now
+        cls.courses = [Course.objects.create(title=f"Course {i}", code=str(100 + i)) for i in range(10)]
+
+        for model in (Assignment, Quiz, Exam):
+            model.objects.bulk_create([
+                model(
+                    course=cls.courses[i % 10],
+                    title=f"{model.__name__} {i}",
+                    is_live=(i % 3 == 0),
+                    open_date=now + timedelta(days=i - 250),
+                    close_date=None if i % 7 == 0 else now + timedelta(days=i - 240),
+                )
+                for i in range(500)
+            ])
+
+        UserTable.objects.bulk_create([
+            UserTable(username=f"student{i}", last_active=now - timedelta(minutes=i))
+            for i in range(1000)
+        ])
+        CalendarEvent.objects.bulk_create([
+            CalendarEvent(title=f"Event {i}", date=(now + timedelta(days=i - 100)).date())
+            for i in range(200)
+        ])
+
+        # Give the planner real statistics, like a production database has
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        self.assertIsNone(SEQ_SCAN_RE.search(plan), f"Sequential scan in plan:\n{plan}")
+
+    def test_dashboard_live_filter(self):
+        for model in (Assignment, Quiz, Exam):
+            self.assertUsesIndex(model.objects.filter(live_now_filter(self.now)))
+
+    def test_dashboard_timeline(self):
+        timeline_filter = Q(close_date__gte=self.now) | Q(close_date__isnull=True)
+        for model in (Assignment, Quiz, Exam):
+            self.assertUsesIndex(model.objects.filter(timeline_filter).select_related("course"))
+
+    def test_calendar_month_ranges(self):
+        start, end = month_bounds(self.now.year, self.now.month)
+        in_month = (Q(open_date__gte=start, open_date__lt=end) |
+                    Q(close_date__gte=start, close_date__lt=end))
+        for model in (Assignment, Quiz, Exam):
+            self.assertUsesIndex(model.objects.filter(in_month))
+        self.assertUsesIndex(CalendarEvent.objects.filter(date__gte=start.date(), date__lt=end.date()))
+
+    def test_availability_boundaries(self):
+        for model in (Assignment, Quiz, Exam):
+            live = model.objects.filter(is_live=True)
+            self.assertUsesIndex(live.filter(open_date__gt=self.now).order_by("open_date"))
+            self.assertUsesIndex(live.filter(close_date__gte=self.now).order_by("close_date"))
+
+    def test_course_detail(self):
+        for model in (Assignment, Quiz, Exam):
+            self.assertUsesIndex(model.objects.filter(course=self.courses[0]).order_by("open_date"))
+
+    def test_admin_user_activity(self):
+        self.assertUsesIndex(UserTable.objects.filter(last_active__gte=self.now - timedelta(minutes=5)))
+
+        thirty_days_ago = self.now - timedelta(days=30)
+        self.assertUsesIndex(UserTable.objects.filter(created_at__lt=thirty_days_ago))
+        self.assertUsesIndex(
+            UserTable.objects.filter(created_at__gte=thirty_days_ago)
+            .annotate(day=TruncDay("created_at")).values("day")
+            .annotate(count=Count("id")).order_by("day")
+        )
+
+
+# ---------------------------------------------------------
+# 2. QUERY & BYTE BUDGETS (every URL)
+# ---------------------------------------------------------
+# Each case requests one URL on a fixed synthetic dataset with cold caches
+# and fails if it runs more queries, or renders more KiB, than its budget.
+# The dataset is big enough that a per-row lookup (N+1) blows the query
+# budget. Every named URL in moodle/urls.py and admin_dashboard/urls.py
+# needs at least one case. When a view legitimately changes, update its
+# numbers here in the same commit.
+
+# (url name, who, method, query budget, KiB budget)
+BUDGETS = [
+    # Student pages
+    ("login", "anon", "GET", 1, 8),
+    ("login", "anon", "POST", 10, 1),
+    ("logout", "student", "GET", 5, 1),
+    ("home", "student", "GET", 18, 420),
+    ("dashboard", "student", "GET", 18, 420),
+    ("mycourses", "student", "GET", 3, 190),
+    ("course_detail", "student", "GET", 4, 350),
+    ("test_detail", "student", "GET", 4, 180),
+    ("test_attempt", "student", "GET", 6, 195),
+    ("test_attempt", "student", "POST", 9, 1),
+    ("test_finish", "student", "GET", 5, 180),
+    ("test_review", "student", "GET", 5, 250),
+    ("admission_status", "student", "GET", 2, 1),
+    ("autosave", "student", "POST", 6, 1),
+    ("presence", "student", "GET", 3, 1),
+    ("live_events", "student", "GET", 2, 1),
+    ("calendar_view", "student", "GET", 2, 1),
+    ("calendar_month_json", "student", "GET", 4, 13),
+    ("metrics", "admin", "GET", 7, 64),
+    # Admin dashboard
+    ("admin_dashboard:admin_dashboard", "admin", "GET", 32, 1720),
+    ("admin_dashboard:admin_login", "anon", "GET", 0, 4),
+    ("admin_dashboard:admin_logout", "admin", "GET", 4, 1),
+    ("admin_dashboard:add_course", "admin", "POST", 4, 1),
+    ("admin_dashboard:edit_course", "admin", "POST", 5, 1),
+    ("admin_dashboard:delete_course", "admin", "POST", 5, 1),
+    ("admin_dashboard:add_assessment", "admin", "POST", 12, 1),
+    ("admin_dashboard:edit_assessment", "admin", "POST", 11, 1),
+    ("admin_dashboard:delete_assessment", "admin", "POST", 5, 1),
+    ("admin_dashboard:add_question", "admin", "POST", 24, 1),
+    ("admin_dashboard:edit_question", "admin", "POST", 34, 1),
+    ("admin_dashboard:delete_question", "admin", "POST", 17, 1),
+    ("admin_dashboard:edit_user", "admin", "POST", 5, 1),
+    ("admin_dashboard:toggle_ban_user", "admin", "POST", 5, 1),
+    ("admin_dashboard:delete_user", "admin", "POST", 6, 1),
+    ("admin_dashboard:update_settings", "admin", "POST", 5, 1),
+    ("admin_dashboard:job_status", "admin", "GET", 4, 1),
+    ("admin_dashboard:reset_timings", "admin", "POST", 3, 1),
+    ("admin_dashboard:reset_slow_queries", "admin", "POST", 3, 1),
+    ("admin_dashboard:download_profile", "admin", "GET", 3, 1),
+    ("admin_dashboard:clear_profiles", "admin", "POST", 3, 1),
+]
+
+SQL_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def _query_report(queries):
+    """Captured SQL, literals folded, identical statements grouped: N+1s show up as xN."""
+    counts = {}
+    for query in queries:
+        sql = SQL_LITERAL_RE.sub("?", query["sql"])
+        counts[sql] = counts.get(sql, 0) + 1
+    lines = sorted(counts.items(), key=lambda item: -item[1])
+    return "\n".join(f"  {'x%-4d' % n if n > 1 else '     '} {sql[:300]}" for sql, n in lines)
+
+
+def _named_urls():
+    from admin_dashboard import urls as admin_urls
+    from moodle import urls as moodle_urls
+
+    names = {p.name for p in moodle_urls.urlpatterns if getattr(p, "name", None)}
+    names |= {f"{admin_urls.app_name}:{p.name}" for p in admin_urls.urlpatterns if p.name}
+    return names
+
+
+# No EXPLAINs from the slow-query log inside a measured request
+@override_settings(ADMISSION_DEFAULT_CAP=0, SLOW_QUERY_EXPLAIN=False)
+class QueryBudgetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(users=50, courses=3, assessments=3, questions=10, options=4, events=30)
+        cls.config, _ = SystemConfig.objects.get_or_create(id=1)
+        cls.student = UserTable.objects.filter(username__startswith=f"{SYNTHETIC}-").order_by("id").first()
+        cls.other_student = UserTable.objects.exclude(pk=cls.student.pk).order_by("id").first()
+        cls.quiz = Quiz.objects.filter(is_live=True).order_by("id").first()
+        cls.course = cls.quiz.course
+        cls.questions = list(Question.objects.filter(parent_type="QUIZ", parent_id=cls.quiz.id).order_by("position"))
+        cls.admin = User.objects.create_superuser("budget-admin", "budget@example.com", "budget")
+        cls.job = Job.objects.create(name="noop")
+        admin = Client()
+        admin.force_login(cls.admin)
+        cls.profile_id = admin.get(reverse("admin_dashboard:job_status", args=[cls.job.id]), {"_profile": 1})["X-Profile-Id"]
+
+    def setUp(self):
+        for alias in caches:
+            caches[alias].clear()
+
+    def _client(self, who):
+        client = Client()
+        if who == "admin":
+            client.force_login(self.admin)
+        elif who == "student":
+            session = client.session
+            session["username"] = self.student.username
+            session.save()
+            client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+            # Every student case runs inside an attempt of self.quiz
+            client.get(reverse("test_attempt", args=["quiz", self.quiz.id]))
+        return client
+
+    def _request(self, name, method):
+        """-> (path, POST data or None, expected status)"""
+        quiz_args = ["quiz", self.quiz.id]
+        question = self.questions[1]
+        answer = question.get_options()[0].id
+        date = {"open_date": "2030-01-01", "open_time": "10:00", "close_date": "2030-01-02", "close_time": "10:00"}
+        assessment = {"assessment_type": "quiz", "course_id": self.course.id, "title": "Budget quiz",
+                      "description": "", "duration_minutes": 30, "max_attempts": 1, **date}
+        mcq = {"question_type[]": "MCQ", "question_text[]": "Budget question", "correct_opt_0": "A",
+               "opt_a_text[]": "a", "opt_b_text[]": "b", "opt_c_text[]": "c", "opt_d_text[]": "d"}
+        cases = {
+            ("login", "GET"): ([], None, 200),
+            ("login", "POST"): ([], {"username": "budget-student", "pin": self.config.system_pin}, 302),
+            ("logout", "GET"): ([], None, 302),
+            ("home", "GET"): ([], None, 200),
+            ("dashboard", "GET"): ([], None, 200),
+            ("mycourses", "GET"): ([], None, 200),
+            ("course_detail", "GET"): ([self.course.code], None, 200),
+            ("test_detail", "GET"): (quiz_args, None, 200),
+            ("test_attempt", "GET"): (quiz_args, None, 200),
+            ("test_attempt", "POST"): (quiz_args, {str(self.questions[0].id): answer, "next": "1"}, 302),
+            ("test_finish", "GET"): (quiz_args, None, 200),
+            ("test_review", "GET"): (quiz_args, None, 200),
+            ("admission_status", "GET"): (quiz_args, None, 200),
+            ("autosave", "POST"): (quiz_args, {"question_id": question.id, str(question.id): answer}, 200),
+            ("presence", "GET"): ([], None, 204),
+            ("live_events", "GET"): ([], None, 204),
+            ("calendar_view", "GET"): ([], None, 302),
+            ("calendar_month_json", "GET"): ([], None, 200),
+            ("metrics", "GET"): ([], None, 200),
+            ("admin_dashboard:admin_dashboard", "GET"): ([], None, 200),
+            ("admin_dashboard:admin_login", "GET"): ([], None, 200),
+            ("admin_dashboard:admin_logout", "GET"): ([], None, 302),
+            ("admin_dashboard:add_course", "POST"): ([], {"title": "Budget", "code": "424242", "description": ""}, 302),
+            ("admin_dashboard:edit_course", "POST"): (
+                [self.course.id], {"title": "Budget", "code": self.course.code, "description": ""}, 302),
+            ("admin_dashboard:delete_course", "POST"): ([self.course.id], {}, 302),
+            ("admin_dashboard:add_assessment", "POST"): ([], assessment, 302),
+            ("admin_dashboard:edit_assessment", "POST"): ([self.quiz.id], assessment, 302),
+            ("admin_dashboard:delete_assessment", "POST"): ([self.quiz.id], {}, 302),
+            ("admin_dashboard:add_question", "POST"): (
+                [], {"parent_type": "QUIZ", "parent_id": self.quiz.id, **mcq}, 302),
+            ("admin_dashboard:edit_question", "POST"): ([question.id], mcq, 302),
+            ("admin_dashboard:delete_question", "POST"): ([question.id], {}, 302),
+            ("admin_dashboard:edit_user", "POST"): (
+                [], {"user_id": self.other_student.id, "username": self.other_student.username}, 302),
+            ("admin_dashboard:toggle_ban_user", "POST"): ([self.other_student.id], {}, 302),
+            ("admin_dashboard:delete_user", "POST"): ([self.other_student.id], {}, 302),
+            ("admin_dashboard:update_settings", "POST"): (
+                [], {"system_status_toggle": "on", "system_pin": self.config.system_pin,
+                     "pin_required": "Yes", "show_answer": "Yes"}, 302),
+            ("admin_dashboard:job_status", "GET"): ([self.job.id], None, 200),
+            ("admin_dashboard:reset_timings", "POST"): ([], {}, 302),
+            ("admin_dashboard:reset_slow_queries", "POST"): ([], {}, 302),
+            ("admin_dashboard:download_profile", "GET"): ([self.profile_id, "json"], None, 200),
+            ("admin_dashboard:clear_profiles", "POST"): ([], {}, 302),
+        }
+        args, data, status = cases[(name, method)]
+        return reverse(name, args=args), data, status
+
+    def test_every_url_has_a_budget(self):
+        budgeted = {name for name, *_ in BUDGETS}
+        self.assertEqual(sorted(_named_urls() - budgeted), [], "URLs without a query budget")
+        self.assertEqual(sorted(budgeted - _named_urls()), [], "Budgets for URLs that no longer exist")
+
+    def test_query_and_byte_budgets(self):
+        for name, who, method, max_queries, max_kib in BUDGETS:
+            with self.subTest(url=name, method=method):
+                client = self._client(who)
+                path, data, status = self._request(name, method)
+                if name == "test_attempt" and method == "GET":
+                    path += "?q=2"
+                for alias in caches:
+                    caches[alias].clear()
+
+                # Each case sees the same data: roll back whatever it changes
+                with transaction.atomic():
+                    with CaptureQueriesContext(connection) as queries:
+                        if data is None:
+                            response = client.get(path)
+                        else:
+                            response = client.post(path, data)
+                    transaction.set_rollback(True)
+
+                self.assertEqual(response.status_code, status, f"{method} {path}")
+                body = b"" if response.streaming else response.content
+                self.assertLessEqual(
+                    len(queries), max_queries,
+                    f"{method} {path}: {len(queries)} queries, budget {max_queries}\n{_query_report(queries)}",
+                )
+                self.assertLessEqual(
+                    len(body) / 1024, max_kib,
+                    f"{method} {path}: {len(body) / 1024:.1f} KiB, budget {max_kib} KiB",
+                )
+
+
+# ---------------------------------------------------------
+# 3. REQUEST TIMING (Server-Timing + route histograms)
+# ---------------------------------------------------------
+SERVER_TIMING_RE = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+@override_settings(SERVER_TIMING_HEADER=True)
+class RequestTimingTests(TestCase):
+
+    def setUp(self):
+        for alias in caches:
+            caches[alias].clear()
+        request_timing.histograms.flush()
+        request_timing.reset_timings()
+        UserTable.objects.create(username="timed")
+
+    def _student(self, client):
+        session = client.session
+        session["username"] = "timed"
+        session.save()
+        client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+
+    def test_header_counts_queries(self):
+        self._student(self.client)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("mycourses"))
+        header = response["Server-Timing"]
+        self.assertTrue(header.startswith("total;dur="), header)
+        self.assertEqual(int(SERVER_TIMING_RE.search(header).group(1)), len(queries))
+        self.assertIn("tpl;dur=", header)
+
+    async def test_async_view_queries_are_counted(self):
+        client = AsyncClient()
+        await sync_to_async(self._student)(client)
+        response = await client.get(reverse("presence"))
+        # Config (cold cache), session read and last_active update, all run
+        # in sync_to_async threads
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(SERVER_TIMING_RE.search(response["Server-Timing"]).group(1), "3")
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_header_only_for_superusers_by_default(self):
+        self._student(self.client)
+        self.assertNotIn("Server-Timing", self.client.get(reverse("mycourses")))
+        admin = Client()
+        admin.force_login(User.objects.create_superuser("timing-admin", "timing@example.com", "timing"))
+        self.assertIn("Server-Timing", admin.get(reverse("admin_dashboard:admin_dashboard")))
+
+    def test_flush_merges_routes_into_cache(self):
+        self._student(self.client)
+        for _ in range(3):
+            self.client.get(reverse("mycourses"))
+        request_timing.histograms.flush()
+        self.client.get(reverse("mycourses"))
+        request_timing.histograms.flush()
+
+        rows, since = request_timing.slowest_routes()
+        row = next(r for r in rows if r["route"] == "mycourses")
+        self.assertEqual(row["count"], 4)
+        self.assertGreater(row["p95_ms"], 0)
+        self.assertIsNotNone(since)
+
+
+# ---------------------------------------------------------
+# 4. METRICS (/metrics, multiprocess aggregation)
+# ---------------------------------------------------------
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        for alias in caches:
+            caches[alias].clear()
+        metrics_dir = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(METRICS_DIR=metrics_dir))
+        self.admin = User.objects.create_superuser("metrics-admin", password="x")
+
+    def _scrape(self, client):
+        response = client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        return response.content.decode()
+
+    def _value(self, body, sample):
+        line = next((line for line in body.splitlines() if line.startswith(sample + " ")), None)
+        return float(line.rsplit(" ", 1)[1]) if line else 0.0
+
+    def test_access(self):
+        with override_settings(METRICS_ALLOWED_IPS=[], METRICS_TOKEN="s3cret"):
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+            self.assertEqual(self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer nope").status_code, 403)
+            self.assertEqual(self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer s3cret").status_code, 200)
+            self.client.force_login(self.admin)
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 200)
+
+    def test_requests_and_cache_counters(self):
+        before = self._scrape(self.client)
+        sample = 'iitpcep_http_requests_total{view="login",method="GET",status="200"}'
+        for _ in range(2):
+            self.client.get(reverse("login"))
+        body = self._scrape(self.client)
+
+        self.assertEqual(self._value(body, sample) - self._value(before, sample), 2)
+        self.assertIn('iitpcep_http_request_duration_seconds_bucket{view="login",le="+Inf"}', body)
+        self.assertIn('iitpcep_cache_requests_total{cache="config",result="miss"}', body)
+        self.assertIn("# TYPE iitpcep_http_request_duration_seconds histogram", body)
+        # The scrape itself is in flight while it renders
+        self.assertEqual(self._value(body, "iitpcep_http_requests_in_flight"), 1)
+
+    def test_aggregates_worker_snapshots(self):
+        sample = ["iitpcep_http_requests_total", [["view", "w"], ["method", "GET"], ["status", "200"]], 3]
+        gauge = ["iitpcep_http_requests_in_flight", [], 5]
+        # A live worker (this test runner's parent) and one that has exited
+        for pid in (os.getppid(), 2 ** 22 + 1):
+            with open(os.path.join(settings.METRICS_DIR, f"{pid}.json"), "w") as fh:
+                json.dump({"pid": pid, "samples": [sample, gauge]}, fh)
+
+        body = self._scrape(self.client)
+        self.assertEqual(self._value(body, 'iitpcep_http_requests_total{view="w",method="GET",status="200"}'), 6)
+        # Gauges of dead workers are dropped; 5 from the live one, 1 for this scrape
+        self.assertEqual(self._value(body, "iitpcep_http_requests_in_flight"), 6)
+
+    def test_exited_threads_are_folded(self):
+        key = ("iitpcep_http_requests_total", (("view", "threads"),))
+        before = metrics._process_samples().get(key, 0)
+        for _ in range(50):
+            thread = threading.Thread(target=metrics.inc, args=key)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(metrics._process_samples()[key], before + 50)
+        self.assertLessEqual(len(metrics._shards), threading.active_count())
+
+
+# ---------------------------------------------------------
+# 5. PROFILER (?_profile=1 for superusers)
+# ---------------------------------------------------------
+class ProfilerTests(TestCase):
+
+    def setUp(self):
+        for alias in caches:
+            caches[alias].clear()
+        self.enterContext(override_settings(PROFILE_DIR=self.enterContext(tempfile.TemporaryDirectory())))
+        self.admin = User.objects.create_superuser("profile-admin", password="x")
+        self.job = Job.objects.create(name="noop")
+        self.url = reverse("admin_dashboard:job_status", args=[self.job.id])
+
+    def test_only_superusers_are_profiled(self):
+        staff = User.objects.create_user("profile-staff", password="x", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(self.url, {"_profile": 1})
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(profiling.recent_profiles(), [])
+
+    def test_profile_and_sql_log_are_saved(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(self.url, {"_profile": 1})
+        profile_id = response["X-Profile-Id"]
+        self.assertEqual(json.loads(response.content)["id"], self.job.id)
+
+        with open(profiling.profile_path(profile_id, "json")) as fh:
+            info = json.load(fh)
+        self.assertEqual(info["route"], "admin_dashboard:job_status")
+        self.assertTrue(any("moodle_job" in query["sql"] for query in info["queries"]))
+        self.assertIn("cumulative", info["top"])
+        self.assertIsNotNone(profiling.profile_path(profile_id, "prof"))
+
+        download = self.client.get(reverse("admin_dashboard:download_profile", args=[profile_id, "prof"]))
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(download["Content-Disposition"].startswith("attachment"))
+        self.assertContains(self.client.get(reverse("admin_dashboard:admin_dashboard")), profile_id)
+
+    async def test_async_view_with_header(self):
+        client = AsyncClient()
+        await sync_to_async(client.force_login)(self.admin)
+        response = await client.get(reverse("presence"), headers={"X-Profile": "1"})
+        self.assertEqual(response.status_code, 204)
+        self.assertIsNotNone(profiling.profile_path(response["X-Profile-Id"], "prof"))
+
+    def test_keeps_newest(self):
+        self.client.force_login(self.admin)
+        with override_settings(PROFILE_KEEP=2):
+            ids = [self.client.get(self.url, {"_profile": 1})["X-Profile-Id"] for _ in range(3)]
+        self.assertEqual({p["id"] for p in profiling.recent_profiles()}, set(ids[1:]))
+
+    def test_download_rejects_bad_ids(self):
+        self.client.force_login(self.admin)
+        for profile_id, kind in (("..", "json"), ("missing", "prof"), ("x", "py")):
+            response = self.client.get(reverse("admin_dashboard:download_profile", args=[profile_id, kind]))
+            self.assertEqual(response.status_code, 404)
+
+
+# ---------------------------------------------------------
+# 6. SLOW-QUERY LOG
+# ---------------------------------------------------------
+@override_settings(SLOW_QUERY_MS=0)
+class SlowQueryTests(TestCase):
+
+    def setUp(self):
+        for alias in caches:
+            caches[alias].clear()
+        slow_queries.reset_slow_queries()
+        self.course = Course.objects.create(title="Slow", code="777")
+        UserTable.objects.create(username="slow-student")
+
+    def test_normalize(self):
+        self.assertEqual(
+            slow_queries.normalize("SELECT x FROM t WHERE id IN (%s, %s, %s) AND code = '77' LIMIT 21"),
+            "SELECT x FROM t WHERE id IN (...) AND code = ? LIMIT ?",
+        )
+
+    def test_groups_with_call_site_and_plan(self):
+        session = self.client.session
+        session["username"] = "slow-student"
+        session.save()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+        for _ in range(2):
+            self.client.get(reverse("course_detail", args=[self.course.code]))
+        # The per-request flush shares entries and EXPLAIN candidates but runs no EXPLAIN
+        slow_queries.flush()
+        self.assertEqual(caches[settings.REQUEST_TIMING_CACHE].get(slow_queries.SLOW_KEY)["plans"], {})
+        self.assertTrue(caches[settings.REQUEST_TIMING_CACHE].get(slow_queries.CANDIDATES_KEY))
+        # Nothing left in this process: the plans below come from the shared candidates,
+        # as they would in a worker that never saw the queries
+        self.assertEqual(len(slow_queries._pending), 0)
+
+        rows, since = slow_queries.slow_query_groups(limit=100)
+        self.assertIsNotNone(since)
+        course = next(row for row in rows if row["sql"].startswith('SELECT "moodle_course"'))
+        self.assertEqual(course["count"], 2)
+        self.assertEqual(course["distinct_params"], 1)
+        self.assertIn("course_detail", course["routes"])
+        self.assertTrue(any(site.startswith("moodle/") for site in course["sites"]), course["sites"])
+        self.assertRegex(course["plan"], r"SEARCH|SCAN")
+        # Parameter values stay out of the shared log
+        self.assertNotIn("slow-student", str(caches[settings.REQUEST_TIMING_CACHE].get(slow_queries.SLOW_KEY)))
+        # Planned candidates are dropped
+        self.assertEqual(caches[settings.REQUEST_TIMING_CACHE].get(slow_queries.CANDIDATES_KEY), {})
+
+    def test_candidates_are_portable_and_capped(self):
+        when = datetime(2031, 3, 10, 9)
+        self.assertEqual(slow_queries._candidate("default", "SELECT %s, %s", [when, None])["params"],
+                         [str(when), None])
+        self.assertIsNone(slow_queries._candidate("default", "SELECT %s", [b"blob"]))
+        too_many = list(range(slow_queries.CANDIDATE_PARAMS_MAX + 1))
+        self.assertIsNone(slow_queries._candidate("default", "SELECT 1", too_many))
+
+    def test_admin_panel_and_reset(self):
+        admin = User.objects.create_superuser("slow-admin", password="x")
+        self.client.force_login(admin)
+        Course.objects.filter(code="777").count()
+        self.assertContains(self.client.get(reverse("admin_dashboard:admin_dashboard")), "Slow Queries")
+        self.assertTrue(slow_queries.slow_query_groups()[0])
+
+        self.client.post(reverse("admin_dashboard:reset_slow_queries"))
+        self.assertIsNone(caches[settings.REQUEST_TIMING_CACHE].get(slow_queries.SLOW_KEY))
+
+
+# ---------------------------------------------------------
+# 7. STARTUP (boot warm-up, lazy admin editor)
+# ---------------------------------------------------------
+class StartupTests(SimpleTestCase):
+
+    def test_warm_up_compiles_project_templates(self):
+        self.assertGreater(warm_up(), 10)
+
+    @override_settings(WARM_UP_ON_BOOT=False)
+    def test_warm_up_can_be_turned_off(self):
+        self.assertEqual(warm_up(), 0)
+
+    def test_assessment_admin_gets_rich_text_editor(self):
+        request = RequestFactory().get("/admin/")
+        request.user = User(is_superuser=True, is_active=True)
+        form = admin.site._registry[Quiz].get_form(request)()
+        self.assertEqual(type(form.fields["description"].widget).__name__, "CKEditorWidget")
+
+
+# ---------------------------------------------------------
+# 8. CONNECTION POOL (SQLite stand-in for the pooled Postgres backend)
+# ---------------------------------------------------------
+class ConnectionPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(METRICS_DIR=directory))
+        self.handler = self._handler({
+            "ENGINE": "moodle.db_backends.sqlite3", "NAME": os.path.join(directory, "pool.sqlite3"),
+            "CONN_HEALTH_CHECKS": True, "POOL": {"SIZE": 3, "TIMEOUT": 5},
+        })
+        self.addCleanup(lambda: self.pool.close_idle())
+
+    @staticmethod
+    def _handler(pooled):
+        # ConnectionHandler insists on a "default"; it is never opened here
+        return ConnectionHandler({"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+                                  "pooled": pooled})
+
+    @property
+    def pool(self):
+        return db_pool.pool_for(self.handler["pooled"])
+
+    def _request(self, seen=None, hold=0.0):
+        """One request's worth of DB use, ending like request_finished does with CONN_MAX_AGE = 0."""
+        conn = self.handler["pooled"]
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            if seen is not None:
+                seen.append(conn.connection)
+            time.sleep(hold)
+        conn.close()
+
+    def _checkouts(self):
+        samples = metrics.collect_workers()
+        labels = lambda result: (("alias", "pooled"), ("result", result))
+        return {result: samples.get(("iitpcep_db_pool_checkouts_total", labels(result)), 0)
+                for result in ("new", "reused", "recycled", "timeout")}
+
+    def test_reuses_connections_under_concurrent_load(self):
+        before = self._checkouts()
+        seen = []
+        threads = [threading.Thread(target=lambda: [self._request(seen, 0.002) for _ in range(20)]) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        after = self._checkouts()
+        self.assertLessEqual(len({id(raw) for raw in seen}), 3)
+        self.assertLessEqual(after["new"] - before["new"], 3)
+        self.assertEqual((after["new"] - before["new"]) + (after["reused"] - before["reused"]), 240)
+        self.assertEqual(self.pool.stats()["in_use"], 0)
+        waits = metrics.collect_workers()[("iitpcep_db_pool_wait_seconds_count", (("alias", "pooled"),))]
+        self.assertGreaterEqual(waits, 240)
+
+    def test_broken_idle_connection_is_replaced(self):
+        self._request()
+        self.pool._idle[-1].raw.close()
+        before = self._checkouts()
+        self._request()
+        self.assertEqual(self._checkouts()["recycled"] - before["recycled"], 1)
+
+    def test_times_out_when_exhausted(self):
+        self.handler = self._handler({
+            **self.handler.settings["pooled"], "NAME": self.handler.settings["pooled"]["NAME"] + "-1",
+            "POOL": {"SIZE": 1, "TIMEOUT": 0.1},
+        })
+        holding, release = threading.Event(), threading.Event()
+
+        def hold():
+            conn = self.handler["pooled"]
+            conn.ensure_connection()
+            holding.set()
+            release.wait(5)
+            conn.close()
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        holding.wait(5)
+        try:
+            with self.assertRaises(db_pool.PoolTimeout):
+                self._request()
+        finally:
+            release.set()
+            holder.join()
+
+
+# ---------------------------------------------------------
+# 9. SQLITE UNDER AN EXAM SURGE (pragmas, BEGIN IMMEDIATE, write queue)
+# ---------------------------------------------------------
+# Real threads on the file-backed test database: every student logs in,
+# starts the exam, answers, heartbeats and submits at the same moment.
+# Before the SQLite profile, attempt creation failed with "database is locked".
+@override_settings(WRITE_QUEUE=True, ADMISSION_DEFAULT_CAP=0, SLOW_QUERY_EXPLAIN=False)
+class ExamSurgeWriteTests(TransactionTestCase):
+    STUDENTS = 100
+
+    def setUp(self):
+        for alias in caches:
+            caches[alias].clear()
+        # The writer thread's connection would otherwise outlive the test database
+        self.addCleanup(lambda: write_queue.submit(connections.close_all).result(10))
+        SystemConfig.objects.get_or_create(id=1)
+        course = Course.objects.create(title="Surge", code="999995")
+        now = timezone.now()
+        self.exam = Exam.objects.create(
+            course=course, title="Surge exam", is_live=True, open_date=now - timedelta(minutes=5),
+            close_date=now + timedelta(hours=2), duration_minutes=60, max_attempts=1,
+        )
+        self.question = Question.objects.create(parent_type="EXAM", parent_id=self.exam.id, position=1,
+                                                text="Surge question", correct_option="A")
+        self.option = Option.objects.create(question=self.question, option_label="A", text="A")
+
+    def _student(self, i, start, errors):
+        client = Client()
+        exam_args = ["exam", self.exam.id]
+        steps = (
+            ("POST", reverse("login"), {"username": f"surge-{i}", "pin": "4321"}, 302),
+            ("GET", reverse("test_attempt", args=exam_args) + "?q=1", None, 200),
+            ("POST", reverse("test_attempt", args=exam_args) + "?q=1", {str(self.question.id): self.option.id}, 200),
+            ("GET", reverse("presence"), None, 204),
+            ("POST", reverse("test_review", args=exam_args), {}, 200),
+        )
+        try:
+            start.wait(10)
+            for method, path, data, expected in steps:
+                response = client.post(path, data) if method == "POST" else client.get(path)
+                if response.status_code != expected:
+                    errors.append(f"{method} {path}: {response.status_code}")
+                    return
+        except Exception as exc:
+            errors.append(f"{type(exc).__name__}: {exc}")
+        finally:
+            connections.close_all()
+
+    def test_no_lock_errors_at_100_students(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+
+        errors = []
+        start = threading.Barrier(self.STUDENTS)
+        threads = [threading.Thread(target=self._student, args=(i, start, errors)) for i in range(self.STUDENTS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        write_queue.drain(10)
+
+        self.assertEqual(errors, [])
+        attempts = Attempt.objects.filter(kind="EXAM", object_id=self.exam.id)
+        self.assertEqual(attempts.filter(status="SUBMITTED").count(), self.STUDENTS)
+        self.assertEqual(attempts.exclude(answers={str(self.question.id): {"answer": str(self.option.id),
+                                                                           "flagged": False}}).count(), 0)
+        self.assertEqual(UserTable.objects.filter(username__startswith="surge-", is_online=True).count(),
+                         self.STUDENTS)
+
+
+@override_settings(WRITE_QUEUE=True, WRITE_QUEUE_TIMEOUT=0.05)
+class WriteQueueTimeoutTests(SimpleTestCase):
+
+    def test_running_write_is_waited_for(self):
+        # Started before the timeout: the write happens, so its result comes back
+        self.assertEqual(write_queue.run(lambda: time.sleep(0.2) or "written"), "written")
+
+    def test_queued_write_is_cancelled(self):
+        release = threading.Event()
+        blocker = write_queue.submit(release.wait, 10)
+        ran = []
+        try:
+            with self.assertRaises(write_queue.WriteQueueTimeout):
+                write_queue.run(ran.append, 1)
+        finally:
+            release.set()
+        blocker.result(10)
+        write_queue.drain(10)
+        self.assertEqual(ran, [])
+
+
+# ---------------------------------------------------------
+# 10. ANSWER STORE (resubmits, sessions from before the per-test store)
+# ---------------------------------------------------------
+@override_settings(ANSWER_STORE_BACKEND="session")
+class AnswerStoreTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(title="Store", code="999994")
+        cls.quiz = Quiz.objects.create(course=course, title="Store quiz")
+        cls.question = Question.objects.create(parent_type="QUIZ", parent_id=cls.quiz.id, position=1, text="Q")
+
+    def setUp(self):
+        caches["default"].clear()
+        self.request = RequestFactory().get("/")
+        self.request.session = SessionStore()
+
+    def test_second_finish_keeps_submitted_answers(self):
+        store = AnswerStore(self.request, "Quiz", self.quiz.id)
+        store.save_answer(self.question.id, "42", False)
+        first = store.finish()
+        self.assertEqual(store.finish(), first)
+        self.assertEqual(store.submitted(), {str(self.question.id): {"answer": "42", "flagged": False}})
+
+    def test_legacy_answers_move_into_their_test(self):
+        mine, other = {"answer": "7", "flagged": True}, {"answer": "x", "flagged": False}
+        self.request.session[LEGACY_SESSION_KEY] = {str(self.question.id): mine, "999999": other}
+        store = AnswerStore(self.request, "Quiz", self.quiz.id)
+        self.assertEqual(store.load(), {str(self.question.id): mine})
+        self.assertEqual(self.request.session[LEGACY_SESSION_KEY], {"999999": other})
+        store.save_answer(self.question.id, "8", False)
+        self.assertEqual(store.finish()[str(self.question.id)]["answer"], "8")
+
+
+# ---------------------------------------------------------
+# 11. ADMISSION COUNTERS (DB rows when the cache has no atomic incr)
+# ---------------------------------------------------------
+@override_settings(ADMISSION_COUNTERS="db")
+class AdmissionCounterTests(TransactionTestCase):
+
+    def test_concurrent_tickets_are_unique(self):
+        tickets, errors = [], []
+
+        def take():
+            try:
+                for _ in range(5):
+                    tickets.append(admission._incr("admission:EXAM:1:next"))
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=take) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(tickets), list(range(1, 101)))
+
+    def test_expired_counter_starts_again(self):
+        self.assertEqual(admission._incr("admission:EXAM:1:window:1", 60), 1)
+        self.assertEqual(admission._incr("admission:EXAM:1:window:1", 60), 2)
+        AdmissionCounter.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(admission._incr("admission:EXAM:1:window:1", 60), 1)
+
+    async def test_async_poll_with_ticket(self):
+        client = AsyncClient()
+
+        def waiting_session():
+            session = SessionStore()
+            session[admission._session_key("Exam", 1)] = {"ticket": 5, "cap": 1}
+            session.save()
+            client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+
+        await sync_to_async(waiting_session)()
+        response = await client.get(reverse("admission_status", args=["exam", 1]))
+        self.assertEqual(response.status_code, 200)
+        # One admission this window (ticket 1), so four tickets are still ahead
+        self.assertEqual(response.json()["admitted"], False)
+        self.assertEqual(response.json()["position"], 4)
+
+
+# ---------------------------------------------------------
+# 12. SCHEDULER (auto_live assessments without cron)
+# ---------------------------------------------------------
+# The job drain runs on its own thread, which can't see a TestCase's rows
+@override_settings(JOB_DRAIN_INTERVAL_SECONDS=0)
+class SchedulerTests(TestCase):
+
+    def setUp(self):
+        caches["default"].clear()
+        course = Course.objects.create(title="Auto", code="999993")
+        now = timezone.now()
+        self.due = Exam.objects.create(course=course, title="Due", auto_live=True,
+                                       open_date=now - timedelta(minutes=1), close_date=now + timedelta(hours=1))
+        self.soon = Exam.objects.create(course=course, title="Soon", auto_live=True,
+                                        open_date=now + timedelta(minutes=5), close_date=now + timedelta(hours=1))
+
+    def test_runs_live_schedule_once_per_interval(self):
+        self.assertEqual(scheduler.run_due(), ["apply_live_schedule", "expire_attempts"])
+        self.due.refresh_from_db()
+        self.assertTrue(self.due.is_live)
+        self.assertEqual(scheduler.run_due(), [])
+
+    def test_warm_assessments_includes_auto_live(self):
+        upcoming = WarmAssessmentsCommand()._upcoming(["EXAM"], 10)
+        self.assertEqual([item.object_id for item in upcoming], [self.soon.pk])
+
+
+# ---------------------------------------------------------
+# 13. ATTEMPTS (open/close window, untimed assessments)
+# ---------------------------------------------------------
+@override_settings(ADMISSION_DEFAULT_CAP=0)
+class AttemptWindowTests(TestCase):
+
+    def setUp(self):
+        for alias in caches:
+            caches[alias].clear()
+        self.course = Course.objects.create(title="Window", code="999994")
+        self.student = UserTable.objects.create(username="window-student")
+        self.client = Client()
+        session = self.client.session
+        session["username"] = self.student.username
+        session.save()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+
+    def _exam(self, open_delta, close_delta, **fields):
+        now = timezone.now()
+        return Exam.objects.create(course=self.course, title="Exam", is_live=True,
+                                   open_date=now + open_delta, close_date=now + close_delta, **fields)
+
+    def test_refuses_to_start_after_close(self):
+        exam = self._exam(timedelta(hours=-2), timedelta(minutes=-1))
+        response = self.client.get(reverse("test_attempt", args=["exam", exam.pk]))
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Attempt.objects.filter(user=self.student).exists())
+
+    def test_refuses_to_start_before_open(self):
+        exam = self._exam(timedelta(minutes=5), timedelta(hours=1))
+        response = self.client.get(reverse("test_attempt", args=["exam", exam.pk]))
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Attempt.objects.filter(user=self.student).exists())
+
+    def test_zero_duration_runs_until_close(self):
+        exam = self._exam(timedelta(minutes=-1), timedelta(hours=1), duration_minutes=0)
+        self.assertEqual(self.client.get(reverse("test_attempt", args=["exam", exam.pk])).status_code, 200)
+        self.assertEqual(Attempt.objects.get(user=self.student).deadline, exam.close_date)
+
+    def test_zero_duration_without_close_date(self):
+        exam = self._exam(timedelta(minutes=-1), timedelta(), duration_minutes=0)
+        now = timezone.now()
+        exam.close_date = None
+        self.assertEqual(attempts.compute_deadline(exam, now), now + attempts.UNTIMED_ATTEMPT)
+
+
+# ---------------------------------------------------------
+# 14. MONTH CALENDAR (cached matrix, JSON, version bump)
+# ---------------------------------------------------------
+class MonthCalendarTests(TestCase):
+
+    def setUp(self):
+        for alias in caches:
+            caches[alias].clear()
+        self.course = Course.objects.create(title="Calendar", code="999996")
+        UserTable.objects.create(username="calendar-student")
+        session = self.client.session
+        session["username"] = "calendar-student"
+        session.save()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+
+    def _events(self):
+        response = self.client.get(reverse("calendar_month_json"), {"year": 2031, "month": 3})
+        self.assertEqual(response.status_code, 200)
+        return [(event["title"], event["type"], day["day_num"])
+                for week in response.json()["weeks"] for day in week for event in day["events"]]
+
+    def test_month_json_and_invalidation(self):
+        Quiz.objects.create(course=self.course, title="March quiz", is_live=True,
+                            open_date=datetime(2031, 3, 10, 9), close_date=datetime(2031, 3, 20, 9))
+        self.assertEqual(self._events(), [("March quiz", "opens", 10), ("March quiz", "closes", 20)])
+
+        # Served from the cache: a write that skips the signals is not seen...
+        CalendarEvent.objects.bulk_create([CalendarEvent(title="Unseen", date=datetime(2031, 3, 5).date())])
+        self.assertNotIn("Unseen", [title for title, _, _ in self._events()])
+
+        # ...until a save bumps the version and every cached month is rebuilt
+        version = get_calendar_version()
+        CalendarEvent.objects.create(title="Holiday", date=datetime(2031, 3, 12).date())
+        self.assertEqual(get_calendar_version(), version + 1)
+        titles = [title for title, _, _ in self._events()]
+        self.assertIn("Unseen", titles)
+        self.assertIn("Holiday", titles)
+
+    def test_requires_login_when_pin_required(self):
+        SystemConfig.objects.update_or_create(id=1, defaults={"pin_required": True})
+        response = Client().get(reverse("calendar_month_json"))
+        self.assertEqual(response.status_code, 403)
+
+
+# ---------------------------------------------------------
+# 15. LIVE SET (cached until the next open/close boundary)
+# ---------------------------------------------------------
+class LiveSetTests(TestCase):
+
+    def setUp(self):
+        caches["default"].clear()
+        self.course = Course.objects.create(title="Live set", code="999997")
+        self.now = datetime(2031, 3, 10, 9, 0, 0)
+
+    def _get_live_ids(self):
+        """-> (live ids, cache timeout), at self.now."""
+        with mock.patch.object(availability.timezone, "now", return_value=self.now), \
+                mock.patch.object(availability.cache, "set", wraps=availability.cache.set) as cache_set:
+            live_ids = availability.get_live_ids()
+        timeout = cache_set.call_args.args[2] if cache_set.called else None
+        return live_ids, timeout
+
+    def test_expires_at_next_boundary(self):
+        running = Quiz.objects.create(course=self.course, title="Running", is_live=True,
+                                      open_date=self.now - timedelta(hours=1),
+                                      close_date=self.now + timedelta(minutes=30))
+        Exam.objects.create(course=self.course, title="Opens soon", is_live=True,
+                            open_date=self.now + timedelta(seconds=90), close_date=self.now + timedelta(hours=2))
+        # Not live: its boundaries don't count
+        Exam.objects.create(course=self.course, title="Draft", is_live=False,
+                            open_date=self.now + timedelta(seconds=10), close_date=self.now + timedelta(hours=2))
+
+        live_ids, timeout = self._get_live_ids()
+        self.assertEqual(live_ids["Quiz"], {running.pk})
+        self.assertEqual(live_ids["Exam"], set())
+        # The exam opening in 90s; +1 because close_date is inclusive
+        self.assertEqual(timeout, 91)
+
+        # Cached: no recompute until a save drops it
+        self.assertEqual(self._get_live_ids()[1], None)
+        running.save()
+        self.assertEqual(self._get_live_ids()[1], 91)
+
+    def test_no_boundary_uses_max_timeout(self):
+        Quiz.objects.create(course=self.course, title="Open-ended", is_live=True,
+                            open_date=self.now - timedelta(hours=1), close_date=None)
+        self.assertEqual(self._get_live_ids()[1], availability.LIVE_SET_MAX_TIMEOUT)
+
+
+# ---------------------------------------------------------
+# 16. ASSESSMENT INDEX SYNC (signals, admin actions)
+# ---------------------------------------------------------
+class AssessmentIndexTests(TestCase):
+
+    def setUp(self):
+        caches["default"].clear()
+        self.course = Course.objects.create(title="Index", code="999998")
+        now = timezone.now()
+        self.quiz = Quiz.objects.create(course=self.course, title="Indexed", is_live=True,
+                                        open_date=now - timedelta(hours=1), close_date=now + timedelta(hours=1))
+        self.other = Quiz.objects.create(course=self.course, title="Other", open_date=now)
+
+    def _row(self, obj):
+        return AssessmentIndex.objects.get(kind=type(obj).__name__.upper(), object_id=obj.pk)
+
+    def test_save_and_delete_follow_the_source(self):
+        self.quiz.title = "Renamed"
+        self.quiz.save()
+        self.assertEqual(self._row(self.quiz).title, "Renamed")
+        self.quiz.delete()
+        self.assertFalse(AssessmentIndex.objects.filter(kind="QUIZ", object_id=self.quiz.pk).exists())
+
+    def test_admin_action_on_changelist_filtered_by_is_live(self):
+        admin_user = User.objects.create_superuser("index-admin", "index@example.com", "index")
+        self.client.force_login(admin_user)
+        # The filter no longer matches once the update has run
+        response = self.client.post(
+            reverse("admin:moodle_quiz_changelist") + "?is_live__exact=1",
+            {"action": "stop_live", "_selected_action": [self.quiz.pk]},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Quiz.objects.get(pk=self.quiz.pk).is_live)
+        self.assertFalse(self._row(self.quiz).is_live)
+
+        self.client.post(
+            reverse("admin:moodle_quiz_changelist") + "?is_live__exact=0",
+            {"action": "make_live", "_selected_action": [self.quiz.pk, self.other.pk]},
+        )
+        self.assertTrue(self._row(self.quiz).is_live)
+        self.assertTrue(self._row(self.other).is_live)
+
+    def test_moving_a_question_refreshes_both_parents(self):
+        question = Question.objects.create(parent_type="QUIZ", parent_id=self.quiz.pk, text="Moves")
+        self.assertEqual(self._row(self.quiz).question_count, 1)
+        self.assertEqual(len(get_question_nav("QUIZ", self.quiz.pk)), 1)
+
+        question = Question.objects.get(pk=question.pk)
+        question.parent_id = self.other.pk
+        question.save()
+        self.assertEqual(self._row(self.quiz).question_count, 0)
+        self.assertEqual(self._row(self.other).question_count, 1)
+        self.assertEqual(get_question_nav("QUIZ", self.quiz.pk), [])
+        self.assertEqual([entry["id"] for entry in get_question_nav("QUIZ", self.other.pk)], [question.pk])
+
+
+# ---------------------------------------------------------
+# 17. QUESTION NAV (cached summary, one question per page)
+# ---------------------------------------------------------
+@override_settings(ADMISSION_DEFAULT_CAP=0)
+class QuestionNavTests(TestCase):
+
+    def setUp(self):
+        for alias in caches:
+            caches[alias].clear()
+        SystemConfig.objects.get_or_create(id=1)
+        course = Course.objects.create(title="Nav", code="999999")
+        now = timezone.now()
+        self.quiz = Quiz.objects.create(course=course, title="Nav quiz", is_live=True,
+                                        open_date=now - timedelta(hours=1), close_date=now + timedelta(hours=1))
+        self.questions = [
+            Question.objects.create(parent_type="QUIZ", parent_id=self.quiz.pk, text=f"Nav question {n}",
+                                    correct_option="A" if n != 2 else None)
+            for n in (1, 2, 3)
+        ]
+
+    def test_nav_summary_is_cached(self):
+        with self.assertNumQueries(1):
+            nav = get_question_nav("quiz", self.quiz.pk)
+        self.assertEqual([entry["id"] for entry in nav], [q.pk for q in self.questions])
+        self.assertEqual([entry["has_answer_key"] for entry in nav], [True, False, True])
+        with self.assertNumQueries(0):
+            get_question_nav("QUIZ", self.quiz.pk)
+
+    def test_fetches_only_the_requested_question(self):
+        nav = get_question_nav("QUIZ", self.quiz.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_question_at("QUIZ", self.quiz.pk, nav[1]).pk, self.questions[1].pk)
+        with self.assertNumQueries(0):
+            get_question_at("QUIZ", self.quiz.pk, nav[1])
+        # An id from another assessment's nav is refused
+        with self.assertRaises(Http404):
+            get_question_at("EXAM", self.quiz.pk, nav[1])
+
+    def test_attempt_page_shows_the_question_at_q(self):
+        UserTable.objects.create(username="nav-student")
+        session = self.client.session
+        session["username"] = "nav-student"
+        session.save()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+        response = self.client.get(reverse("test_attempt", args=["quiz", self.quiz.pk]), {"q": 2})
+        self.assertContains(response, "Nav question 2")
+        self.assertNotContains(response, "Nav question 3")
+
+
+# ---------------------------------------------------------
+# 18. INLINE OPTIONS (Question.options_json mirror)
+# ---------------------------------------------------------
+class InlineOptionsTests(TestCase):
+
+    def setUp(self):
+        caches["default"].clear()
+        self.question = Question.objects.create(parent_type="QUIZ", parent_id=1, text="Mirror")
+
+    def _inline(self):
+        return Question.objects.get(pk=self.question.pk).options_json
+
+    def test_save_and_delete_are_mirrored(self):
+        b = Option.objects.create(question=self.question, option_label="B", text="Bee")
+        a = Option.objects.create(question=self.question, option_label="A", text="Ay")
+        self.assertEqual(self._inline(), [
+            {"id": a.pk, "option_label": "A", "text": "Ay", "image": ""},
+            {"id": b.pk, "option_label": "B", "text": "Bee", "image": ""},
+        ])
+
+        b.text = "Bee 2"
+        b.save()
+        self.assertEqual(self._inline()[1]["text"], "Bee 2")
+        a.delete()
+        self.assertEqual([option["id"] for option in self._inline()], [b.pk])
+
+    def test_inline_and_table_options_match(self):
+        for label in "ABCD":
+            Option.objects.create(question=self.question, option_label=label, text=f"Option {label}")
+        question = Question.objects.get(pk=self.question.pk)
+        with override_settings(QUESTION_INLINE_OPTIONS=True), self.assertNumQueries(0):
+            inline = [(o.pk, o.option_label, o.text) for o in question.get_options()]
+        with override_settings(QUESTION_INLINE_OPTIONS=False):
+            table = [(o.pk, o.option_label, o.text) for o in question.get_options()]
+        self.assertEqual(inline, table)
+
+    def test_cached_question_is_dropped(self):
+        get_question_at("QUIZ", 1, {"id": self.question.pk})
+        Option.objects.create(question=self.question, option_label="A", text="Late")
+        with override_settings(QUESTION_INLINE_OPTIONS=True):
+            options = get_question_at("QUIZ", 1, {"id": self.question.pk}).get_options()
+        self.assertEqual([o.text for o in options], ["Late"])
+
+
+# ---------------------------------------------------------
+# 19. WARM ASSESSMENTS (nav, question bundle before open)
+# ---------------------------------------------------------
+class WarmAssessmentsTests(TestCase):
+
+    def setUp(self):
+        for alias in caches:
+            caches[alias].clear()
+        course = Course.objects.create(title="Warm", code="999990")
+        now = timezone.now()
+        self.soon = Quiz.objects.create(course=course, title="Opens soon", is_live=True,
+                                        open_date=now + timedelta(minutes=5), close_date=now + timedelta(hours=1))
+        self.later = Quiz.objects.create(course=course, title="Opens later", is_live=True,
+                                         open_date=now + timedelta(minutes=30), close_date=now + timedelta(hours=1))
+        self.questions = [Question.objects.create(parent_type="QUIZ", parent_id=self.soon.pk, text=f"W{n}")
+                          for n in range(3)]
+
+    def test_warms_only_assessments_opening_within_lead(self):
+        out = StringIO()
+        call_command("warm_assessments", "--lead", "10", stdout=out)
+        self.assertIn(f"QUIZ #{self.soon.pk} 'Opens soon': 3 questions (3 bundled)", out.getvalue())
+        self.assertNotIn("Opens later", out.getvalue())
+
+        # The attempt page's nav and question fetches are cache hits now
+        with self.assertNumQueries(0):
+            nav = get_question_nav("QUIZ", self.soon.pk)
+            for entry in nav:
+                get_question_at("QUIZ", self.soon.pk, entry)
+        with self.assertNumQueries(1):
+            get_question_nav("QUIZ", self.later.pk)
+
+
+# ---------------------------------------------------------
+# 20. JOB QUEUE (claims, retries, stale workers)
+# ---------------------------------------------------------
+@jobs.job_handler("test_flaky")
+def _flaky_job(job, fail_times=0):
+    if job.attempts <= fail_times:
+        raise RuntimeError(f"attempt {job.attempts} failed")
+    return {"attempts": job.attempts}
+
+
+@override_settings(JOB_QUEUE_EAGER=False, JOB_RETRY_BACKOFF_SECONDS=30)
+class JobQueueTests(TestCase):
+
+    def _make_due(self, job):
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now() - timedelta(seconds=1))
+
+    def test_enqueue_and_claim_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            queued = jobs.enqueue("test_flaky")
+        self.assertEqual(Job.objects.get(pk=queued.pk).status, "QUEUED")
+        with self.assertRaises(ValueError):
+            jobs.enqueue("no_such_job")
+
+        claimed = jobs.claim_next("worker-a")
+        self.assertEqual((claimed.pk, claimed.status, claimed.locked_by, claimed.attempts),
+                         (queued.pk, "RUNNING", "worker-a", 1))
+        self.assertIsNone(jobs.claim_next("worker-b"))
+        self.assertTrue(jobs.run_job(claimed))
+        self.assertEqual(Job.objects.get(pk=queued.pk).status, "DONE")
+
+    def test_retries_with_backoff_then_fails(self):
+        queued = jobs.enqueue("test_flaky", max_attempts=3, fail_times=5)
+        for attempt, backoff in ((1, 30), (2, 60)):
+            self._make_due(queued)
+            before = timezone.now()
+            self.assertFalse(jobs.run_job(jobs.claim_next("worker")))
+            job = Job.objects.get(pk=queued.pk)
+            self.assertEqual((job.status, job.attempts), ("QUEUED", attempt))
+            self.assertIn(f"attempt {attempt} failed", job.error)
+            self.assertGreaterEqual(job.run_after, before + timedelta(seconds=backoff))
+            # Not due again until the backoff has passed
+            self.assertIsNone(jobs.claim_next("worker"))
+
+        self._make_due(queued)
+        self.assertFalse(jobs.run_job(jobs.claim_next("worker")))
+        job = Job.objects.get(pk=queued.pk)
+        self.assertEqual((job.status, job.attempts), ("FAILED", 3))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_stale_running_job_is_requeued_and_drained(self):
+        queued = jobs.enqueue("test_flaky")
+        jobs.claim_next("dead-worker")
+        Job.objects.filter(pk=queued.pk).update(
+            started_at=timezone.now() - timedelta(seconds=settings.JOB_STALE_SECONDS + 1)
+        )
+        fresh = jobs.enqueue("test_flaky")
+        jobs.claim_next("live-worker")
+
+        self.assertEqual(jobs.drain("scheduler"), 1)
+        self.assertEqual(Job.objects.get(pk=queued.pk).status, "DONE")
+        self.assertEqual(Job.objects.get(pk=queued.pk).attempts, 2)
+        # Still within JOB_STALE_SECONDS: left to its worker
+        self.assertEqual(Job.objects.get(pk=fresh.pk).status, "RUNNING")
+
+    def test_scheduler_runs_one_drain_thread(self):
+        release = threading.Event()
+        with mock.patch.object(scheduler, "_run_jobs", side_effect=lambda: release.wait(5)) as run_jobs:
+            scheduler._drain_jobs()
+            # Still draining: no second thread
+            scheduler._drain_jobs()
+            release.set()
+            scheduler._jobs_thread.join(5)
+        run_jobs.assert_called_once_with()
+
+
+# ---------------------------------------------------------
+# 21. LIVE EVENTS (SSE fan-out)
+# ---------------------------------------------------------
+class LiveEventsTests(SimpleTestCase):
+
+    def _events(self, payloads):
+        return [(p.split(b"\n")[0].decode(), json.loads(p.split(b"\n")[1][len(b"data: "):])) for p in payloads]
+
+    def test_diff_emits_each_change_once(self):
+        broadcaster = live_events.Broadcaster()
+        # First snapshot is the baseline: nothing to announce
+        self.assertEqual(broadcaster.diff("ONLINE", {"QUIZ": {1}}), [])
+
+        self.assertEqual(self._events(broadcaster.diff("ONLINE", {"QUIZ": {1}, "EXAM": {7}})),
+                         [("event: assessment", {"kind": "EXAM", "id": 7, "live": True})])
+        self.assertEqual(broadcaster.diff("ONLINE", {"QUIZ": {1}, "EXAM": {7}}), [])
+
+        self.assertEqual(self._events(broadcaster.diff("ONLINE", {"EXAM": {7}})),
+                         [("event: assessment", {"kind": "QUIZ", "id": 1, "live": False})])
+        self.assertEqual(self._events(broadcaster.diff("OFFLINE", {"EXAM": {7}})),
+                         [("event: system", {"status": "OFFLINE"})])
+        self.assertEqual(broadcaster.diff("OFFLINE", {"EXAM": {7}}), [])
+
+    @override_settings(SSE_QUEUE_SIZE=2)
+    def test_slow_client_drops_oldest_event(self):
+        broadcaster = live_events.Broadcaster()
+        queue = asyncio.Queue(maxsize=settings.SSE_QUEUE_SIZE)
+        broadcaster.subscribers.add(queue)
+        for payload in (b"1", b"2", b"3"):
+            broadcaster.publish(payload)
+        self.assertEqual([queue.get_nowait() for _ in range(queue.qsize())], [b"2", b"3"])
+
+    async def _call(self, method):
+        sent = []
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": method, "path": live_events.LIVE_EVENTS_PATH, "query_string": b""}
+        await live_events.live_events_app(scope, receive, send)
+        return sent[0]
+
+    async def test_rejects_non_get(self):
+        start = await self._call("POST")
+        self.assertEqual((start["status"], dict(start["headers"])[b"allow"]), (405, b"GET"))
+
+    @override_settings(SSE_MAX_CONNECTIONS=1)
+    async def test_connection_cap(self):
+        with mock.patch.object(live_events.broadcaster, "subscribers", {object()}):
+            start = await self._call("GET")
+        self.assertEqual((start["status"], dict(start["headers"])[b"retry-after"]), (503, b"30"))
@@ -29,4 +29,11 @@ urlpatterns = [
     path('user/ban/<int:user_id>/', views.toggle_ban_user, name='toggle_ban_user'),
     path('user/delete/<int:user_id>/', views.delete_user, name='delete_user'),
     path('settings/update/', views.update_settings, name='update_settings'),
+
+    # Background jobs, request timings, slow queries & profiles
+    path('jobs/<int:job_id>/', views.job_status, name='job_status'),
+    path('timing/reset/', views.reset_timings, name='reset_timings'),
+    path('slow-queries/reset/', views.reset_slow_queries, name='reset_slow_queries'),
+    path('profiles/clear/', views.clear_profiles, name='clear_profiles'),
+    path('profiles/<str:profile_id>.<str:kind>', views.download_profile, name='download_profile'),
 ]
\ No newline at end of file
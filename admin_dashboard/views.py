@@ -62,17 +62,27 @@ def _combine_date_time(date_str, time_str):
             return None
     return None
 
+from django.conf import settings
 from django.utils import timezone
 from django.db.models import Count
+from django.http import FileResponse, Http404, JsonResponse
 import json
+import os
 from datetime import datetime
 
 # Import your models
 from moodle.models import (
     UserTable, SystemConfig, Course,
     Assignment, Quiz, Exam,
-    Question, Option, CalendarEvent
+    Question, Option, CalendarEvent, AssessmentIndex
 )
+from moodle.admission import admission_cap, admission_metrics
+from moodle.availability import live_queryset
+from moodle.jobs import enqueue
+from moodle.models import Job
+from moodle.request_timing import slowest_routes, reset_timings as clear_route_timings
+from moodle import profiling
+from moodle.slow_queries import slow_query_groups, reset_slow_queries as clear_slow_queries
 
 # ... (Keep Auth helpers like is_superuser, admin_login, etc. same as before) ...
 
@@ -89,9 +99,11 @@ def admin_dashboard(request):
     online_users = UserTable.objects.filter(last_active__gte=time_threshold).count()
 
     total_courses = Course.objects.count()
-    total_quizzes = Quiz.objects.count()
-    total_assignments = Assignment.objects.count()
-    total_exams = Exam.objects.count()
+    # One grouped count over the assessment index instead of three COUNT(*)s
+    kind_counts = dict(AssessmentIndex.objects.values_list('kind').annotate(n=Count('id')))
+    total_quizzes = kind_counts.get('QUIZ', 0)
+    total_assignments = kind_counts.get('ASSIGNMENT', 0)
+    total_exams = kind_counts.get('EXAM', 0)
     total_questions = Question.objects.count()
 
     # --- 2. Graph Data: User Growth (Day-wise Cumulative) ---
@@ -133,14 +145,27 @@ def admin_dashboard(request):
     # --- 4. Fetch Lists for Tables ---
     users = UserTable.objects.all().order_by('-created_at')
     courses = Course.objects.all()
-    quizzes = Quiz.objects.all().order_by('-open_date')
-    assignments = Assignment.objects.all().order_by('-open_date')
-    exams = Exam.objects.all().order_by('-open_date')
-    questions = Question.objects.all().order_by('-id')
+    # The tables show each row's course and each question's options: fetch
+    # them with the rows instead of one query per row
+    quizzes = Quiz.objects.select_related('course').order_by('-open_date')
+    assignments = Assignment.objects.select_related('course').order_by('-open_date')
+    exams = Exam.objects.select_related('course').order_by('-open_date')
+    questions = Question.objects.prefetch_related('options').order_by('-id')
 
     # --- 5. System Config ---
     system_config, created = SystemConfig.objects.get_or_create(id=1)
 
+    # --- 6. Waiting Rooms (live assessments with admission control) ---
+    admission_queues = []
+    live_tests = [(model.__name__, test) for model in (Quiz, Exam, Assignment)
+                  for test in live_queryset(model).select_related('course')]
+    queue_metrics = admission_metrics((kind, test.pk) for kind, test in live_tests)
+    for kind, test in live_tests:
+        cap = admission_cap(test)
+        metrics = queue_metrics[(kind, test.pk)]
+        if cap or metrics['issued']:
+            admission_queues.append({'test': test, 'kind': kind, 'cap': cap, **metrics})
+
     context = {
         'stats': {
             'total_users': total_users,
@@ -164,7 +189,26 @@ def admin_dashboard(request):
         'exams': exams,
         'questions': questions,
         'config': system_config,
+        'admission_queues': admission_queues,
+        'jobs': Job.objects.all()[:50],
     }
+
+    # --- 7. Request timings (all workers, see moodle/request_timing.py) ---
+    route_timings, timings_since = slowest_routes()
+    context.update({
+        'route_timings': route_timings,
+        'timings_since': datetime.fromtimestamp(timings_since) if timings_since else None,
+        'timing_flush_seconds': settings.REQUEST_TIMING_FLUSH_SECONDS,
+        'profiles': profiling.recent_profiles(),
+    })
+
+    # --- 8. Slow queries (all workers, see moodle/slow_queries.py) ---
+    slow_queries, slow_since = slow_query_groups()
+    context.update({
+        'slow_queries': slow_queries,
+        'slow_since': datetime.fromtimestamp(slow_since) if slow_since else None,
+        'slow_query_ms': settings.SLOW_QUERY_MS,
+    })
     return render(request, 'admin_dashboard/admin.html', context)
 
 @login_required(login_url='admin_dashboard:admin_login')
@@ -203,8 +247,9 @@ def edit_course(request, course_id):
 @user_passes_test(is_superuser, login_url='admin_dashboard:admin_login')
 def delete_course(request, course_id):
     course = get_object_or_404(Course, id=course_id)
-    course.delete()
-    messages.success(request, "Course deleted.")
+    # Cascades through every assessment of the course: run it in the worker
+    queued = enqueue('delete_course', created_by=request.user.get_username(), course_id=course.id)
+    messages.success(request, f"Deleting course \"{course.title}\" as job #{queued.pk}.")
     return redirect('admin_dashboard:admin_dashboard')
 
 
@@ -254,15 +299,23 @@ def edit_assessment(request, type, id):
 @login_required(login_url='admin_dashboard:admin_login')
 @user_passes_test(is_superuser, login_url='admin_dashboard:admin_login')
 def delete_assessment(request, id):
-    # Try to find and delete in order
-    if Quiz.objects.filter(id=id).exists():
-        Quiz.objects.get(id=id).delete()
-    elif Assignment.objects.filter(id=id).exists():
-        Assignment.objects.get(id=id).delete()
-    elif Exam.objects.filter(id=id).exists():
-        Exam.objects.get(id=id).delete()
-
-    messages.success(request, "Assessment deleted.")
+    # ?type=quiz|assignment|exam picks the table; ids are only unique per type.
+    # Without it, keep the old Quiz -> Assignment -> Exam preference, in one lookup.
+    model_map = {'QUIZ': Quiz, 'ASSIGNMENT': Assignment, 'EXAM': Exam}
+    kinds = AssessmentIndex.objects.filter(object_id=id).values_list('kind', flat=True)
+
+    assess_type = request.GET.get('type', '').upper()
+    if assess_type in model_map:
+        kinds = kinds.filter(kind=assess_type)
+
+    found = set(kinds)
+    for kind in model_map:
+        if kind in found:
+            queued = enqueue('delete_assessment', created_by=request.user.get_username(), kind=kind, object_id=id)
+            messages.success(request, f"Deleting {kind.lower()} as job #{queued.pk}.")
+            break
+    else:
+        messages.error(request, "Assessment not found.")
     return redirect('admin_dashboard:admin_dashboard')
 
 
@@ -348,6 +401,10 @@ def add_question(request):
                         question.correct_answer_text = ans_text
                         question.save()
 
+            # Web-sized copies of any uploaded images are built by the worker
+            if request.FILES:
+                enqueue('build_image_derivatives', created_by=request.user.get_username(),
+                        parent_type=parent_type, parent_id=int(parent_id))
             messages.success(request, "Questions added successfully.")
 
         except Exception as e:
@@ -555,4 +612,59 @@ def edit_user(request):
         user.save()
         messages.success(request, f"User '{user.username}' updated successfully.")
 
-    return redirect('admin_dashboard:admin_dashboard')
\ No newline at end of file
+    return redirect('admin_dashboard:admin_dashboard')
+
+
+# ---------------------------------------------------------
+# 6. BACKGROUND JOBS, REQUEST TIMINGS, SLOW QUERIES & PROFILES
+# ---------------------------------------------------------
+@login_required(login_url='admin_dashboard:admin_login')
+@user_passes_test(is_superuser, login_url='admin_dashboard:admin_login')
+def reset_timings(request):
+    if request.method == "POST":
+        clear_route_timings()
+        messages.success(request, "Request timings cleared.")
+    return redirect('admin_dashboard:admin_dashboard')
+
+
+@login_required(login_url='admin_dashboard:admin_login')
+@user_passes_test(is_superuser, login_url='admin_dashboard:admin_login')
+def reset_slow_queries(request):
+    if request.method == "POST":
+        clear_slow_queries()
+        messages.success(request, "Slow-query log cleared.")
+    return redirect('admin_dashboard:admin_dashboard')
+
+
+@login_required(login_url='admin_dashboard:admin_login')
+@user_passes_test(is_superuser, login_url='admin_dashboard:admin_login')
+def download_profile(request, profile_id, kind):
+    path = profiling.profile_path(profile_id, kind)
+    if path is None:
+        raise Http404("No such profile.")
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=os.path.basename(path))
+
+
+@login_required(login_url='admin_dashboard:admin_login')
+@user_passes_test(is_superuser, login_url='admin_dashboard:admin_login')
+def clear_profiles(request):
+    if request.method == "POST":
+        profiling.clear_profiles()
+        messages.success(request, "Saved profiles deleted.")
+    return redirect('admin_dashboard:admin_dashboard')
+
+
+@login_required(login_url='admin_dashboard:admin_login')
+@user_passes_test(is_superuser, login_url='admin_dashboard:admin_login')
+def job_status(request, job_id):
+    job = get_object_or_404(Job, id=job_id)
+    return JsonResponse({
+        'id': job.id,
+        'name': job.name,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.progress_message,
+        'attempts': job.attempts,
+        'result': job.result,
+        'error': job.error.strip().splitlines()[-1] if job.error else '',
+    })
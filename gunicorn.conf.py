@@ -0,0 +1,39 @@
+# gunicorn reads this file from the working directory on every start
+# (render.yaml's startCommand, the bench commands in moodle/loadgen.py).
+# Worker count: gunicorn's own WEB_CONCURRENCY env var / -w.
+import os
+import shutil
+
+# --------------------------------------------------
+# 🚀 PRELOAD (cold starts, see moodle/startup.py)
+# --------------------------------------------------
+# The master imports Django, runs setup and the warm-up once, then forks:
+# workers start serving immediately and share those pages of memory.
+# The trade-off is that code changes need a full restart, not a HUP.
+preload_app = os.getenv("GUNICORN_PRELOAD", "True") == "True"
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+    # Nothing opened in the master may be shared by two workers
+    from django.db import connections
+    from django.core.cache import caches
+    from moodle.db_pool import forget_pools
+
+    forget_pools()
+    connections.close_all()
+    caches.close_all()
+
+
+# --------------------------------------------------
+# 📈 METRICS DIR (see moodle/metrics.py)
+# --------------------------------------------------
+# Snapshots from the previous run would be summed into /metrics (their
+# counters are kept once a pid is gone), so start from an empty directory.
+def on_starting(server):
+    # Without preload the master hasn't imported the app (and its settings) yet
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "iitpcep.settings")
+    from django.conf import settings
+
+    shutil.rmtree(settings.METRICS_DIR, ignore_errors=True)
@@ -0,0 +1,26 @@
+"""
+ASGI config for iitpcep project.
+This exposes the ASGI callable as a module-level variable named `application`.
+Live events (Server-Sent Events) are answered here directly; every other
+request goes through Django's normal handler.
+"""
+
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'iitpcep.settings')
+
+django_application = get_asgi_application()
+
+# Imported after setup: it touches models and settings
+from moodle.live_events import LIVE_EVENTS_PATH, live_events_app  # noqa: E402
+from moodle.startup import warm_up  # noqa: E402
+
+# The first request's one-off work, done now (see moodle/startup.py)
+warm_up()
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and scope["path"] == LIVE_EVENTS_PATH:
+        return await live_events_app(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -1,5 +1,6 @@
 import os
 import json
+import tempfile
 import warnings
 from pathlib import Path
 from config import DATABASE, SYSTEM  # ✅ import DB + system config safely
@@ -15,6 +16,8 @@ USE_TZ = False
 BASE_DIR = Path(__file__).resolve().parent.parent
 # Reverted to using environment variables for safety
 SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "django-insecure-local-dev-key")
+# Set by iitpcep/settings_test.py (manage.py uses it for "test")
+TESTING = os.getenv("DJANGO_TESTING", "False") == "True"
 
 # --------------------------------------------------
 # ⚙️ DEBUG & ALLOWED HOSTS
@@ -68,29 +71,35 @@ INSTALLED_APPS = [
 # --------------------------------------------------
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",  # Should be near the top
+    "moodle.middleware.StaticFilesMiddleware",  # WhiteNoise (async-capable); should be near the top
+    "moodle.middleware.RequestTimingMiddleware",  # Server-Timing + route histograms (static files excluded)
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
+    "moodle.middleware.ProfilerMiddleware",  # ?_profile=1 for superusers; needs request.user
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "moodle.middleware.SystemStatusMiddleware",
     "moodle.middleware.ActiveUserMiddleware",
 ]
 
 # --------------------------------------------------
-# 🌐 URL + WSGI
+# 🌐 URL + WSGI / ASGI
 # --------------------------------------------------
 ROOT_URLCONF = "iitpcep.urls"
 WSGI_APPLICATION = "iitpcep.wsgi.application"
+# Production serves the ASGI app (needed for live events):
+#   gunicorn iitpcep.asgi:application -k uvicorn.workers.UvicornWorker
+ASGI_APPLICATION = "iitpcep.asgi.application"
 
 # --------------------------------------------------
 # 🎨 TEMPLATES
 # --------------------------------------------------
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # Stock DjangoTemplates that also reports render time (request_timing.py)
+        "BACKEND": "moodle.request_timing.TimedDjangoTemplates",
         "DIRS": [os.path.join(BASE_DIR, "moodle", "templates")],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -130,6 +139,85 @@ DATABASES = {
     }
 }
 
+# --------------------------------------------------
+# 🔌 DATABASE CONNECTIONS (moodle/db_pool.py)
+# --------------------------------------------------
+# DATABASE_URL (Postgres on Render) replaces the local SQLite database.
+# CONN_HEALTH_CHECKS pings a reused connection before trusting it.
+# DB_POOL_SIZE > 0 switches to the pooled variant of the same backend: at
+# most DB_POOL_SIZE connections per worker process, shared by its threads
+# and handed back after every request (CONN_MAX_AGE 0); threads wait up to
+# DB_POOL_TIMEOUT seconds for one. 0 keeps Django's one-connection-per-
+# thread with CONN_MAX_AGE.
+# With DATABASE_URL the pool is on by default (5 per worker): under ASGI
+# every sync request runs on a fresh short-lived thread, so a per-thread
+# CONN_MAX_AGE connection is never reused and each request would pay a new
+# Postgres TLS handshake.
+if os.getenv("DATABASE_URL"):
+    import dj_database_url  # only needed here: keeps it off the local boot path
+
+    DATABASES["default"] = dj_database_url.parse(
+        os.environ["DATABASE_URL"],
+        conn_max_age=int(os.getenv("DB_CONN_MAX_AGE", "600")),
+        ssl_require=os.getenv("DB_SSL_REQUIRE", "True") == "True",
+    )
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+POOLED_ENGINES = {
+    "django.db.backends.postgresql": "moodle.db_backends.postgresql",
+    "django.db.backends.sqlite3": "moodle.db_backends.sqlite3",
+}
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5" if os.getenv("DATABASE_URL") else "0"))
+if DB_POOL_SIZE and DATABASES["default"]["ENGINE"] in POOLED_ENGINES:
+    DATABASES["default"].update({
+        "ENGINE": POOLED_ENGINES[DATABASES["default"]["ENGINE"]],
+        "CONN_MAX_AGE": 0,
+        "POOL": {
+            "SIZE": DB_POOL_SIZE,
+            "TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            "MAX_LIFETIME": float(os.getenv("DB_POOL_MAX_LIFETIME", "600")),
+        },
+    })
+
+# --------------------------------------------------
+# 🪶 SQLITE PROFILE (moodle/db_backends/sqlite3_tuned, moodle/write_queue.py)
+# --------------------------------------------------
+# Applied whenever the database is SQLite (local default, DATABASE_URL
+# sqlite://). WAL lets readers carry on while one connection writes;
+# writers queue on busy_timeout instead of failing with "database is
+# locked", and atomic() takes the write lock up front (BEGIN IMMEDIATE).
+# synchronous=NORMAL is safe in WAL (a power cut may lose the last commits,
+# never corrupt the file). SQLITE_TUNED=False keeps the stock backend.
+# The tests run on a temporary file, not :memory:, so that threads get the
+# same locking as the live site.
+SQLITE_TUNED = os.getenv("SQLITE_TUNED", "True") == "True"
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "20000")),
+    "synchronous": "NORMAL",
+    "mmap_size": int(os.getenv("SQLITE_MMAP_MB", "256")) * 1024 * 1024,
+    "cache_size": -int(os.getenv("SQLITE_CACHE_MB", "64")) * 1024,  # negative = KiB
+    "temp_store": "MEMORY",
+}
+if SQLITE_TUNED and DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    DATABASES["default"]["ENGINE"] = "moodle.db_backends.sqlite3_tuned"
+TUNED_SQLITE_ENGINES = ("moodle.db_backends.sqlite3_tuned", "moodle.db_backends.sqlite3")
+if SQLITE_TUNED and DATABASES["default"]["ENGINE"] in TUNED_SQLITE_ENGINES:
+    DATABASES["default"]["PRAGMAS"] = SQLITE_PRAGMAS
+if TESTING and "sqlite" in DATABASES["default"]["ENGINE"]:
+    DATABASES["default"]["TEST"] = {
+        "NAME": os.path.join(tempfile.gettempdir(), f"iitpcep-test-{os.getpid()}.sqlite3"),
+    }
+
+# Presence and attempt/answer writes go through one writer thread per
+# process, so a surge of students does not turn into a pile of writers
+# waiting on the file lock. Off for the test run (a TestCase's open
+# transaction is invisible to other threads) and for Postgres.
+WRITE_QUEUE = os.getenv(
+    "WRITE_QUEUE", str(not TESTING and "sqlite" in DATABASES["default"]["ENGINE"])
+) == "True"
+WRITE_QUEUE_TIMEOUT = float(os.getenv("WRITE_QUEUE_TIMEOUT", "30"))
+
 # Local Static Files
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [os.path.join(BASE_DIR, "moodle", "static")]
@@ -141,6 +229,230 @@ MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 DEFAULT_FILE_STORAGE = "django.core.files.storage.FileSystemStorage"
 
+# --------------------------------------------------
+# 🧩 QUESTION OPTIONS LAYOUT
+# --------------------------------------------------
+# True: student pages read options from Question.options_json (one row
+# per question). False: read the Option table via prefetch_related.
+QUESTION_INLINE_OPTIONS = os.getenv("QUESTION_INLINE_OPTIONS", "True") == "True"
+
+# --------------------------------------------------
+# ⚡ CACHES (shared by every worker)
+# --------------------------------------------------
+# DJANGO_CACHE_BACKEND picks the store:
+#   "redis"     — production (REDIS_URL)
+#   "memcached" — production (MEMCACHED_LOCATION)
+#   "file"      — local default; one directory shared by all local processes,
+#                 but culled at MAX_ENTRIES and gone with the disk (Render's
+#                 is ephemeral): never holds sessions or answers
+#   "locmem"    — per-process only (used for the test run)
+# Each alias gets its own KEY_PREFIX so content, config and presence keys never
+# collide; bump CACHE_VERSION on deploy to orphan every old key at once.
+# The backends are the stock ones plus call timing (moodle/request_timing.py).
+CACHE_BACKEND = os.getenv(
+    "DJANGO_CACHE_BACKEND",
+    "locmem" if TESTING else ("redis" if os.getenv("REDIS_URL") else "file"),
+)
+CACHE_VERSION = int(os.getenv("CACHE_VERSION", "1"))
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(BASE_DIR, ".django_cache"))
+# A store every worker sees and that survives restarts and culling
+CACHE_IS_SHARED = CACHE_BACKEND in ("redis", "memcached")
+
+
+def _cache(namespace, timeout, max_entries=10000):
+    if CACHE_BACKEND == "redis":
+        config = {
+            "BACKEND": "moodle.request_timing.TimedRedisCache",
+            "LOCATION": os.getenv("REDIS_URL", "redis://127.0.0.1:6379/1"),
+        }
+    elif CACHE_BACKEND == "memcached":
+        config = {
+            "BACKEND": "moodle.request_timing.TimedPyMemcacheCache",
+            "LOCATION": os.getenv("MEMCACHED_LOCATION", "127.0.0.1:11211").split(","),
+        }
+    elif CACHE_BACKEND == "file":
+        # One sub-directory per alias so cache.clear() stays scoped
+        config = {
+            "BACKEND": "moodle.request_timing.TimedFileBasedCache",
+            "LOCATION": os.path.join(CACHE_DIR, namespace),
+            "OPTIONS": {"MAX_ENTRIES": max_entries},
+        }
+    else:
+        config = {
+            "BACKEND": "moodle.request_timing.TimedLocMemCache",
+            "LOCATION": f"iitpcep-{namespace}",
+        }
+    config.update({
+        "KEY_PREFIX": f"iitpcep:{namespace}",
+        "VERSION": CACHE_VERSION,
+        "TIMEOUT": timeout,
+    })
+    return config
+
+
+CACHES = {
+    # Calendar months, live set, question nav
+    "default": _cache("content", 300),
+    # In-progress test answers; kept apart so content churn never culls them
+    "answers": _cache("answers", 60 * 60 * 24, max_entries=200000),
+    # SystemConfig row read by the middleware on every request
+    "config": _cache("config", 60),
+    # "last seen" throttle for ActiveUserMiddleware
+    "presence": _cache("presence", 120),
+    # Request timing histograms merged from every worker
+    "metrics": _cache("metrics", 60 * 60 * 24 * 7),
+}
+
+# --------------------------------------------------
+# 🔑 SESSIONS & ANSWER STORE
+# --------------------------------------------------
+# "cached_db" and cache-backed answers need a shared, durable cache (redis,
+# memcached); otherwise sessions and answers stay in the database.
+SESSION_ENGINE = os.getenv(
+    "DJANGO_SESSION_ENGINE",
+    "django.contrib.sessions.backends.cached_db" if CACHE_IS_SHARED else "django.contrib.sessions.backends.db",
+)
+
+# Where in-progress test answers live: "session" or "cache" (see moodle/answer_store.py)
+ANSWER_STORE_BACKEND = os.getenv("ANSWER_STORE_BACKEND", "cache" if CACHE_IS_SHARED else "session")
+ANSWER_STORE_CACHE = "answers"
+ANSWER_STORE_MAX_ANSWERS = int(os.getenv("ANSWER_STORE_MAX_ANSWERS", "1000"))
+ANSWER_STORE_MAX_CHARS = int(os.getenv("ANSWER_STORE_MAX_CHARS", "20000"))
+
+# --------------------------------------------------
+# 🚦 ADMISSION CONTROL (waiting room)
+# --------------------------------------------------
+# When a class clicks "Attempt" together, only this many students per
+# ADMISSION_WINDOW_SECONDS start; the rest wait in FIFO order on a light
+# polling page. Per-assessment admission_cap overrides the default; 0 = off.
+ADMISSION_DEFAULT_CAP = int(os.getenv("ADMISSION_DEFAULT_CAP", "0"))
+ADMISSION_WINDOW_SECONDS = int(os.getenv("ADMISSION_WINDOW_SECONDS", "5"))
+ADMISSION_CACHE = "default"
+# Ticket counters need an atomic increment: the cache's with redis or
+# memcached, AdmissionCounter rows otherwise (moodle/admission.py)
+ADMISSION_COUNTERS = os.getenv("ADMISSION_COUNTERS", "cache" if CACHE_IS_SHARED else "db")
+
+# --------------------------------------------------
+# 📝 ATTEMPTS (moodle/attempts.py)
+# --------------------------------------------------
+# Answers arriving this long after the server-side deadline are still
+# accepted (network latency, slow final autosave).
+ATTEMPT_GRACE_SECONDS = int(os.getenv("ATTEMPT_GRACE_SECONDS", "30"))
+
+# --------------------------------------------------
+# ⏳ BACKGROUND JOBS (moodle/jobs.py)
+# --------------------------------------------------
+# Long admin operations are queued as Job rows and run off the request by
+# the scheduler's job thread (JOB_DRAIN_INTERVAL_SECONDS, see ⏰ SCHEDULER)
+# or a `python manage.py run_jobs` worker; both retry failed jobs and
+# re-queue stale ones. JOB_QUEUE_EAGER=True runs each job inside the
+# request that queued it instead (no retries, subject to the worker timeout).
+JOB_QUEUE_EAGER = os.getenv("JOB_QUEUE_EAGER", "False") == "True"
+JOB_RETRY_BACKOFF_SECONDS = int(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "30"))
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "1800"))
+
+# --------------------------------------------------
+# ⏰ SCHEDULER (moodle/scheduler.py)
+# --------------------------------------------------
+# Periodic tasks run on a thread in each web process. Off for the test run,
+# and where cron / `apply_live_schedule --loop` / `expire_attempts --loop`
+# already run them.
+SCHEDULER = os.getenv("SCHEDULER", str(not TESTING)) == "True"
+LIVE_SCHEDULE_INTERVAL_SECONDS = int(os.getenv("LIVE_SCHEDULE_INTERVAL_SECONDS", "15"))
+EXPIRE_ATTEMPTS_INTERVAL_SECONDS = int(os.getenv("EXPIRE_ATTEMPTS_INTERVAL_SECONDS", "60"))
+# 0 where a `run_jobs` worker service drains the job queue instead
+JOB_DRAIN_INTERVAL_SECONDS = int(os.getenv("JOB_DRAIN_INTERVAL_SECONDS", "5"))
+
+# --------------------------------------------------
+# 📡 LIVE EVENTS / SSE (moodle/live_events.py)
+# --------------------------------------------------
+# One broadcaster per process checks for changes every SSE_POLL_SECONDS.
+# Idle connections get a comment line every SSE_HEARTBEAT_SECONDS so
+# proxies keep them open.
+SSE_POLL_SECONDS = float(os.getenv("SSE_POLL_SECONDS", "2"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "20"))
+SSE_RETRY_MS = int(os.getenv("SSE_RETRY_MS", "5000"))
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "32"))
+SSE_MAX_CONNECTIONS = int(os.getenv("SSE_MAX_CONNECTIONS", "10000"))
+
+# --------------------------------------------------
+# ⏱️ REQUEST TIMING (moodle/request_timing.py)
+# --------------------------------------------------
+# Responses to superusers carry Server-Timing (total, db, tpl, cache). It
+# exposes query counts and timings, so only SERVER_TIMING_HEADER=True (load
+# tests, simulate_exam) sends it to everyone; not keyed on DEBUG, which is
+# hardcoded above. Per-route histograms are merged into the "metrics"
+# cache every REQUEST_TIMING_FLUSH_SECONDS per worker.
+SERVER_TIMING_HEADER = os.getenv("SERVER_TIMING_HEADER", "False") == "True"
+REQUEST_TIMING_FLUSH_SECONDS = float(os.getenv("REQUEST_TIMING_FLUSH_SECONDS", "60"))
+REQUEST_TIMING_CACHE = "metrics"
+
+# --------------------------------------------------
+# 🐢 SLOW-QUERY LOG (moodle/slow_queries.py)
+# --------------------------------------------------
+# Queries slower than SLOW_QUERY_MS (requests, jobs and commands) are kept
+# in a ring of the newest SLOW_QUERY_BUFFER in the "metrics" cache, with one
+# EXPLAIN plan per statement shape if SLOW_QUERY_EXPLAIN (run by whichever
+# worker serves the admin Performance tab, or by run_jobs; never in a
+# student's request).
+# Shown on the admin Performance tab.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "True") == "True"
+SLOW_QUERY_BUFFER = int(os.getenv("SLOW_QUERY_BUFFER", "500"))
+
+# --------------------------------------------------
+# 📈 METRICS (/metrics, moodle/metrics.py)
+# --------------------------------------------------
+# Each worker writes its counters to METRICS_DIR/<pid>.json every
+# METRICS_WRITE_SECONDS; /metrics adds them up. gunicorn.conf.py empties
+# the directory when the server starts, as with prometheus_client's
+# multiprocess mode.
+# /metrics answers superusers, METRICS_ALLOWED_IPS, or
+# "Authorization: Bearer <METRICS_TOKEN>" (for scrapers behind a proxy).
+METRICS_DIR = os.getenv(
+    "METRICS_DIR",
+    os.path.join(tempfile.gettempdir(), f"iitpcep-metrics-test-{os.getpid()}") if TESTING
+    else os.path.join(BASE_DIR, ".metrics"),
+)
+METRICS_WRITE_SECONDS = float(os.getenv("METRICS_WRITE_SECONDS", "5"))
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",") if ip.strip()]
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# --------------------------------------------------
+# 🚀 STARTUP (moodle/startup.py, gunicorn.conf.py)
+# --------------------------------------------------
+# wsgi.py / asgi.py compile the templates and import every view at boot
+# instead of on the first request. gunicorn preloads the app in the master
+# (GUNICORN_PRELOAD) so that work is done once, not once per worker.
+WARM_UP_ON_BOOT = os.getenv("WARM_UP_ON_BOOT", "True") == "True"
+
+# --------------------------------------------------
+# 🔬 REQUEST PROFILER (moodle/profiling.py)
+# --------------------------------------------------
+# Superusers add ?_profile=1 to a URL to save a cProfile dump plus its SQL
+# log here; the newest PROFILE_KEEP are listed on the Performance tab.
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR",
+    os.path.join(tempfile.gettempdir(), f"iitpcep-profiles-test-{os.getpid()}") if TESTING
+    else os.path.join(BASE_DIR, ".profiles"),
+)
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+
+# --------------------------------------------------
+# 🪵 LOGGING
+# --------------------------------------------------
+# App loggers ("moodle.*") print INFO and up to the console (gunicorn/Render logs).
+# WARNING during the test run, which would otherwise fill with flush lines.
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "moodle": {"handlers": ["console"],
+                   "level": os.getenv("MOODLE_LOG_LEVEL", "WARNING" if TESTING else "INFO")},
+    },
+}
+
 # --------------------------------------------------
 # 🧾 DEFAULT PRIMARY KEY FIELD
 # --------------------------------------------------
@@ -0,0 +1,8 @@
+# Settings for the test run: manage.py picks this module for "test".
+# DJANGO_TESTING switches settings.py to the test values (LocMem caches,
+# temporary test database, metrics and profile directories).
+import os
+
+os.environ["DJANGO_TESTING"] = "True"
+
+from .settings import *  # noqa: E402,F401,F403
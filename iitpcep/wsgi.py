@@ -9,3 +9,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'iitpcep.settings')
 
 application = get_wsgi_application()
+
+# The first request's one-off work, done now (see moodle/startup.py)
+from moodle.startup import warm_up  # noqa: E402
+warm_up()
@@ -3,7 +3,9 @@ import os
 import sys
 
 def main():
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'iitpcep.settings')
+    # --settings or DJANGO_SETTINGS_MODULE still win
+    default_settings = 'iitpcep.settings_test' if sys.argv[1:2] == ['test'] else 'iitpcep.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', default_settings)
     from django.core.management import execute_from_command_line
     execute_from_command_line(sys.argv)
 
@@ -10,20 +10,28 @@ from django.db import transaction
 from .models import (
     SystemConfig, UserTable,
     Course, Assignment, Quiz, Exam,
-    Question, Option, CalendarEvent
+    Question, Option, CalendarEvent, Job, LiveTransition, Attempt
 )
+from .availability import invalidate_live_set
+from .assessment_index import set_live
+from .system_config import invalidate_system_config
+from .question_import import parse_bulk_payload
+from .jobs import enqueue
 
 # ==================================================
 # 🖊️ WIDGETS: CKEditor if available, else fallback
 # ==================================================
-try:
-    # pip install django-ckeditor
-    from ckeditor.widgets import CKEditorWidget  # type: ignore
-    RichTextWidget = CKEditorWidget
-except Exception:
-    from django.forms.widgets import Textarea
-    class RichTextWidget(Textarea):
-        pass
+def rich_text_widget():
+    """
+    CKEditor if installed, else a plain textarea. Imported on first use:
+    admin.py loads at every boot, the editor is only needed in /admin.
+    """
+    try:
+        # pip install django-ckeditor
+        from ckeditor.widgets import CKEditorWidget  # type: ignore
+    except Exception:
+        return forms.Textarea()
+    return CKEditorWidget()
 
 
 # ==================================================
@@ -51,14 +59,17 @@ class SystemConfigAdmin(admin.ModelAdmin):
 
     def activate_system(self, request, queryset):
         queryset.update(system_status="ONLINE", last_updated=timezone.now())
+        invalidate_system_config()
         self.message_user(request, "✅ System is now ONLINE", messages.SUCCESS)
 
     def shutdown_system(self, request, queryset):
         queryset.update(system_status="OFFLINE", last_updated=timezone.now())
+        invalidate_system_config()
         self.message_user(request, "⚠️ System has been SHUT DOWN", messages.WARNING)
 
     def reset_pin(self, request, queryset):
         queryset.update(system_pin="4321", last_updated=timezone.now())
+        invalidate_system_config()
         self.message_user(request, "🔑 System PIN reset to 4321", messages.INFO)
 
 
@@ -134,10 +145,14 @@ class CourseAdmin(admin.ModelAdmin):
 # 🧩 RICH DESCRIPTION FOR ASSESSMENTS
 # ==================================================
 class AssessmentForm(forms.ModelForm):
-    description = forms.CharField(required=False, widget=RichTextWidget())
+    description = forms.CharField(required=False, widget=forms.Textarea)
     class Meta:
         fields = "__all__"
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["description"].widget = rich_text_widget()
+
 
 # ==================================================
 # 🧠 BULK QUESTIONS: Helper forms
@@ -178,78 +193,6 @@ def _get_test_queryset(test_type, course):
     return Exam.objects.filter(course=course)
 
 
-def _create_question_with_options(parent_type, parent_id, qtext, options, correct_label=None, allow_custom=False):
-    q = Question.objects.create(
-        parent_type=parent_type,
-        parent_id=parent_id,
-        question_type="MCQ" if options else "TEXT",
-        marks=1,
-        allow_custom_answer=allow_custom,
-        text=qtext.strip(),
-    )
-    if options:
-        for label, text in options:
-            opt = Option.objects.create(
-                question=q,
-                option_label=label,
-                text=text.strip(),
-            )
-            if correct_label and label == correct_label:
-                q.correct_option = opt
-                q.save(update_fields=["correct_option"])
-    else:
-        q.correct_answer_text = ""  # optional
-        q.save()
-    return q
-
-
-def _parse_bulk_payload(payload):
-    """
-    Parse the textarea content into list of entries:
-    Each entry becomes: { 'qtext': str, 'options': [(label, text),...], 'correct': 'B' or None, 'allow_custom': bool }
-    """
-    entries = []
-    block = []
-    lines = [ln.rstrip() for ln in payload.splitlines()]
-    lines.append("")  # sentinel to flush
-
-    def flush(block_lines):
-        if not block_lines:
-            return
-        qtext = ""
-        options = []
-        correct = None
-        allow_custom = False
-        # build
-        for ln in block_lines:
-            if ln.startswith("Q:"):
-                qtext = ln[2:].strip(": ").strip()
-            elif ln.upper().startswith("TEXT:"):
-                qtext = qtext or "(Short answer)"
-                allow_custom = True
-            elif len(ln) >= 3 and ln[1] == ")":  # like "A) something"
-                label = ln[0].upper()
-                text = ln[2:].strip()
-                if text.endswith("*"):
-                    text = text[:-1].rstrip()
-                    correct = label
-                options.append((label, text))
-        entries.append({
-            "qtext": qtext,
-            "options": options,
-            "correct": correct,
-            "allow_custom": allow_custom and not options,
-        })
-
-    for ln in lines:
-        if ln.strip() == "":
-            flush(block)
-            block = []
-        else:
-            block.append(ln)
-    return entries
-
-
 # ==================================================
 # 📚 BASE ASSESSMENT ADMIN (Editable + Add Questions)
 # ==================================================
@@ -264,6 +207,7 @@ class BaseAssessmentAdmin(admin.ModelAdmin):
         "max_attempts",
         "duration_minutes",
         "is_live",
+        "auto_live",
         "status_label",
     )
     list_editable = (
@@ -272,8 +216,9 @@ class BaseAssessmentAdmin(admin.ModelAdmin):
         "max_attempts",
         "duration_minutes",
         "is_live",
+        "auto_live",
     )
-    list_filter = ("course", "is_live")
+    list_filter = ("course", "is_live", "auto_live")
     search_fields = ("title", "description")
     ordering = ("-open_date",)
     actions = ["make_live", "stop_live"]
@@ -286,11 +231,18 @@ class BaseAssessmentAdmin(admin.ModelAdmin):
     status_label.short_description = "Status"
 
     def make_live(self, request, queryset):
+        ids = list(queryset.values_list("pk", flat=True))
         count = queryset.update(is_live=True, updated_at=timezone.now())
+        # .update() skips post_save, so sync the index and live set by hand
+        set_live(queryset.model, ids, True)
+        invalidate_live_set()
         self.message_user(request, f"✅ {count} assessment(s) are now LIVE!", messages.SUCCESS)
 
     def stop_live(self, request, queryset):
+        ids = list(queryset.values_list("pk", flat=True))
         count = queryset.update(is_live=False, updated_at=timezone.now())
+        set_live(queryset.model, ids, False)
+        invalidate_live_set()
         self.message_user(request, f"🔒 {count} assessment(s) stopped.", messages.WARNING)
 
     # ----- object-tools: "Add questions"
@@ -329,19 +281,20 @@ class BaseAssessmentAdmin(admin.ModelAdmin):
         if request.method == "POST":
             form = QuestionBulkPasteForm(request.POST)
             if form.is_valid():
-                entries = _parse_bulk_payload(form.cleaned_data["payload"])
-                created = 0
-                for e in entries:
-                    _create_question_with_options(
-                        parent_type=parent_type,
-                        parent_id=parent_id,
-                        qtext=e["qtext"],
-                        options=e["options"],
-                        correct_label=e["correct"],
-                        allow_custom=e["allow_custom"],
-                    )
-                    created += 1
-                self.message_user(request, f"✅ {created} question(s) added.", messages.SUCCESS)
+                entries = parse_bulk_payload(form.cleaned_data["payload"])
+                # Runs in the background worker (see jobs.py); this request returns at once
+                queued = enqueue(
+                    "import_questions",
+                    created_by=request.user.get_username(),
+                    parent_type=parent_type,
+                    parent_id=parent_id,
+                    entries=entries,
+                )
+                self.message_user(
+                    request,
+                    f"⏳ Importing {len(entries)} question(s) as job #{queued.pk}; progress is on the admin dashboard Jobs tab.",
+                    messages.SUCCESS,
+                )
                 return redirect(reverse(f"admin:{self.model._meta.app_label}_{self.model._meta.model_name}_change", args=[object_id]))
         else:
             form = QuestionBulkPasteForm()
@@ -422,6 +375,47 @@ class CalendarEventAdmin(admin.ModelAdmin):
     ordering = ("-date",)
 
 
+# ==================================================
+# ⏳ BACKGROUND JOB ADMIN (Read-only)
+# ==================================================
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "progress", "attempts", "created_by", "created_at", "finished_at")
+    list_filter = ("status", "name")
+    readonly_fields = [f.name for f in Job._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+# ==================================================
+# 📝 ATTEMPTS (max_attempts + deadlines)
+# ==================================================
+@admin.register(Attempt)
+class AttemptAdmin(admin.ModelAdmin):
+    list_display = ("user", "kind", "object_id", "number", "status", "started_at", "deadline", "submitted_at")
+    list_filter = ("kind", "status")
+    search_fields = ("user__username",)
+    readonly_fields = ("user", "kind", "object_id", "number", "started_at", "deadline", "session_key", "answers")
+
+
+# ==================================================
+# ⏱️ LIVE SCHEDULE LOG (Read-only)
+# ==================================================
+@admin.register(LiveTransition)
+class LiveTransitionAdmin(admin.ModelAdmin):
+    list_display = ("kind", "object_id", "is_live", "scheduled_at", "applied_at", "lag")
+    list_filter = ("kind", "is_live")
+    readonly_fields = [f.name for f in LiveTransition._meta.fields]
+
+    def lag(self, obj):
+        return f"{obj.lag_seconds:.1f}s"
+    lag.short_description = "Lag"
+
+    def has_add_permission(self, request):
+        return False
+
+
 # ==================================================
 # 🧠 ADMIN DASHBOARD HEADER + SUMMARY
 # ==================================================
@@ -0,0 +1,163 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import AdmissionCounter
+
+
+# --------------------------------------------------
+# 🚦 ADMISSION CONTROL (attempt waiting room)
+# --------------------------------------------------
+# Every student starting an attempt takes a ticket from a per-assessment
+# counter. Each ADMISSION_WINDOW_SECONDS window hands
+# out at most `cap` admissions, and an admission always advances the
+# "admitted up to" counter by one. So tickets are let in strictly in FIFO
+# order, and a student who closed the tab never blocks the queue. Waiting
+# students poll admission_status_view.
+# Counters must be incremented atomically or two workers hand out the same
+# ticket. ADMISSION_COUNTERS picks where they live:
+#   "cache" — redis / memcached (atomic incr); polls touch no DB
+#   "db"    — AdmissionCounter rows with F() updates, for the file cache,
+#             whose incr is a get followed by a set
+
+ADMISSION_KEY_TIMEOUT = 60 * 60 * 24
+
+
+def _cache():
+    return caches[settings.ADMISSION_CACHE]
+
+
+def _key(kind, test_id, name):
+    return f"admission:{kind.upper()}:{test_id}:{name}"
+
+
+def _session_key(kind, test_id):
+    return f"admission:{kind.upper()}:{test_id}"
+
+
+def _cache_incr(key, timeout):
+    cache = _cache()
+    cache.add(key, 0, timeout)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Expired between add() and incr()
+        cache.set(key, 1, timeout)
+        return 1
+
+
+def _db_incr(key, timeout):
+    now = timezone.now()
+    live = AdmissionCounter.objects.filter(key=key, expires_at__gte=now)
+    for attempt in range(3):
+        try:
+            with transaction.atomic():
+                # The UPDATE locks the row until commit, so the value read back is ours
+                if live.update(value=F("value") + 1):
+                    return AdmissionCounter.objects.values_list("value", flat=True).get(key=key)
+                # New key, or an expired one: start again at 1
+                AdmissionCounter.objects.filter(expires_at__lt=now).delete()
+                AdmissionCounter.objects.create(key=key, value=1, expires_at=now + timedelta(seconds=timeout))
+                return 1
+        except IntegrityError:
+            # Another worker created it first: increment theirs
+            if attempt == 2:
+                raise
+
+
+def _incr(key, timeout=ADMISSION_KEY_TIMEOUT):
+    if settings.ADMISSION_COUNTERS == "db":
+        return _db_incr(key, timeout)
+    return _cache_incr(key, timeout)
+
+
+def _get_many(keys):
+    if settings.ADMISSION_COUNTERS == "db":
+        return dict(AdmissionCounter.objects.filter(key__in=keys, expires_at__gte=timezone.now())
+                    .values_list("key", "value"))
+    return _cache().get_many(keys)
+
+
+def admission_cap(test_obj):
+    return test_obj.admission_cap or settings.ADMISSION_DEFAULT_CAP
+
+
+def _try_admit(request, kind, test_id, state):
+    upto_key = _key(kind, test_id, "upto")
+    upto = _get_many([upto_key]).get(upto_key, 0)
+
+    if state["ticket"] > upto:
+        window = int(time.time() // settings.ADMISSION_WINDOW_SECONDS)
+        window_key = _key(kind, test_id, f"window:{window}")
+        if _incr(window_key, settings.ADMISSION_WINDOW_SECONDS * 2) <= state["cap"]:
+            upto = _incr(upto_key)
+
+    if state["ticket"] <= upto:
+        request.session[_session_key(kind, test_id)] = {"admitted": True}
+        _incr(_key(kind, test_id, f"rate:{int(time.time() // 60)}"), 180)
+        return True, 0
+    return False, state["ticket"] - upto
+
+
+def check_admission(request, kind, test_obj):
+    """
+    Gate for starting an attempt. Returns (admitted, position) where
+    position is the number of tickets still ahead of this student.
+    """
+    cap = admission_cap(test_obj)
+    if not cap:
+        return True, 0
+
+    session_key = _session_key(kind, test_obj.pk)
+    state = request.session.get(session_key)
+    if state and state.get("admitted"):
+        return True, 0
+
+    if not state:
+        ticket = _incr(_key(kind, test_obj.pk, "next"))
+        state = {"ticket": ticket, "cap": cap}
+        request.session[session_key] = state
+
+    return _try_admit(request, kind, test_obj.pk, state)
+
+
+def admission_status(request, kind, test_id):
+    """Polling variant of check_admission: never issues a ticket."""
+    state = request.session.get(_session_key(kind, test_id))
+    if not state:
+        return False, None
+    if state.get("admitted"):
+        return True, 0
+    return _try_admit(request, kind, test_id, state)
+
+
+def admission_metrics(tests):
+    """Queue depth and admission rate for the admin dashboard: {(kind, test_id): {...}}, one lookup."""
+    minute = int(time.time() // 60)
+    keys = {
+        (kind, test_id): {
+            "next": _key(kind, test_id, "next"),
+            "upto": _key(kind, test_id, "upto"),
+            "last_minute": _key(kind, test_id, f"rate:{minute - 1}"),
+            "this_minute": _key(kind, test_id, f"rate:{minute}"),
+        }
+        for kind, test_id in tests
+    }
+    values = _get_many([key for test_keys in keys.values() for key in test_keys.values()])
+    result = {}
+    for test, test_keys in keys.items():
+        issued = values.get(test_keys["next"], 0)
+        admitted = min(values.get(test_keys["upto"], 0), issued)
+        result[test] = {
+            "issued": issued,
+            "admitted": admitted,
+            "waiting": issued - admitted,
+            "last_minute": values.get(test_keys["last_minute"], 0),
+            "this_minute": values.get(test_keys["this_minute"], 0),
+        }
+    return result
@@ -0,0 +1,137 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from .question_nav import get_question_nav
+
+
+# --------------------------------------------------
+# 📝 PER-TEST ANSWER STORE
+# --------------------------------------------------
+# Answers used to live in one growing session["user_answers"] dict, so every
+# autosave rewrote the whole django_session row. Now each test gets its own
+# namespace with size limits, and the backend is configurable:
+#   "session" — namespaced key inside the session (row stays small)
+#   "cache"   — shared cache keyed by session key (no session write at all)
+# finish() clears the working answers and keeps one submitted copy for review.
+# Sessions still holding the old dict have this test's entries moved into
+# "working" on their first load().
+
+LEGACY_SESSION_KEY = "user_answers"
+
+
+class AnswerStore:
+    def __init__(self, request, test_type, test_id):
+        self.request = request
+        self.test_type, self.test_id = test_type, test_id
+        self.namespace = f"answers:{test_type.upper()}:{test_id}"
+        self.backend = getattr(settings, "ANSWER_STORE_BACKEND", "session")
+        self.max_answers = getattr(settings, "ANSWER_STORE_MAX_ANSWERS", 1000)
+        self.max_chars = getattr(settings, "ANSWER_STORE_MAX_CHARS", 20000)
+
+    # ----- backend plumbing
+    def _cache_key(self, slot):
+        session = self.request.session
+        if not session.session_key:
+            session.create()
+        return f"{self.namespace}:{slot}:{session.session_key}"
+
+    def _get(self, slot):
+        if self.backend == "cache":
+            return caches[settings.ANSWER_STORE_CACHE].get(self._cache_key(slot)) or {}
+        return self.request.session.get(f"{self.namespace}:{slot}", {})
+
+    def _set(self, slot, answers):
+        if self.backend == "cache":
+            caches[settings.ANSWER_STORE_CACHE].set(self._cache_key(slot), answers, settings.SESSION_COOKIE_AGE)
+            return
+        self.request.session[f"{self.namespace}:{slot}"] = answers
+
+    def _delete(self, slot):
+        if self.backend == "cache":
+            caches[settings.ANSWER_STORE_CACHE].delete(self._cache_key(slot))
+            return
+        self.request.session.pop(f"{self.namespace}:{slot}", None)
+
+    def _migrate_legacy(self, answers):
+        """Move this test's entries out of the old session["user_answers"] into "working"."""
+        session = self.request.session
+        legacy = session.get(LEGACY_SESSION_KEY)
+        if not legacy:
+            return answers
+        question_ids = {str(q["id"]) for q in get_question_nav(self.test_type, self.test_id)}
+        mine = {key: value for key, value in legacy.items() if key in question_ids}
+        if mine:
+            answers = {**mine, **answers}
+            self._set("working", answers)
+        rest = {key: value for key, value in legacy.items() if key not in question_ids}
+        if rest:
+            # Other tests' answers wait for their own store
+            if mine:
+                session[LEGACY_SESSION_KEY] = rest
+        else:
+            session.pop(LEGACY_SESSION_KEY)
+        return answers
+
+    # ----- public API
+    def load(self):
+        """{question_id (str): {"answer": ..., "flagged": bool}} for the running attempt."""
+        return self._migrate_legacy(self._get("working"))
+
+    def _merge(self, answers, question_id, answer, flagged):
+        """Apply one answer to `answers` in place; True if it changed anything."""
+        key = str(question_id)
+        if key not in answers and len(answers) >= self.max_answers:
+            return False
+
+        if isinstance(answer, str) and len(answer) > self.max_chars:
+            answer = answer[:self.max_chars]
+
+        new_value = {"answer": answer, "flagged": flagged}
+        if answers.get(key) == new_value:
+            return False
+        answers[key] = new_value
+        return True
+
+    def save_answer(self, question_id, answer, flagged):
+        answers = self.load()
+        if self._merge(answers, question_id, answer, flagged):
+            self._set("working", answers)
+        return answers
+
+    def finish(self):
+        """Ends the attempt: keeps a submitted copy and clears working answers."""
+        answers = self.load()
+        if not answers:
+            # Second submit (refresh, double click): keep what was submitted
+            submitted = self.submitted()
+            if submitted:
+                return submitted
+        self._set("submitted", answers)
+        self._delete("working")
+        return answers
+
+    def submitted(self):
+        return self._get("submitted")
+
+    # ----- async API (async views under ASGI)
+    # The "cache" backend awaits the cache directly. The "session" backend is
+    # a dict in an already-loaded session (see views.aload_session), so no I/O.
+    async def aload(self):
+        if LEGACY_SESSION_KEY in self.request.session:
+            # One-off, may query the question nav
+            return await sync_to_async(self.load)()
+        if self.backend == "cache":
+            return await caches[settings.ANSWER_STORE_CACHE].aget(self._cache_key("working")) or {}
+        return self.load()
+
+    async def asave_answer(self, question_id, answer, flagged):
+        answers = await self.aload()
+        if self._merge(answers, question_id, answer, flagged):
+            if self.backend == "cache":
+                await caches[settings.ANSWER_STORE_CACHE].aset(
+                    self._cache_key("working"), answers, settings.SESSION_COOKIE_AGE
+                )
+            else:
+                self._set("working", answers)
+        return answers
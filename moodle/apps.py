@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class MoodleConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'moodle'
+
+    def ready(self):
+        # Register cache-invalidation signal handlers
+        from . import signals  # noqa: F401
+
+        # Count and time queries on every DB connection (request_timing.py)
+        from django.db.backends.signals import connection_created
+        from .request_timing import install_query_timer
+        connection_created.connect(install_query_timer, dispatch_uid="moodle_query_timer")
@@ -0,0 +1,50 @@
+from .models import AssessmentIndex, Question
+
+
+# --------------------------------------------------
+# 🗂️ ASSESSMENT INDEX SYNC
+# --------------------------------------------------
+# Called from signals.py on save/delete, and by the admin actions that
+# use queryset.update() (which never sends post_save).
+
+def kind_of(model_or_obj):
+    """Assignment -> 'ASSIGNMENT' (matches Question.parent_type)."""
+    model = model_or_obj if isinstance(model_or_obj, type) else type(model_or_obj)
+    return model.__name__.upper()
+
+
+def sync_assessment(obj):
+    AssessmentIndex.objects.update_or_create(
+        kind=kind_of(obj),
+        object_id=obj.pk,
+        defaults={
+            "course_id": obj.course_id,
+            "title": obj.title,
+            "description": obj.description,
+            "open_date": obj.open_date,
+            "close_date": obj.close_date,
+            "is_live": obj.is_live,
+            "auto_live": obj.auto_live,
+            "question_count": Question.objects.filter(parent_type=kind_of(obj), parent_id=obj.pk).count(),
+        },
+    )
+
+
+def remove_assessment(obj):
+    AssessmentIndex.objects.filter(kind=kind_of(obj), object_id=obj.pk).delete()
+
+
+def refresh_question_count(parent_type, parent_id):
+    parent_type = (parent_type or "").upper()
+    AssessmentIndex.objects.filter(kind=parent_type, object_id=parent_id).update(
+        question_count=Question.objects.filter(parent_type=parent_type, parent_id=parent_id).count()
+    )
+
+
+def set_live(model, ids, is_live):
+    """
+    Mirror an .update(is_live=...) on Assignment/Quiz/Exam rows. Takes the
+    ids read before the update: a queryset filtered on is_live would match
+    nothing once it has run.
+    """
+    AssessmentIndex.objects.filter(kind=kind_of(model), object_id__in=ids).update(is_live=is_live)
@@ -0,0 +1,141 @@
+import time
+from datetime import timedelta
+from importlib import import_module
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import write_queue
+from .answer_store import AnswerStore
+from .models import Attempt, UserTable
+
+
+# --------------------------------------------------
+# 📝 SERVER-SIDE ATTEMPTS
+# --------------------------------------------------
+# Starting an attempt is one transaction. It locks the student's row,
+# counts the attempts already used against max_attempts and inserts
+# attempt #n+1; the (user, test, number) unique constraint backs it up.
+# Each attempt gets a deadline (duration, capped at close_date; a duration
+# of 0 means "until close_date").
+# A copy of {id, deadline} lives in the session, so autosave and finish
+# can check it with no query. expire_attempts() auto-submits attempts
+# whose student never pressed "finish".
+# Starting and finishing go through the writer thread (write_queue.py).
+
+
+class AttemptLimitReached(Exception):
+    pass
+
+
+def _session_key(kind, test_id):
+    return f"attempt:{kind.upper()}:{test_id}"
+
+
+# Untimed and no close_date: the auto-submit job still needs a deadline
+UNTIMED_ATTEMPT = timedelta(hours=24)
+
+
+def compute_deadline(test_obj, now):
+    if not test_obj.duration_minutes:
+        return test_obj.close_date or now + UNTIMED_ATTEMPT
+    deadline = now + timedelta(minutes=test_obj.duration_minutes)
+    if test_obj.close_date and test_obj.close_date < deadline:
+        deadline = test_obj.close_date
+    return deadline
+
+
+def current_attempt(request, kind, test_id):
+    """{"id", "number", "deadline" (epoch seconds)} of the running attempt, or None. No DB access."""
+    return request.session.get(_session_key(kind, test_id))
+
+
+def seconds_left(state):
+    return max(0, int(state["deadline"] - time.time()))
+
+
+def is_expired(state):
+    return time.time() > state["deadline"] + settings.ATTEMPT_GRACE_SECONDS
+
+
+def _open_attempt(user, kind, test_obj, session_key):
+    attempts = Attempt.objects.filter(user=user, kind=kind, object_id=test_obj.pk)
+    try:
+        with transaction.atomic():
+            # Serialises concurrent starts by the same student
+            UserTable.objects.select_for_update().filter(pk=user.pk).first()
+            attempt = attempts.filter(status="IN_PROGRESS").first()
+            if attempt is None:
+                used = attempts.count()
+                if used >= test_obj.max_attempts:
+                    raise AttemptLimitReached(used)
+                now = timezone.now()
+                attempt = Attempt.objects.create(
+                    user=user,
+                    kind=kind,
+                    object_id=test_obj.pk,
+                    number=used + 1,
+                    started_at=now,
+                    deadline=compute_deadline(test_obj, now),
+                    session_key=session_key,
+                )
+    except IntegrityError:
+        # Lost the race for this attempt number: use the winner's attempt
+        attempt = attempts.get(status="IN_PROGRESS")
+    return attempt
+
+
+def begin_attempt(request, user, kind, test_obj):
+    """Resume the student's open attempt or start the next one; raises AttemptLimitReached."""
+    kind = kind.upper()
+    session = request.session
+    if not session.session_key:
+        session.save()
+
+    attempt = write_queue.run(_open_attempt, user, kind, test_obj, session.session_key)
+    state = {
+        "id": attempt.pk,
+        "number": attempt.number,
+        "deadline": attempt.deadline.timestamp(),
+    }
+    session[_session_key(kind, test_obj.pk)] = state
+    return state
+
+
+def finish_attempt(request, kind, test_id, answers):
+    """Close the session's running attempt (one UPDATE); no-op if there is none."""
+    state = request.session.pop(_session_key(kind, test_id), None)
+    if not state:
+        return None
+    status = "EXPIRED" if is_expired(state) else "SUBMITTED"
+    write_queue.run(
+        Attempt.objects.filter(pk=state["id"], status="IN_PROGRESS").update,
+        status=status, submitted_at=timezone.now(), answers=answers,
+    )
+    return status
+
+
+def expire_attempts(now=None):
+    """Auto-submit every attempt past its deadline; returns how many were closed."""
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=settings.ATTEMPT_GRACE_SECONDS)
+    SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+
+    closed = 0
+    overdue = Attempt.objects.filter(status="IN_PROGRESS", deadline__lt=cutoff)
+    for attempt in overdue.iterator():
+        answers = {}
+        session = SessionStore(session_key=attempt.session_key or None)
+        if attempt.session_key and session.exists(attempt.session_key):
+            # Same finish() the student would have triggered, so review still works
+            answers = AnswerStore(SimpleNamespace(session=session), attempt.kind, attempt.object_id).finish()
+            session.pop(_session_key(attempt.kind, attempt.object_id), None)
+            session.save()
+
+        # Conditional, so an attempt the student finished meanwhile is left alone
+        closed += Attempt.objects.filter(pk=attempt.pk, status="IN_PROGRESS").update(
+            status="EXPIRED", submitted_at=now, answers=answers
+        )
+    return closed
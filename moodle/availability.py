@@ -0,0 +1,86 @@
+import math
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+
+# --------------------------------------------------
+# 🟢 AVAILABILITY INDEX ("live now" set)
+# --------------------------------------------------
+# The set of live assessments only changes at an open/close boundary or
+# when is_live flips. We compute it once and cache it until the next
+# upcoming boundary; saves/deletes (signals.py) and the admin
+# make_live/stop_live actions drop it early.
+
+LIVE_SET_KEY = "availability:live_set"
+LIVE_SET_MAX_TIMEOUT = 60 * 60 * 24
+
+
+def _assessment_models():
+    from .models import Assignment, Quiz, Exam
+    return (Assignment, Quiz, Exam)
+
+
+def live_now_filter(now):
+    """Same compound filter the dashboard used to build inline."""
+    return Q(is_live=True, open_date__lte=now) & (Q(close_date__gte=now) | Q(close_date__isnull=True))
+
+
+def _compute_live_set(now):
+    live_ids = {}
+    next_boundary = None
+
+    for model in _assessment_models():
+        live_ids[model.__name__] = set(
+            model.objects.filter(live_now_filter(now)).values_list("id", flat=True)
+        )
+
+        # Next moment something opens (open_date > now) or closes (close_date >= now).
+        # Two ordered lookups so each is a single seek on the (is_live, date) indexes.
+        live = model.objects.filter(is_live=True)
+        next_open = live.filter(open_date__gt=now).order_by("open_date").values_list("open_date", flat=True).first()
+        next_close = live.filter(close_date__gte=now).order_by("close_date").values_list("close_date", flat=True).first()
+        for boundary in (next_open, next_close):
+            if boundary and (next_boundary is None or boundary < next_boundary):
+                next_boundary = boundary
+
+    return live_ids, next_boundary
+
+
+def get_live_ids():
+    """
+    Returns {"Assignment": {ids}, "Quiz": {ids}, "Exam": {ids}} of
+    assessments that are live right now.
+    """
+    live_ids = cache.get(LIVE_SET_KEY)
+    if live_ids is not None:
+        return live_ids
+
+    now = timezone.now()
+    live_ids, next_boundary = _compute_live_set(now)
+
+    timeout = LIVE_SET_MAX_TIMEOUT
+    if next_boundary:
+        # close_date is inclusive, so expire just after the boundary passes
+        seconds = (next_boundary - now).total_seconds()
+        timeout = max(1, min(LIVE_SET_MAX_TIMEOUT, math.floor(seconds) + 1))
+
+    cache.set(LIVE_SET_KEY, live_ids, timeout)
+    return live_ids
+
+
+def invalidate_live_set():
+    cache.delete(LIVE_SET_KEY)
+
+
+def live_queryset(model):
+    """Queryset of the currently live rows of an Assignment/Quiz/Exam model."""
+    ids = get_live_ids().get(model.__name__)
+    if not ids:
+        return model.objects.none()
+    return model.objects.filter(id__in=ids)
+
+
+def is_live_now(obj):
+    return obj.pk in get_live_ids().get(type(obj).__name__, ())
@@ -0,0 +1,3 @@
+# Variants of Django's backends, used as ENGINE "moodle.db_backends.<name>":
+#   sqlite3_tuned          — pragmas + BEGIN IMMEDIATE (the local default)
+#   postgresql, sqlite3    — pooled (see moodle/db_pool.py); sqlite3 is also tuned
@@ -0,0 +1,7 @@
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresDatabaseWrapper
+
+from moodle.db_pool import PooledConnectionMixin
+
+
+class DatabaseWrapper(PooledConnectionMixin, PostgresDatabaseWrapper):
+    pass
@@ -0,0 +1,6 @@
+from moodle.db_backends.sqlite3_tuned.base import DatabaseWrapper as TunedSQLiteDatabaseWrapper
+from moodle.db_pool import PooledConnectionMixin
+
+
+class DatabaseWrapper(PooledConnectionMixin, TunedSQLiteDatabaseWrapper):
+    """Local stand-in for the pooled Postgres backend; needs a file database, not :memory:."""
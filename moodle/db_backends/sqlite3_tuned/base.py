@@ -0,0 +1,25 @@
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+
+
+# --------------------------------------------------
+# 🪶 SQLITE TUNING (local / small deployments)
+# --------------------------------------------------
+# Stock SQLite backend plus:
+#   - settings_dict["PRAGMAS"], run on every new connection (WAL journal,
+#     busy_timeout, synchronous, mmap, cache and temp store; see settings.py)
+#   - atomic() opens with BEGIN IMMEDIATE. A plain BEGIN reads first and
+#     only asks for the write lock at its first write; if another
+#     connection wrote meanwhile SQLite gives up at once with "database is
+#     locked" instead of waiting busy_timeout (begin_attempt under a surge).
+
+
+class DatabaseWrapper(SQLiteDatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict.get("PRAGMAS", {}).items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE")
@@ -0,0 +1,196 @@
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+
+from . import metrics
+
+
+# --------------------------------------------------
+# 🔌 DB CONNECTION POOL (per worker process)
+# --------------------------------------------------
+# Django 4.2 has no pool: every thread keeps its own connection for
+# CONN_MAX_AGE. The ENGINEs in moodle/db_backends/ (postgresql, and sqlite3
+# as a local stand-in) are the stock backends with PooledConnectionMixin:
+# a thread checks a raw connection out of its process's pool on its first
+# query and hands it back when Django closes it (end of request, with
+# CONN_MAX_AGE = 0). At most POOL["SIZE"] connections are open per process.
+# A thread that finds them all busy waits up to POOL["TIMEOUT"] seconds.
+# Idle connections are pinged before reuse when CONN_HEALTH_CHECKS is on
+# and recycled after POOL["MAX_LIFETIME"] seconds.
+# Wait times and checkouts go to /metrics (metrics.py).
+
+DEFAULT_POOL = {"SIZE": 5, "TIMEOUT": 10.0, "MAX_LIFETIME": 600.0}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class _Entry:
+    __slots__ = ("raw", "created")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created = time.monotonic()
+
+
+def _ping(raw):
+    cursor = raw.cursor()
+    try:
+        cursor.execute("SELECT 1")
+    finally:
+        cursor.close()
+
+
+def _close_quietly(raw):
+    try:
+        raw.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+
+    def __init__(self, alias, size, timeout, max_lifetime, health_checks):
+        self.alias = alias
+        self.size, self.timeout, self.max_lifetime = size, timeout, max_lifetime
+        self.health_checks = health_checks
+        self._idle = deque()
+        self._open = 0
+        self._checked_out = {}  # id(raw) -> _Entry
+        self._cond = threading.Condition()
+        self._labels = (("alias", alias),)
+
+    def _count(self, event):
+        metrics.inc("iitpcep_db_pool_checkouts_total", self._labels + (("result", event),))
+
+    def get(self, connect):
+        """A raw DB-API connection: an idle one, or connect() while under SIZE; waits otherwise."""
+        started = time.perf_counter()
+        deadline = started + self.timeout
+        with self._cond:
+            while True:
+                entry = self._idle.pop() if self._idle else None  # newest first: warm, recently pinged
+                if entry is not None or self._open < self.size:
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._count("timeout")
+                    raise PoolTimeout(
+                        f"No free connection in the {self.alias!r} pool ({self.size}) after {self.timeout}s."
+                    )
+                self._cond.wait(remaining)
+            if entry is None:
+                self._open += 1
+        metrics.observe("iitpcep_db_pool_wait_seconds", self._labels, time.perf_counter() - started)
+
+        if entry is not None and not self._reusable(entry):
+            _close_quietly(entry.raw)
+            self._count("recycled")
+            entry = None
+        if entry is None:
+            try:
+                entry = _Entry(connect())
+            except Exception:
+                self._release_slot()
+                raise
+            self._count("new")
+        else:
+            self._count("reused")
+
+        with self._cond:
+            self._checked_out[id(entry.raw)] = entry
+        metrics.inc("iitpcep_db_pool_in_use", self._labels)
+        return entry.raw
+
+    def _reusable(self, entry):
+        if time.monotonic() - entry.created > self.max_lifetime:
+            return False
+        if self.health_checks:
+            try:
+                _ping(entry.raw)
+            except Exception:
+                return False
+        return True
+
+    def put(self, raw, discard=False):
+        """Back to the pool; discard=True closes it (broken, or left mid-transaction)."""
+        with self._cond:
+            entry = self._checked_out.pop(id(raw), None)
+        if entry is None:
+            # Opened before the pool existed (or already returned): just close it
+            _close_quietly(raw)
+            return
+        metrics.inc("iitpcep_db_pool_in_use", self._labels, -1)
+        if not discard:
+            try:
+                # Never hand a transaction over to the next thread
+                raw.rollback()
+            except Exception:
+                discard = True
+        if discard:
+            _close_quietly(raw)
+            self._count("discarded")
+            self._release_slot()
+            return
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def _release_slot(self):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {"size": self.size, "open": self._open, "idle": len(self._idle), "in_use": len(self._checked_out)}
+
+    def close_idle(self):
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            _close_quietly(entry.raw)
+
+
+def pool_for(wrapper):
+    """The process-wide pool for a DatabaseWrapper's alias (one per alias and database)."""
+    key = (wrapper.alias, str(wrapper.settings_dict["NAME"]), wrapper.settings_dict.get("HOST", ""))
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                options = {**DEFAULT_POOL, **wrapper.settings_dict.get("POOL", {})}
+                pool = _pools[key] = ConnectionPool(
+                    wrapper.alias, int(options["SIZE"]), float(options["TIMEOUT"]),
+                    float(options["MAX_LIFETIME"]), wrapper.settings_dict.get("CONN_HEALTH_CHECKS", False),
+                )
+    return pool
+
+
+def forget_pools():
+    """After fork (gunicorn.conf.py): the parent's connections belong to the parent."""
+    with _pools_lock:
+        _pools.clear()
+
+
+class PooledConnectionMixin:
+    """Put before a backend's DatabaseWrapper: connect/close go through the pool."""
+
+    def get_new_connection(self, conn_params):
+        return pool_for(self).get(lambda: super(PooledConnectionMixin, self).get_new_connection(conn_params))
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # Closed inside atomic(), or broken by an error: don't hand it on
+        discard = self.in_atomic_block or (self.errors_occurred and not self.is_usable())
+        pool_for(self).put(self.connection, discard=discard)
@@ -0,0 +1,82 @@
+import io
+import os
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+
+from .models import Question, Option
+
+
+# --------------------------------------------------
+# 🖼️ IMAGE DERIVATIVES (question / option images)
+# --------------------------------------------------
+# Uploaded question images are often full-size phone photos or scans.
+# warm_assessments builds one web-sized WebP copy per image and records
+# its URL in the cache; templates render it through the |display_url
+# filter and fall back to the original until a derivative exists.
+# Keyed by the stored file name, which changes on every re-upload.
+
+DERIVATIVE_DIR = "derivatives"
+DERIVATIVE_MAX_WIDTH = 1200
+DERIVATIVE_QUALITY = 80
+
+
+def _url_key(name):
+    return f"image_derivative:{name}"
+
+
+def derivative_name(name):
+    base, _ = os.path.splitext(name)
+    return f"{DERIVATIVE_DIR}/{base}.webp"
+
+
+def build_derivative(field_file):
+    """Create (if missing) the derivative of an image field; returns its URL or None."""
+    from PIL import Image
+
+    if not field_file:
+        return None
+
+    storage = field_file.storage
+    name = derivative_name(field_file.name)
+    if not storage.exists(name):
+        try:
+            with storage.open(field_file.name, "rb") as fh:
+                image = Image.open(fh)
+                image.load()
+        except (OSError, ValueError):
+            return None
+
+        if image.width > DERIVATIVE_MAX_WIDTH:
+            height = round(image.height * DERIVATIVE_MAX_WIDTH / image.width)
+            image = image.resize((DERIVATIVE_MAX_WIDTH, height))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        buffer = io.BytesIO()
+        image.save(buffer, "WEBP", quality=DERIVATIVE_QUALITY)
+        name = storage.save(name, ContentFile(buffer.getvalue()))
+
+    url = storage.url(name)
+    cache.set(_url_key(field_file.name), url, None)
+    return url
+
+
+def display_url(field_file):
+    """URL to put in <img src>: the derivative when one was built, else the original."""
+    if not field_file:
+        return ""
+    return cache.get(_url_key(field_file.name)) or field_file.url
+
+
+def build_assessment_derivatives(parent_type, parent_id):
+    """Derivatives for every question/option image of one assessment; returns how many exist."""
+    questions = Question.objects.filter(parent_type=parent_type, parent_id=parent_id)
+    options = Option.objects.filter(question__parent_type=parent_type, question__parent_id=parent_id)
+
+    built = 0
+    for question in questions.exclude(image="").exclude(image__isnull=True):
+        built += build_derivative(question.image) is not None
+    for option in options.exclude(image="").exclude(image__isnull=True):
+        built += build_derivative(option.image) is not None
+    return built
@@ -0,0 +1,166 @@
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job, Course, Assignment, Quiz, Exam
+from .image_derivatives import build_assessment_derivatives
+from .question_import import create_question_with_options
+from .attempts import expire_attempts as _expire_attempts
+
+
+# --------------------------------------------------
+# ⏳ DB-BACKED JOB QUEUE
+# --------------------------------------------------
+# Long admin operations are stored as Job rows and run outside the request
+# (and gunicorn's worker timeout) by drain(): from the in-process scheduler
+# (scheduler.py) or a `python manage.py run_jobs` worker.
+# Workers claim a row with a conditional UPDATE (status QUEUED -> RUNNING),
+# so several workers never run the same job without needing row locks.
+# Failed jobs are retried with exponential backoff up to max_attempts.
+# RUNNING rows whose worker died are re-queued after JOB_STALE_SECONDS.
+
+JOB_HANDLERS = {}
+
+
+def job_handler(name):
+    """Register a handler: fn(job, **payload) -> JSON-serialisable result."""
+    def register(fn):
+        JOB_HANDLERS[name] = fn
+        return fn
+    return register
+
+
+def enqueue(name, created_by="", max_attempts=3, **payload):
+    if name not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job: {name}")
+    queued = Job.objects.create(name=name, payload=payload, created_by=created_by, max_attempts=max_attempts)
+    if settings.JOB_QUEUE_EAGER:
+        # Run in this request, right after its transaction commits
+        transaction.on_commit(lambda: _claim(queued.pk, "eager") and run_job(Job.objects.get(pk=queued.pk)))
+    return queued
+
+
+def _claim(job_id, worker_id):
+    return Job.objects.filter(pk=job_id, status="QUEUED").update(
+        status="RUNNING",
+        locked_by=worker_id,
+        started_at=timezone.now(),
+        attempts=F("attempts") + 1,
+    )
+
+
+def requeue_stale(now=None):
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    return Job.objects.filter(status="RUNNING", started_at__lt=cutoff).update(
+        status="QUEUED", locked_by="", run_after=now
+    )
+
+
+def claim_next(worker_id):
+    """Atomically take the oldest due job, or None."""
+    now = timezone.now()
+    due = (
+        Job.objects.filter(status="QUEUED", run_after__lte=now)
+        .order_by("run_after", "id")
+        .values_list("id", flat=True)[:10]
+    )
+    for job_id in due:
+        if _claim(job_id, worker_id):
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def drain(worker_id):
+    """Re-queue stale jobs, then run due jobs until none is left; returns how many ran."""
+    requeue_stale()
+    ran = 0
+    while True:
+        job = claim_next(worker_id)
+        if job is None:
+            return ran
+        run_job(job)
+        ran += 1
+
+
+def run_job(claimed):
+    handler = JOB_HANDLERS.get(claimed.name)
+    try:
+        if handler is None:
+            raise ValueError(f"Unknown job: {claimed.name}")
+        result = handler(claimed, **claimed.payload)
+    except Exception:
+        now = timezone.now()
+        error = traceback.format_exc()
+        if claimed.attempts < claimed.max_attempts:
+            backoff = settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** (claimed.attempts - 1)
+            Job.objects.filter(pk=claimed.pk).update(
+                status="QUEUED", locked_by="", error=error, run_after=now + timedelta(seconds=backoff)
+            )
+        else:
+            Job.objects.filter(pk=claimed.pk).update(status="FAILED", error=error, finished_at=now)
+        return False
+
+    Job.objects.filter(pk=claimed.pk).update(
+        status="DONE", progress=100, result=result, error="", finished_at=timezone.now()
+    )
+    return True
+
+
+# ----- handlers
+
+MODEL_MAP = {"ASSIGNMENT": Assignment, "QUIZ": Quiz, "EXAM": Exam}
+IMPORT_BATCH_SIZE = 20
+
+
+@job_handler("import_questions")
+def import_questions(job, parent_type, parent_id, entries):
+    """
+    entries: output of question_import.parse_bulk_payload.
+    Commits in batches together with the row count, so a retry resumes
+    after the last committed batch instead of duplicating questions.
+    """
+    total = len(entries)
+    done = (job.result or {}).get("created", 0)
+    while done < total:
+        batch = entries[done:done + IMPORT_BATCH_SIZE]
+        with transaction.atomic():
+            for e in batch:
+                create_question_with_options(
+                    parent_type=parent_type,
+                    parent_id=parent_id,
+                    qtext=e["qtext"],
+                    options=[tuple(opt) for opt in e["options"]],
+                    correct_label=e["correct"],
+                    allow_custom=e["allow_custom"],
+                )
+            done += len(batch)
+            Job.objects.filter(pk=job.pk).update(result={"created": done})
+            job.set_progress(done * 100 / total, f"{done}/{total} questions")
+    return {"created": done}
+
+
+@job_handler("build_image_derivatives")
+def build_image_derivatives(job, parent_type, parent_id):
+    return {"images": build_assessment_derivatives(parent_type, parent_id)}
+
+
+@job_handler("delete_course")
+def delete_course(job, course_id):
+    deleted, _ = Course.objects.filter(pk=course_id).delete()
+    return {"deleted": deleted}
+
+
+@job_handler("delete_assessment")
+def delete_assessment(job, kind, object_id):
+    deleted, _ = MODEL_MAP[kind].objects.filter(pk=object_id).delete()
+    return {"deleted": deleted}
+
+
+@job_handler("expire_attempts")
+def expire_attempts(job):
+    return {"closed": _expire_attempts()}
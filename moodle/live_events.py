@@ -0,0 +1,219 @@
+import asyncio
+import json
+import time
+from importlib import import_module
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import parse_cookie
+
+from .attempts import current_attempt
+from .availability import get_live_ids
+from .system_config import get_system_config
+
+
+# --------------------------------------------------
+# 📡 LIVE EVENTS (Server-Sent Events over ASGI)
+# --------------------------------------------------
+# Pages used to find out that an exam went live or closed, or that the
+# site went OFFLINE, only by reloading. Now they open one EventSource.
+# One Broadcaster per process polls the cached system config and live set
+# every SSE_POLL_SECONDS. It encodes each change once and pushes the same
+# bytes to every subscriber's queue. A connection is a coroutine waiting
+# on its queue: no thread and no DB access after the handshake.
+# iitpcep/asgi.py routes LIVE_EVENTS_PATH here, in front of Django's
+# handler and middleware. Under WSGI the Django view answers 204, which
+# tells EventSource not to reconnect.
+
+LIVE_EVENTS_PATH = "/moodle/events/"
+KINDS = ("ASSIGNMENT", "QUIZ", "EXAM")
+
+
+def encode_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+def _snapshot():
+    """(system_status, {"QUIZ": {ids}, ...}) from the shared caches."""
+    try:
+        config = get_system_config()
+        live = get_live_ids()
+    finally:
+        close_old_connections()
+    status = config.system_status if config else "ONLINE"
+    return status, {name.upper(): set(ids) for name, ids in live.items()}
+
+
+class Broadcaster:
+    """Per-process fan-out. Started by the first subscriber, stops with the last one."""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.status = None
+        self.live = {}
+        self._task = None
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=settings.SSE_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    def publish(self, payload):
+        for queue in tuple(self.subscribers):
+            if queue.full():
+                # Slow client: drop its oldest event rather than buffer without limit
+                queue.get_nowait()
+            queue.put_nowait(payload)
+
+    def diff(self, status, live):
+        """Events for the change from the last snapshot to this one."""
+        events = []
+        if self.status is not None and status != self.status:
+            events.append(encode_event("system", {"status": status}))
+        if self.status is not None:
+            for kind in KINDS:
+                before, after = self.live.get(kind, set()), live.get(kind, set())
+                for pk in sorted(after - before):
+                    events.append(encode_event("assessment", {"kind": kind, "id": pk, "live": True}))
+                for pk in sorted(before - after):
+                    events.append(encode_event("assessment", {"kind": kind, "id": pk, "live": False}))
+        self.status, self.live = status, live
+        return events
+
+    async def _run(self):
+        while self.subscribers:
+            try:
+                status, live = await sync_to_async(_snapshot)()
+            except Exception:
+                # DB/cache hiccup: keep the connections, try again next round
+                status, live = self.status, self.live
+            for payload in self.diff(status, live):
+                self.publish(payload)
+            await asyncio.sleep(settings.SSE_POLL_SECONDS)
+        self.status, self.live = None, {}
+
+
+broadcaster = Broadcaster()
+
+
+# ----- per-connection state (read once, at connect)
+
+def _connection_state(cookie_header, kind, test_id):
+    """Deadline (epoch seconds) of this student's running attempt, or None."""
+    from .models import Assignment, Quiz, Exam
+
+    model = {"ASSIGNMENT": Assignment, "QUIZ": Quiz, "EXAM": Exam}.get(kind)
+    if model is None or not test_id:
+        return None
+    try:
+        deadline = None
+        close_date = model.objects.filter(pk=test_id).values_list("close_date", flat=True).first()
+        if close_date:
+            deadline = close_date.timestamp()
+
+        session_key = parse_cookie(cookie_header).get(settings.SESSION_COOKIE_NAME)
+        if session_key:
+            session = import_module(settings.SESSION_ENGINE).SessionStore(session_key=session_key)
+            attempt = current_attempt(SimpleNamespace(session=session), kind, test_id)
+            if attempt:
+                deadline = min(deadline or attempt["deadline"], attempt["deadline"])
+        return deadline
+    finally:
+        close_old_connections()
+
+
+def _header(scope, name):
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return ""
+
+
+async def _wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def live_events_app(scope, receive, send):
+    """
+    GET LIVE_EVENTS_PATH?kind=QUIZ&id=3
+    Events: system {status}, assessment {kind, id, live}, time {left}.
+    kind/id are optional; with them the client also gets its time left.
+    """
+    if scope["method"] != "GET":
+        await send({"type": "http.response.start", "status": 405, "headers": [(b"allow", b"GET")]})
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    if len(broadcaster.subscribers) >= settings.SSE_MAX_CONNECTIONS:
+        await send({"type": "http.response.start", "status": 503, "headers": [(b"retry-after", b"30")]})
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    query = dict(
+        part.split("=", 1) for part in scope.get("query_string", b"").decode().split("&") if "=" in part
+    )
+    kind = query.get("kind", "").upper()
+    test_id = int(query["id"]) if query.get("id", "").isdigit() else None
+    deadline = await sync_to_async(_connection_state)(_header(scope, b"cookie"), kind, test_id)
+
+    queue = broadcaster.subscribe()
+    disconnect = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                # Stop nginx/Render proxies from buffering the stream
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+
+        # Current state first, so a (re)connecting page is never stale
+        status, live = broadcaster.status, broadcaster.live
+        if status is None:
+            status, live = await sync_to_async(_snapshot)()
+        hello = encode_event("system", {"status": status})
+        if kind in KINDS and test_id:
+            hello += encode_event("assessment", {"kind": kind, "id": test_id, "live": test_id in live.get(kind, ())})
+        hello += f"retry: {settings.SSE_RETRY_MS}\n\n".encode()
+        await send({"type": "http.response.body", "body": hello, "more_body": True})
+
+        while not disconnect.done():
+            if deadline:
+                payload = encode_event("time", {"left": max(0, int(deadline - time.time()))})
+                await send({"type": "http.response.body", "body": payload, "more_body": True})
+
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {getter, disconnect},
+                timeout=settings.SSE_HEARTBEAT_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if getter in done:
+                payload = getter.result()
+                # Drain whatever else is queued into the same write
+                while not queue.empty():
+                    payload += queue.get_nowait()
+            else:
+                getter.cancel()
+                # Comment line keeps proxies from timing the connection out
+                payload = b": ping\n\n"
+            if not disconnect.done():
+                await send({"type": "http.response.body", "body": payload, "more_body": True})
+    except OSError:
+        pass
+    finally:
+        broadcaster.unsubscribe(queue)
+        disconnect.cancel()
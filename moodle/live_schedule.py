@@ -0,0 +1,75 @@
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Assignment, Quiz, Exam, LiveTransition
+from .assessment_index import kind_of, set_live
+from .availability import invalidate_live_set
+
+
+# --------------------------------------------------
+# ⏱️ LIVE SCHEDULE (auto_live assessments)
+# --------------------------------------------------
+# For assessments with auto_live=True the scheduler owns is_live: it flips
+# it on once open_date has passed and off once close_date has passed.
+# Each run is one set-based UPDATE per model and direction. The live set
+# cache is dropped once per run that changed anything, and every flip is
+# logged as a LiveTransition (due time vs. actual time).
+
+ASSESSMENT_MODELS = (Assignment, Quiz, Exam)
+
+
+def _due(model, now):
+    auto = model.objects.filter(auto_live=True)
+    # close_date is inclusive (see availability.live_now_filter)
+    still_open = Q(close_date__isnull=True) | Q(close_date__gte=now)
+    opening = auto.filter(is_live=False, open_date__lte=now).filter(still_open)
+    closing = auto.filter(is_live=True, close_date__lt=now)
+    return ((opening, True, "open_date"), (closing, False, "close_date"))
+
+
+def apply_live_schedule(now=None):
+    """Apply every due transition; returns the LiveTransition rows written."""
+    now = now or timezone.now()
+    transitions = []
+
+    with transaction.atomic():
+        for model in ASSESSMENT_MODELS:
+            for queryset, is_live, date_field in _due(model, now):
+                due = list(queryset.values_list("id", date_field))
+                if not due:
+                    continue
+                ids = [pk for pk, _ in due]
+                changed = model.objects.filter(pk__in=ids, is_live=not is_live)
+                changed.update(is_live=is_live, updated_at=now)
+                # .update() skips post_save, so keep the index in step by hand
+                set_live(model, ids, is_live)
+                transitions += [
+                    LiveTransition(kind=kind_of(model), object_id=pk, is_live=is_live,
+                                   scheduled_at=when, applied_at=now)
+                    for pk, when in due
+                ]
+
+        if transitions:
+            LiveTransition.objects.bulk_create(transitions)
+            transaction.on_commit(invalidate_live_set)
+
+    return transitions
+
+
+def next_transition_at(now=None):
+    """Earliest upcoming open/close among auto_live assessments (or None)."""
+    now = now or timezone.now()
+    upcoming = []
+    for model in ASSESSMENT_MODELS:
+        auto = model.objects.filter(auto_live=True)
+        upcoming.append(
+            auto.filter(is_live=False, open_date__gt=now)
+            .order_by("open_date").values_list("open_date", flat=True).first()
+        )
+        upcoming.append(
+            auto.filter(is_live=True, close_date__gte=now)
+            .order_by("close_date").values_list("close_date", flat=True).first()
+        )
+    upcoming = [when for when in upcoming if when]
+    return min(upcoming) if upcoming else None
@@ -0,0 +1,257 @@
+import asyncio
+import math
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+
+
+# --------------------------------------------------
+# 🏋️ LOAD GENERATOR (benchmark commands)
+# --------------------------------------------------
+# A small asyncio HTTP/1.1 client: N virtual clients, each on its own
+# keep-alive connection, loop requests for a fixed duration. Dependency-free
+# so the bench commands run anywhere manage.py does. Reconnects when the
+# server closes the connection (gunicorn sync workers do after every
+# response); failed connects and timeouts count as errors.
+
+SERVER_COMMANDS = {
+    # Sync workers: one request (or one slow client) per process at a time
+    "wsgi": ["iitpcep.wsgi:application"],
+    "asgi": ["iitpcep.asgi:application", "-k", "uvicorn.workers.UvicornWorker"],
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # Nearest-rank
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Connection:
+    """
+    One keep-alive connection. Keeps the cookies the server sets, like a
+    browser tab; the last response's headers are in .headers.
+    """
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+        self.cookies = {}
+        self.headers = {}
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers=None, body=b""):
+        """-> (status, body bytes). Reopens the connection as needed."""
+        if self.writer is None:
+            await self.open()
+
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Connection: keep-alive"]
+        headers = dict(headers or {})
+        if self.cookies and "Cookie" not in headers:
+            headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in self.cookies.items())
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        if body or method == "POST":
+            lines.append(f"Content-Length: {len(body)}")
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await self.writer.drain()
+
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        for line in header_lines:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                name, value = name.strip().lower(), value.strip()
+                if name == "set-cookie":
+                    self._set_cookie(value)
+                response_headers[name] = value
+        self.headers = response_headers
+
+        if "content-length" in response_headers:
+            payload = await self.reader.readexactly(int(response_headers["content-length"]))
+        elif response_headers.get("transfer-encoding", "").lower() == "chunked":
+            payload = b""
+            while True:
+                size = int((await self.reader.readline()).strip().split(b";")[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                payload += chunk[:-2]
+        elif status in (204, 304):
+            payload = b""
+        else:
+            payload = await self.reader.read()
+            response_headers["connection"] = "close"
+
+        if response_headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, payload
+
+    def _set_cookie(self, header):
+        pair, *attributes = header.split(";")
+        name, _, value = pair.strip().partition("=")
+        expired = any(a.strip().lower() in ("max-age=0", "max-age=-1") for a in attributes)
+        if expired or not value.strip('"'):
+            self.cookies.pop(name, None)
+        else:
+            self.cookies[name] = value
+
+
+async def _client(host, port, build_request, client_id, deadline, timeout, stats):
+    conn = Connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            method, path, headers, body = build_request(client_id)
+            started = time.perf_counter()
+            try:
+                status, _ = await asyncio.wait_for(conn.request(method, path, headers, body), timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+                conn.close()
+                stats["errors"] += 1
+                # Don't spin on a refused connection
+                await asyncio.sleep(0.05)
+                continue
+            elapsed = time.perf_counter() - started
+            if 200 <= status < 400:
+                stats["latencies"].append(elapsed)
+            else:
+                stats["errors"] += 1
+                stats["statuses"][status] = stats["statuses"].get(status, 0) + 1
+    finally:
+        conn.close()
+
+
+async def _run(host, port, build_request, concurrency, duration, timeout):
+    stats = {"latencies": [], "errors": 0, "statuses": {}}
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, build_request, i, deadline, timeout, stats) for i in range(concurrency)
+    ))
+    wall = time.perf_counter() - started
+    latencies = stats["latencies"]
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": stats["errors"],
+        "error_statuses": stats["statuses"],
+        "rps": len(latencies) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies, default=0) * 1000,
+    }
+
+
+def run_load(host, port, build_request, concurrency, duration, timeout=10.0):
+    """
+    build_request(client_id) -> (method, path, headers, body).
+    Returns throughput, latency percentiles and error counts.
+    """
+    return asyncio.run(_run(host, port, build_request, concurrency, duration, timeout))
+
+
+def wait_for_port(host, port, timeout=30.0):
+    """Block until something accepts connections on host:port (server start-up)."""
+    async def probe():
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            try:
+                _, writer = await asyncio.open_connection(host, port)
+                writer.close()
+                return True
+            except OSError:
+                await asyncio.sleep(0.2)
+        return False
+    return asyncio.run(probe())
+
+
+def spawn_gunicorn(mode, workers, port, env=None):
+    """
+    Start gunicorn (SERVER_COMMANDS[mode]) on 127.0.0.1:port without
+    waiting for it; -> (process, log file, command line). Pair with stop_server().
+    """
+    if shutil.which("gunicorn") is None:
+        raise RuntimeError("gunicorn is not installed (pip install -r requirements.txt).")
+    from django.conf import settings
+
+    args = ["gunicorn", *SERVER_COMMANDS[mode], "-w", str(workers), "-b", f"127.0.0.1:{port}",
+            "--timeout", "60", "--log-level", "warning"]
+    # A file, not a pipe: a full pipe would block the server mid-benchmark
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        args, cwd=settings.BASE_DIR,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": "iitpcep.settings", **(env or {})},
+        stdout=subprocess.DEVNULL, stderr=log,
+    )
+    return process, log, args
+
+
+def server_log(log):
+    log.seek(0)
+    return log.read().decode(errors="replace")[-2000:]
+
+
+def stop_server(process, log):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    log.close()
+    # Let the port free up before the next server binds it
+    time.sleep(1)
+
+
+@contextmanager
+def gunicorn_server(mode, workers, port, env=None, timeout=30.0):
+    """
+    Run gunicorn (SERVER_COMMANDS[mode]) on 127.0.0.1:port for the duration
+    of the block; yields the command line. Raises RuntimeError with the
+    server's stderr if it does not come up.
+    """
+    process, log, args = spawn_gunicorn(mode, workers, port, env)
+    try:
+        if not wait_for_port("127.0.0.1", port, timeout):
+            raise RuntimeError(f"{mode} server did not start: {server_log(log)}")
+        yield args
+    finally:
+        stop_server(process, log)
+
+
+def wait_for_response(host, port, path, timeout=60.0, interval=0.01):
+    """
+    Poll GET path until it answers 2xx/3xx; -> seconds waited, or None on
+    timeout. Connection refusals and 5xx while the server boots are retried.
+    """
+    async def probe():
+        started = time.perf_counter()
+        deadline = started + timeout
+        while time.perf_counter() < deadline:
+            conn = Connection(host, port)
+            try:
+                status, _ = await asyncio.wait_for(conn.request("GET", path), max(0.1, deadline - time.perf_counter()))
+                if status < 400:
+                    return time.perf_counter() - started
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                pass
+            finally:
+                conn.close()
+            await asyncio.sleep(interval)
+        return None
+    return asyncio.run(probe())
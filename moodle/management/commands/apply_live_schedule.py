@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from moodle.live_schedule import apply_live_schedule, next_transition_at
+
+
+class Command(BaseCommand):
+    help = (
+        "Flips is_live for auto_live assessments at their open/close dates. "
+        "Run once from cron, or with --loop to sleep until the next due transition."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true")
+        parser.add_argument("--max-sleep", type=float, default=30.0,
+                            help="Upper bound on one sleep, so newly scheduled assessments are noticed.")
+
+    def handle(self, *args, **opts):
+        while True:
+            close_old_connections()
+            for t in apply_live_schedule():
+                action = "LIVE" if t.is_live else "OFFLINE"
+                self.stdout.write(
+                    f"{t.kind} #{t.object_id} -> {action} (due {t.scheduled_at:%H:%M:%S}, lag {t.lag_seconds:.1f}s)"
+                )
+
+            if not opts["loop"]:
+                break
+
+            # close_date is inclusive: wake just after the boundary passes
+            sleep_for = opts["max_sleep"]
+            upcoming = next_transition_at()
+            if upcoming:
+                until = (upcoming - timezone.now()).total_seconds() + 1
+                sleep_for = max(0.5, min(sleep_for, until))
+            time.sleep(sleep_for)
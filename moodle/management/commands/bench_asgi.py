@@ -0,0 +1,207 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from moodle.admission import check_admission
+from moodle.attempts import begin_attempt
+from moodle.loadgen import SERVER_COMMANDS, gunicorn_server, run_load
+from moodle.models import AdmissionCounter, SystemConfig, Course, Quiz, Question, UserTable
+
+BENCH_COURSE_CODE = "999997"
+
+
+class Command(BaseCommand):
+    help = (
+        "Starts gunicorn in WSGI and in ASGI (uvicorn worker) mode with the same worker count, "
+        "drives the async endpoints (autosave, presence, admission poll) at each concurrency "
+        "level, and reports throughput, latency and errors per mode. "
+        "--slow-clients adds connections that trickle their request in slowly, like students on "
+        "poor mobile links; this is where sync workers run out of capacity."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modes", default="wsgi,asgi")
+        parser.add_argument("--endpoints", default="autosave,presence,admission")
+        parser.add_argument("--concurrency", default="20,100,300",
+                            help="Comma-separated numbers of virtual clients.")
+        parser.add_argument("--slow-clients", type=int, default=0)
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds per measurement.")
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--port", type=int, default=8765)
+
+    def handle(self, *args, **opts):
+        modes = [m for m in opts["modes"].split(",") if m]
+        unknown = set(modes) - set(SERVER_COMMANDS)
+        if unknown:
+            raise CommandError(f"Unknown mode(s): {', '.join(sorted(unknown))}")
+        levels = [int(c) for c in opts["concurrency"].split(",") if c]
+        endpoints = [e for e in opts["endpoints"].split(",") if e]
+
+        quiz, clients = self._seed(max(levels))
+        try:
+            requests = self._request_builders(quiz, clients)
+            results = []
+            for mode in modes:
+                with self._server(mode, opts["workers"], opts["port"]):
+                    for endpoint in endpoints:
+                        for level in levels:
+                            result = self._measure(requests[endpoint], level, opts)
+                            result.update(mode=mode, endpoint=endpoint)
+                            results.append(result)
+                            self._print(result)
+            self._summary(results)
+        finally:
+            self._cleanup(quiz, clients)
+
+    # ----- fixture
+
+    def _seed(self, count):
+        SystemConfig.objects.get_or_create(id=1)
+        course = Course.objects.create(title="ASGI benchmark", code=BENCH_COURSE_CODE)
+        # admission_cap=1: the first student is admitted, the rest wait with a
+        # ticket, so the admission poll measures the counter path
+        quiz = Quiz.objects.create(
+            course=course, title="ASGI benchmark", is_live=True, duration_minutes=600, max_attempts=1,
+            admission_cap=1,
+        )
+        questions = [Question.objects.create(parent_type="QUIZ", parent_id=quiz.id, text=f"Q{i + 1}") for i in range(10)]
+
+        SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+        clients = []
+        for i in range(count):
+            user = UserTable.objects.create(username=f"bench-asgi-{quiz.id}-{i}")
+            session = SessionStore()
+            session["username"] = user.username
+            session.save()
+            request = SimpleNamespace(session=session)
+            check_admission(request, "Quiz", quiz)
+            begin_attempt(request, user, "Quiz", quiz)
+            session.save()
+
+            csrf = get_random_string(32)
+            clients.append({
+                "session_key": session.session_key,
+                "csrf": csrf,
+                "cookie": f"{settings.SESSION_COOKIE_NAME}={session.session_key}; {settings.CSRF_COOKIE_NAME}={csrf}",
+                "question_ids": [q.id for q in questions],
+                "n": 0,
+            })
+        self.stdout.write(f"Seeded quiz #{quiz.id} with {count} students in an attempt (all but one waiting for admission)")
+        return quiz, clients
+
+    def _cleanup(self, quiz, clients):
+        SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+        for client in clients:
+            SessionStore(session_key=client["session_key"]).delete()
+        UserTable.objects.filter(username__startswith=f"bench-asgi-{quiz.id}-").delete()
+        Question.objects.filter(parent_type="QUIZ", parent_id=quiz.id).delete()
+        AdmissionCounter.objects.filter(key__startswith=f"admission:QUIZ:{quiz.id}:").delete()
+        Course.objects.filter(code=BENCH_COURSE_CODE).delete()
+
+    def _request_builders(self, quiz, clients):
+        autosave_path = reverse("autosave", args=["quiz", quiz.id])
+        admission_path = reverse("admission_status", args=["quiz", quiz.id])
+        presence_path = reverse("presence")
+
+        def autosave(i):
+            client = clients[i]
+            client["n"] += 1
+            qid = client["question_ids"][client["n"] % len(client["question_ids"])]
+            body = urlencode({"question_id": qid, str(qid): f"answer {client['n']}"}).encode()
+            return "POST", autosave_path, {
+                "Cookie": client["cookie"],
+                "X-CSRFToken": client["csrf"],
+                "Content-Type": "application/x-www-form-urlencoded",
+            }, body
+
+        def presence(i):
+            return "GET", presence_path, {"Cookie": clients[i]["cookie"]}, b""
+
+        def admission(i):
+            return "GET", admission_path, {"Cookie": clients[i]["cookie"]}, b""
+
+        return {"autosave": autosave, "presence": presence, "admission": admission}
+
+    # ----- servers and measurement
+
+    @contextmanager
+    def _server(self, mode, workers, port):
+        try:
+            with gunicorn_server(mode, workers, port) as args:
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\n{mode.upper()}: {' '.join(args)}"))
+                yield
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+    def _measure(self, build_request, concurrency, opts):
+        stop = threading.Event()
+        slow = threading.Thread(
+            target=_hold_slow_clients, args=(opts["port"], opts["slow_clients"], stop), daemon=True
+        )
+        slow.start()
+        try:
+            # Give the slow clients time to occupy their connections first
+            if opts["slow_clients"]:
+                time.sleep(1)
+            return run_load("127.0.0.1", opts["port"], build_request, concurrency, opts["duration"])
+        finally:
+            stop.set()
+            slow.join(timeout=5)
+
+    def _print(self, r):
+        statuses = ", ".join(f"{code}x{n}" for code, n in sorted(r["error_statuses"].items()))
+        self.stdout.write(
+            f"  {r['endpoint']:<10} c={r['concurrency']:<5} {r['rps']:8.1f} req/s  "
+            f"p50 {r['p50_ms']:7.1f} ms  p95 {r['p95_ms']:7.1f} ms  p99 {r['p99_ms']:7.1f} ms  "
+            f"errors {r['errors']}{f' ({statuses})' if statuses else ''}"
+        )
+
+    def _summary(self, results):
+        by_key = {(r["endpoint"], r["concurrency"], r["mode"]): r for r in results}
+        pairs = [(e, c) for (e, c, m) in by_key if m == "wsgi" and (e, c, "asgi") in by_key]
+        if not pairs:
+            return
+        self.stdout.write(self.style.MIGRATE_HEADING("\nASGI vs WSGI"))
+        for endpoint, level in pairs:
+            w, a = by_key[(endpoint, level, "wsgi")], by_key[(endpoint, level, "asgi")]
+            ratio = f"x{a['rps'] / w['rps']:.2f}" if w["rps"] else "WSGI served nothing"
+            self.stdout.write(
+                f"  {endpoint:<10} c={level:<5} throughput {ratio}  "
+                f"p95 {w['p95_ms']:.1f} -> {a['p95_ms']:.1f} ms  errors {w['errors']} -> {a['errors']}"
+            )
+
+
+def _hold_slow_clients(port, count, stop):
+    """Connections that send their request headers a few bytes at a time until told to stop."""
+    if not count:
+        return
+
+    async def trickle():
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            return
+        try:
+            writer.write(b"GET / HTTP/1.1\r\nHost: 127.0.0.1\r\n")
+            while not stop.is_set():
+                await asyncio.sleep(1)
+                writer.write(b"X-Slow: 1\r\n")
+                await writer.drain()
+        except OSError:
+            pass
+        finally:
+            writer.close()
+
+    async def main():
+        await asyncio.gather(*(trickle() for _ in range(count)))
+
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from moodle.models import Course, Quiz, Question, Option
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the two option layouts (Option table + prefetch vs "
+        "Question.options_json) on a seeded assessment. Runs inside a "
+        "transaction that is rolled back, so the database is left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--questions", type=int, default=10000)
+        parser.add_argument("--singles", type=int, default=200,
+                            help="Random single-question fetches (attempt page pattern).")
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **opts):
+        with transaction.atomic():
+            quiz = self._seed(opts["questions"])
+            ids = list(Question.objects.filter(parent_type="QUIZ", parent_id=quiz.id).values_list("id", flat=True))
+            sample = random.sample(ids, min(opts["singles"], len(ids)))
+
+            self.stdout.write(f"Seeded {len(ids)} questions ({len(ids) * 4} options)\n")
+            for inline in (False, True):
+                layout = "options_json" if inline else "Option table"
+                with override_settings(QUESTION_INLINE_OPTIONS=inline):
+                    full = self._time(opts["repeat"], lambda: self._read_all(quiz.id, inline))
+                    single = self._time(opts["repeat"], lambda: self._read_singles(sample, inline))
+                self.stdout.write(
+                    f"{layout:<14} full read: {full[0] * 1000:8.1f} ms / {full[1]} queries | "
+                    f"{len(sample)} single reads: {single[0] * 1000:8.1f} ms / {single[1]} queries"
+                )
+
+            transaction.set_rollback(True)
+
+    def _seed(self, count):
+        course = Course.objects.create(title="Benchmark", code="999999")
+        quiz = Quiz.objects.create(course=course, title="Options layout benchmark")
+
+        questions = Question.objects.bulk_create([
+            Question(parent_type="QUIZ", parent_id=quiz.id, position=i + 1,
+                     text=f"Question {i + 1}", correct_option="A")
+            for i in range(count)
+        ], batch_size=500)
+        options = Option.objects.bulk_create([
+            Option(question=q, option_label=label, text=f"Option {label} for {q.text}")
+            for q in questions for label in "ABCD"
+        ], batch_size=500)
+
+        # bulk_create skips signals, so mirror options_json here
+        inline = {}
+        for opt in options:
+            inline.setdefault(opt.question_id, []).append(opt.to_inline())
+        for q in questions:
+            q.options_json = inline[q.id]
+        Question.objects.bulk_update(questions, ["options_json"], batch_size=500)
+        return quiz
+
+    def _read_all(self, quiz_id, inline):
+        questions = Question.objects.filter(parent_type="QUIZ", parent_id=quiz_id).order_by("position")
+        if not inline:
+            questions = questions.prefetch_related("options")
+        return sum(len(q.get_options()) for q in questions)
+
+    def _read_singles(self, ids, inline):
+        total = 0
+        for qid in ids:
+            questions = Question.objects.all() if inline else Question.objects.prefetch_related("options")
+            total += len(questions.get(id=qid).get_options())
+        return total
+
+    def _time(self, repeat, fn):
+        best = None
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                fn()
+                elapsed = time.perf_counter() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        return best, len(ctx.captured_queries)
@@ -0,0 +1,84 @@
+import random
+import string
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from moodle.models import SystemConfig, Course, Quiz, Question, Option
+
+
+class Command(BaseCommand):
+    help = (
+        "Walks one attempt (answer every question, revisit, finish) and reports "
+        "django_session write bytes per request for each answer-store backend. "
+        "Runs inside a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--questions", type=int, default=50)
+        parser.add_argument("--answer-size", type=int, default=200,
+                            help="Characters per typed answer.")
+
+    def handle(self, *args, **opts):
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=["*"]):
+            quiz = self._seed(opts["questions"])
+            for backend in ("session", "cache"):
+                with override_settings(ANSWER_STORE_BACKEND=backend):
+                    writes, total_bytes, requests = self._walk(quiz, opts["answer_size"])
+                self.stdout.write(
+                    f"{backend:<8} {requests} requests | {writes} session writes | "
+                    f"{total_bytes} bytes total | {total_bytes // requests} bytes/request"
+                )
+            transaction.set_rollback(True)
+
+    def _seed(self, count):
+        SystemConfig.objects.get_or_create(id=1)
+        course = Course.objects.create(title="Benchmark", code="999998")
+        quiz = Quiz.objects.create(course=course, title="Session write benchmark")
+        for i in range(count):
+            q = Question.objects.create(parent_type="QUIZ", parent_id=quiz.id, text=f"Question {i + 1}")
+            for label in "ABCD":
+                Option.objects.create(question=q, option_label=label, text=label)
+        return quiz
+
+    def _walk(self, quiz, answer_size):
+        client = Client()
+        session = client.session
+        session["username"] = "bench-student"
+        session.save()
+        client.cookies["sessionid"] = session.session_key
+
+        url = reverse("test_attempt", args=["quiz", quiz.id])
+        question_ids = list(
+            Question.objects.filter(parent_type="QUIZ", parent_id=quiz.id)
+            .order_by("position").values_list("id", flat=True)
+        )
+
+        # Random text so zlib in the session serializer can't hide the growth
+        answers = {qid: "".join(random.choices(string.ascii_letters + " ", k=answer_size)) for qid in question_ids}
+
+        writes = total_bytes = requests = 0
+        # Two passes: the second re-submits the same answers (pure navigation)
+        for _ in range(2):
+            for index, qid in enumerate(question_ids, start=1):
+                with CaptureQueriesContext(connection) as ctx:
+                    client.post(f"{url}?q={index}", {str(qid): answers[qid], "next": "1"})
+                requests += 1
+                for query in ctx.captured_queries:
+                    sql = query["sql"]
+                    if "django_session" in sql and sql.lstrip().upper().startswith(("UPDATE", "INSERT")):
+                        writes += 1
+                        total_bytes += len(sql)
+
+        with CaptureQueriesContext(connection) as ctx:
+            client.post(reverse("test_review", args=["quiz", quiz.id]))
+        requests += 1
+        for query in ctx.captured_queries:
+            sql = query["sql"]
+            if "django_session" in sql and sql.lstrip().upper().startswith(("UPDATE", "INSERT")):
+                writes += 1
+                total_bytes += len(sql)
+        return writes, total_bytes, requests
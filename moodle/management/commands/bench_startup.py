@@ -0,0 +1,174 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from moodle.loadgen import SERVER_COMMANDS, server_log, spawn_gunicorn, stop_server, wait_for_response
+
+# Run in a fresh interpreter: imports settings, runs setup, imports the
+# WSGI/ASGI module (with its warm-up), then serves two requests in-process.
+# Prints one JSON line of phase timings (ms) last.
+BOOT_SCRIPT = """
+import json, os, sys, time
+started = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "iitpcep.settings")
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+phases = {"settings": time.perf_counter()}
+django.setup()
+phases["setup"] = time.perf_counter()
+__import__(sys.argv[1])
+phases["application"] = time.perf_counter()
+from django.test import Client
+client = Client(HTTP_HOST="127.0.0.1")
+status = client.get(sys.argv[2]).status_code
+phases["first_request"] = time.perf_counter()
+client.get(sys.argv[2])
+phases["second_request"] = time.perf_counter()
+previous, timings = started, {}
+for name, at in phases.items():
+    timings[name] = (at - previous) * 1000
+    previous = at
+print(json.dumps({"phases": timings, "status": status}))
+"""
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+# (label, environment) for the server runs
+CONFIGURATIONS = (
+    ("no warm-up, no preload", {"WARM_UP_ON_BOOT": "False", "GUNICORN_PRELOAD": "False"}),
+    ("warm-up", {"WARM_UP_ON_BOOT": "True", "GUNICORN_PRELOAD": "False"}),
+    ("warm-up + preload", {"WARM_UP_ON_BOOT": "True", "GUNICORN_PRELOAD": "True"}),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Cold-start report. 1) Boot phases of a fresh interpreter (settings, setup, application "
+        "import with warm-up, first and second request). 2) python -X importtime summarized by "
+        "package and by module. 3) Time from starting gunicorn to its first successful response, "
+        "with and without the boot warm-up (moodle/startup.py) and preload_app (gunicorn.conf.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mode", choices=sorted(SERVER_COMMANDS), default="asgi",
+                            help="Application module to boot (render.yaml runs asgi).")
+        parser.add_argument("--path", default="/moodle/login.php", help="URL of the first request.")
+        parser.add_argument("--runs", type=int, default=3, help="Boots per measurement (median is reported).")
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--port", type=int, default=8767)
+        parser.add_argument("--top", type=int, default=15, help="Rows in the import-time tables.")
+        parser.add_argument("--no-server", action="store_true", help="Skip the gunicorn measurements.")
+        parser.add_argument("--output", help="Write all results to this JSON file.")
+
+    def handle(self, *args, **opts):
+        module = SERVER_COMMANDS[opts["mode"]][0].split(":")[0]
+        results = {"mode": opts["mode"], "path": opts["path"]}
+
+        results["phases"] = {}
+        for warm in ("False", "True"):
+            runs = [self._boot(module, opts["path"], {"WARM_UP_ON_BOOT": warm}) for _ in range(opts["runs"])]
+            results["phases"][f"warm_up={warm}"] = {
+                name: statistics.median(run["phases"][name] for run in runs) for name in runs[0]["phases"]
+            }
+        self._print_phases(results["phases"])
+
+        results["imports"] = self._importtime(module, opts["path"])
+        self._print_imports(results["imports"], opts["top"])
+
+        if not opts["no_server"]:
+            results["first_response"] = self._servers(opts)
+
+        if opts["output"]:
+            with open(opts["output"], "w") as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(f"Results written to {opts['output']}")
+
+    # ----- fresh-interpreter boots
+
+    def _run_boot(self, module, path, env, python_flags=()):
+        process = subprocess.run(
+            [sys.executable, *python_flags, "-c", BOOT_SCRIPT, module, path],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+            env={**os.environ, "DJANGO_SETTINGS_MODULE": "iitpcep.settings", **env},
+        )
+        lines = process.stdout.strip().splitlines()
+        if process.returncode or not lines:
+            raise CommandError(f"Boot failed:\n{process.stderr[-2000:]}")
+        return json.loads(lines[-1]), process.stderr
+
+    def _boot(self, module, path, env):
+        result, _ = self._run_boot(module, path, env)
+        if result["status"] >= 400:
+            raise CommandError(f"{path} answered {result['status']} in-process; pick another --path.")
+        return result
+
+    def _importtime(self, module, path):
+        _, stderr = self._run_boot(module, path, {}, python_flags=("-X", "importtime"))
+        modules = []
+        for line in stderr.splitlines():
+            match = IMPORTTIME_RE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                modules.append({"module": name, "self_ms": int(self_us) / 1000,
+                                "cumulative_ms": int(cumulative_us) / 1000, "depth": len(indent) // 2})
+        packages = {}
+        for row in modules:
+            package = row["module"].split(".")[0]
+            packages[package] = packages.get(package, 0) + row["self_ms"]
+        return {
+            "total_ms": sum(row["self_ms"] for row in modules),
+            "packages": sorted(packages.items(), key=lambda item: -item[1]),
+            "modules": sorted(modules, key=lambda row: -row["self_ms"]),
+        }
+
+    # ----- gunicorn: start to first successful response
+
+    def _servers(self, opts):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\nTime to first response: gunicorn {opts['mode']}, {opts['workers']} worker(s), GET {opts['path']}"
+        ))
+        results = {}
+        for label, env in CONFIGURATIONS:
+            samples = []
+            for _ in range(opts["runs"]):
+                process, log, _ = spawn_gunicorn(opts["mode"], opts["workers"], opts["port"], env)
+                try:
+                    seconds = wait_for_response("127.0.0.1", opts["port"], opts["path"])
+                    if seconds is None:
+                        raise CommandError(f"No successful response from gunicorn ({label}):\n{server_log(log)}")
+                    samples.append(seconds * 1000)
+                finally:
+                    stop_server(process, log)
+            results[label] = {"median_ms": statistics.median(samples), "min_ms": min(samples), "max_ms": max(samples)}
+            row = results[label]
+            self.stdout.write(f"  {label:<24} median {row['median_ms']:7.0f} ms   "
+                              f"min {row['min_ms']:6.0f}   max {row['max_ms']:6.0f}")
+        return results
+
+    # ----- output
+
+    def _print_phases(self, phases):
+        self.stdout.write(self.style.MIGRATE_HEADING("Boot phases (fresh interpreter, median ms)"))
+        names = list(next(iter(phases.values())))
+        self.stdout.write(f"  {'':<18}" + "".join(f"{name:>16}" for name in names) + f"{'total':>10}")
+        for label, row in phases.items():
+            self.stdout.write(f"  {label:<18}" + "".join(f"{row[name]:16.0f}" for name in names)
+                              + f"{sum(row.values()):10.0f}")
+
+    def _print_imports(self, imports, top):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\nImport time (python -X importtime, boot + first request): {imports['total_ms']:.0f} ms"
+        ))
+        self.stdout.write("  By top-level package (self time):")
+        for package, ms in imports["packages"][:top]:
+            self.stdout.write(f"    {ms:8.1f} ms  {package}")
+        self.stdout.write("  Slowest modules (self time / including their imports):")
+        for row in imports["modules"][:top]:
+            self.stdout.write(f"    {row['self_ms']:8.1f} ms  {row['cumulative_ms']:8.1f} ms  {row['module']}")
@@ -0,0 +1,230 @@
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from collections import deque
+from statistics import median
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings,
+    setup_databases, teardown_databases, setup_test_environment, teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from moodle.loadgen import percentile
+from moodle.models import SystemConfig, UserTable, Quiz, Question
+from moodle.synthetic import SCALES, SYNTHETIC, seed
+
+VIEWS = ("dashboard", "test_attempt_view", "test_review_view", "admin_dashboard")
+
+
+class Command(BaseCommand):
+    help = (
+        "End-to-end timing of the hot views (dashboard, attempt, review, admin dashboard) "
+        "on synthetic datasets of each --scales. Runs on a throwaway test database and writes "
+        "a JSON report; --compare prints the change against an earlier report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scales", default="small",
+                            help=f"Comma-separated, from: {', '.join(SCALES)}")
+        parser.add_argument("--views", help="Comma-separated subset of: " + ", ".join(VIEWS))
+        parser.add_argument("--repeat", type=int, default=10, help="Timed warm requests per view.")
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--output", help="JSON report path (default: benchmarks/views-<timestamp>.json).")
+        parser.add_argument("--compare", help="Earlier JSON report to diff against.")
+
+    def handle(self, *args, **opts):
+        scales = [s for s in opts["scales"].split(",") if s]
+        unknown = set(scales) - set(SCALES)
+        if unknown:
+            raise CommandError(f"Unknown scale(s): {', '.join(sorted(unknown))}")
+        views = [v for v in (opts["views"] or ",".join(VIEWS)).split(",") if v]
+        unknown = set(views) - set(VIEWS)
+        if unknown:
+            raise CommandError(f"Unknown view(s): {', '.join(sorted(unknown))}")
+        opts["views"] = views
+
+        # The synthetic rows reuse real primary keys, so cached pages, answers
+        # and admission counters must not land in (or be cleared from) the
+        # site's shared caches: every alias gets a private in-memory cache
+        with override_settings(CACHES=self._local_caches()):
+            report = {"meta": self._meta(opts), "scales": {}}
+            setup_test_environment()
+            try:
+                for scale in scales:
+                    report["scales"][scale] = self._run_scale(scale, opts)
+            finally:
+                teardown_test_environment()
+
+        output = opts["output"] or os.path.join(
+            settings.BASE_DIR, "benchmarks", f"views-{timezone.now():%Y%m%d-%H%M%S}.json"
+        )
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        with open(output, "w") as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+        self.stdout.write(self.style.SUCCESS(f"\n📄 Wrote {output}"))
+
+        if opts["compare"]:
+            with open(opts["compare"]) as fh:
+                self._compare(json.load(fh), report)
+
+    def _local_caches(self):
+        return {
+            alias: {**config, "BACKEND": "moodle.request_timing.TimedLocMemCache",
+                    "LOCATION": f"bench-views-{alias}", "OPTIONS": {}}
+            for alias, config in settings.CACHES.items()
+        }
+
+    # ----- one scale = one fresh database
+
+    def _run_scale(self, scale, opts):
+        old_config = setup_databases(verbosity=0, interactive=False)
+        # The default 9000-entry query log would cap N+1-heavy pages
+        connection.queries_log = deque(maxlen=10 ** 6)
+        try:
+            # DEBUG off as in production; it also keeps the query log from
+            # filling up (and silently capping) between captures
+            with tempfile.TemporaryDirectory() as media_root, \
+                    override_settings(MEDIA_ROOT=media_root, DEBUG=False):
+                started = time.perf_counter()
+                counts = seed(**SCALES[scale])
+                seed_seconds = time.perf_counter() - started
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f"\n{scale}: " + ", ".join(f"{n} {name}" for name, n in counts.items())
+                    + f" (seeded in {seed_seconds:.1f}s)"
+                ))
+
+                views = {}
+                for name, client, url in self._targets():
+                    if name not in opts["views"]:
+                        continue
+                    views[name] = self._time_view(client, url, opts)
+                    self._print(name, views[name])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            # Only the private caches from _local_caches()
+            for alias in caches:
+                caches[alias].clear()
+        return {"counts": counts, "seed_seconds": round(seed_seconds, 2), "views": views}
+
+    def _targets(self):
+        SystemConfig.objects.get_or_create(id=1)
+        student = UserTable.objects.filter(username__startswith=f"{SYNTHETIC}-").order_by("id").first()
+        quiz = Quiz.objects.filter(is_live=True).order_by("id").first()
+        total = Question.objects.filter(parent_type="QUIZ", parent_id=quiz.id).count()
+
+        client = Client()
+        session = client.session
+        session["username"] = student.username
+        session.save()
+        client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+
+        attempt_url = reverse("test_attempt", args=["quiz", quiz.id])
+        # Starts the attempt and answers the page we time
+        client.post(f"{attempt_url}?q={total // 2 or 1}", {"next": "1"})
+
+        admin = Client()
+        admin.force_login(User.objects.create_superuser("bench-admin", "bench@example.com", "bench"))
+
+        return [
+            ("dashboard", client, reverse("dashboard")),
+            ("test_attempt_view", client, f"{attempt_url}?q={total // 2 or 1}"),
+            ("test_review_view", client, reverse("test_review", args=["quiz", quiz.id])),
+            ("admin_dashboard", admin, reverse("admin_dashboard:admin_dashboard")),
+        ]
+
+    def _time_view(self, client, url, opts):
+        for alias in ("default", "config"):
+            caches[alias].clear()
+        reset_queries()
+
+        with CaptureQueriesContext(connection) as cold_queries:
+            started = time.perf_counter()
+            response = client.get(url)
+            cold = time.perf_counter() - started
+        if response.status_code != 200:
+            raise CommandError(f"GET {url} returned {response.status_code}")
+
+        for _ in range(opts["warmup"]):
+            client.get(url)
+
+        timings = []
+        for _ in range(opts["repeat"]):
+            started = time.perf_counter()
+            client.get(url)
+            timings.append(time.perf_counter() - started)
+
+        with CaptureQueriesContext(connection) as warm_queries:
+            response = client.get(url)
+
+        return {
+            "cold_ms": round(cold * 1000, 2),
+            "cold_queries": len(cold_queries),
+            "median_ms": round(median(timings) * 1000, 2),
+            "p95_ms": round(percentile(timings, 95) * 1000, 2),
+            "min_ms": round(min(timings) * 1000, 2),
+            "queries": len(warm_queries),
+            "bytes": len(response.content),
+        }
+
+    # ----- reporting
+
+    def _meta(self, opts):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, timeout=10,
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            commit = ""
+        return {
+            "git_commit": commit,
+            "created_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "cache_backend": settings.CACHES["default"]["BACKEND"],
+            "answer_store_backend": settings.ANSWER_STORE_BACKEND,
+            "question_inline_options": settings.QUESTION_INLINE_OPTIONS,
+            "repeat": opts["repeat"],
+        }
+
+    def _print(self, name, r):
+        self.stdout.write(
+            f"  {name:<18} median {r['median_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms  "
+            f"cold {r['cold_ms']:8.2f} ms  queries {r['queries']:>3} (cold {r['cold_queries']:>3})  "
+            f"{r['bytes'] / 1024:7.1f} KiB"
+        )
+
+    def _compare(self, baseline, report):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\nvs {baseline['meta'].get('git_commit') or 'baseline'} "
+            f"({baseline['meta'].get('created_at', '?')})"
+        ))
+        for scale, current in report["scales"].items():
+            before = baseline.get("scales", {}).get(scale)
+            if not before:
+                self.stdout.write(f"  {scale}: not in baseline")
+                continue
+            for name, now in current["views"].items():
+                was = before["views"].get(name)
+                if not was:
+                    continue
+                change = (now["median_ms"] - was["median_ms"]) / was["median_ms"] * 100 if was["median_ms"] else 0
+                style = self.style.ERROR if change > 10 else self.style.SUCCESS if change < -10 else str
+                self.stdout.write(style(
+                    f"  {scale:<7} {name:<18} median {was['median_ms']:8.2f} -> {now['median_ms']:8.2f} ms "
+                    f"({change:+.0f}%)  queries {was['queries']} -> {now['queries']}  "
+                    f"bytes {was['bytes']} -> {now['bytes']}"
+                ))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from moodle.attempts import expire_attempts
+
+
+class Command(BaseCommand):
+    help = (
+        "Auto-submits attempts past their server-side deadline (which is capped "
+        "at close_date). Run from cron, or with --loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true")
+        parser.add_argument("--interval", type=float, default=30.0)
+
+    def handle(self, *args, **opts):
+        while True:
+            close_old_connections()
+            started = time.perf_counter()
+            closed = expire_attempts()
+            if closed:
+                self.stdout.write(f"⏰ Auto-submitted {closed} attempt(s) in {time.perf_counter() - started:.2f}s")
+            if not opts["loop"]:
+                break
+            time.sleep(opts["interval"])
@@ -0,0 +1,50 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from moodle import slow_queries
+from moodle.jobs import claim_next, run_job, requeue_stale
+
+
+class Command(BaseCommand):
+    help = "Background worker for the Job queue (moodle/jobs.py). Runs until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="Drain the due jobs, then exit (cron-friendly).")
+        parser.add_argument("--sleep", type=float, default=2.0,
+                            help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--max-jobs", type=int, default=0,
+                            help="Exit after this many jobs (0 = no limit), e.g. to recycle memory.")
+
+    def handle(self, *args, **opts):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        processed = 0
+        self.stdout.write(f"⏳ Job worker {worker_id} started")
+
+        while True:
+            close_old_connections()
+            requeue_stale()
+            job = claim_next(worker_id)
+
+            if job is None:
+                if opts["once"]:
+                    break
+                time.sleep(opts["sleep"])
+                continue
+
+            started = time.perf_counter()
+            ok = run_job(job)
+            elapsed = time.perf_counter() - started
+            status = self.style.SUCCESS("done") if ok else self.style.ERROR("failed")
+            self.stdout.write(f"#{job.pk} {job.name} attempt {job.attempts}/{job.max_attempts}: {status} in {elapsed:.1f}s")
+            # No request middleware here to flush the job's slow queries;
+            # off the request path, so plans can be captured here too
+            slow_queries.flush(explain=True)
+
+            processed += 1
+            if opts["max_jobs"] and processed >= opts["max_jobs"]:
+                break
@@ -0,0 +1,310 @@
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from datetime import timedelta
+from importlib import import_module
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+
+from config import SYSTEM
+from moodle.loadgen import SERVER_COMMANDS, Connection, gunicorn_server, percentile
+from moodle.models import SystemConfig, Course, Exam, Question, Option, UserTable
+from moodle.system_config import get_system_config
+
+SURGE_COURSE_CODE = "999996"
+# RequestTimingMiddleware: db;dur=1.2;desc="5 queries"
+SERVER_TIMING_DB_RE = re.compile(r'\bdb;[^,]*desc="(\d+) queries"')
+
+# In the order a student hits them
+STEPS = (
+    "login_page", "login", "dashboard", "view", "waiting", "attempt", "answer", "finish", "submit", "review",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Exam surge: --students virtual students start the same exam at once and walk the real "
+        "flow (login.php, dashboard, view.php, attempt.php pages, finish.php, review.php) against "
+        "a local gunicorn. Reports p50/p95/p99 latency, error rate, DB queries and throughput per "
+        "step, writes a JSON report and, with --compare, diffs it against a saved baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=200)
+        parser.add_argument("--questions", type=int, default=10, help="Questions in the exam (one page each).")
+        parser.add_argument("--ramp", type=float, default=0.0,
+                            help="Spread the start over this many seconds (0 = everyone at once).")
+        parser.add_argument("--think", type=float, default=0.0,
+                            help="Max random pause between a student's page views, in seconds.")
+        parser.add_argument("--admission-cap", type=int, default=0,
+                            help="Exam admission_cap, to include the waiting room in the run.")
+        parser.add_argument("--mode", choices=sorted(SERVER_COMMANDS), default="asgi")
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--port", type=int, default=8766)
+        parser.add_argument("--external", action="store_true",
+                            help="Use a server already listening on --port (query counts need "
+                                 "SERVER_TIMING_HEADER=True there).")
+        parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds.")
+        parser.add_argument("--output", help="JSON report path (default: benchmarks/surge-<timestamp>.json).")
+        parser.add_argument("--compare", help="Baseline JSON report to diff against.")
+
+    def handle(self, *args, **opts):
+        if opts["students"] < 1 or opts["questions"] < 1:
+            raise CommandError("--students and --questions must be at least 1.")
+
+        exam, questions = self._seed(opts)
+        run_id = f"surge-{exam.id}"
+        session_keys = []
+        try:
+            try:
+                if opts["external"]:
+                    result = self._run(exam, questions, run_id, session_keys, opts)
+                else:
+                    with gunicorn_server(opts["mode"], opts["workers"], opts["port"],
+                                         env={"SERVER_TIMING_HEADER": "True"}) as server:
+                        self.stdout.write(self.style.MIGRATE_HEADING(" ".join(server)))
+                        result = self._run(exam, questions, run_id, session_keys, opts)
+            except RuntimeError as e:
+                raise CommandError(str(e))
+        finally:
+            self._cleanup(exam, run_id, session_keys)
+
+        report = {"meta": self._meta(opts), **result}
+        self._print(report)
+
+        output = opts["output"] or os.path.join(
+            settings.BASE_DIR, "benchmarks", f"surge-{timezone.now():%Y%m%d-%H%M%S}.json"
+        )
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        with open(output, "w") as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+        self.stdout.write(self.style.SUCCESS(f"\n📄 Wrote {output}"))
+
+        if opts["compare"]:
+            with open(opts["compare"]) as fh:
+                self._compare(json.load(fh), report)
+
+    # ----- fixture
+
+    def _seed(self, opts):
+        SystemConfig.objects.get_or_create(id=1)
+        Course.objects.filter(code=SURGE_COURSE_CODE).delete()
+        course = Course.objects.create(title="Exam surge", code=SURGE_COURSE_CODE)
+        now = timezone.now()
+        exam = Exam.objects.create(
+            course=course, title="Exam surge", is_live=True,
+            open_date=now - timedelta(minutes=5), close_date=now + timedelta(hours=3),
+            duration_minutes=120, max_attempts=1, admission_cap=opts["admission_cap"],
+        )
+        questions = []
+        for i in range(opts["questions"]):
+            question = Question.objects.create(
+                parent_type="EXAM", parent_id=exam.id, position=i + 1,
+                text=f"Surge question {i + 1}", correct_option="A",
+            )
+            options = [Option.objects.create(question=question, option_label=label, text=f"Option {label}")
+                       for label in "ABCD"]
+            questions.append((question.id, [o.id for o in options]))
+        self.stdout.write(f"Seeded exam #{exam.id} with {len(questions)} questions")
+        return exam, questions
+
+    def _cleanup(self, exam, run_id, session_keys):
+        SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+        for key in session_keys:
+            SessionStore(session_key=key).delete()
+        # Attempts cascade with the students
+        UserTable.objects.filter(username__startswith=f"{run_id}-").delete()
+        Question.objects.filter(parent_type="EXAM", parent_id=exam.id).delete()
+        Course.objects.filter(code=SURGE_COURSE_CODE).delete()
+
+    # ----- the surge
+
+    def _run(self, exam, questions, run_id, session_keys, opts):
+        config = get_system_config()
+        pin = config.system_pin if config else SYSTEM.get("SYSTEM_PIN", "4321")
+        urls = {
+            "login": reverse("login"),
+            "dashboard": reverse("dashboard"),
+            "view": reverse("test_detail", args=["exam", exam.id]),
+            "attempt": reverse("test_attempt", args=["exam", exam.id]),
+            "admission": reverse("admission_status", args=["exam", exam.id]),
+            "finish": reverse("test_finish", args=["exam", exam.id]),
+            "review": reverse("test_review", args=["exam", exam.id]),
+        }
+        samples = {step: [] for step in STEPS}
+        failures = {step: {} for step in STEPS}
+
+        async def surge():
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                _student(i, f"{run_id}-{i}", pin, urls, questions, samples, failures, session_keys, opts)
+                for i in range(opts["students"])
+            ))
+            return time.perf_counter() - started
+
+        self.stdout.write(f"🚀 {opts['students']} students start exam #{exam.id} "
+                          f"(ramp {opts['ramp']}s, think ≤{opts['think']}s)")
+        wall = asyncio.run(surge())
+
+        steps = {}
+        for step in STEPS:
+            latencies = [s[0] for s in samples[step]]
+            queries = [s[1] for s in samples[step] if s[1] is not None]
+            errors = sum(failures[step].values())
+            total = len(latencies) + errors
+            steps[step] = {
+                "requests": len(latencies),
+                "errors": errors,
+                "error_rate": round(errors / total, 4) if total else 0.0,
+                "error_kinds": failures[step],
+                "rps": round(len(latencies) / wall, 2) if wall else 0.0,
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+                "max_ms": round(max(latencies, default=0) * 1000, 2),
+                "queries_avg": round(sum(queries) / len(queries), 2) if queries else None,
+                "queries_max": max(queries, default=None),
+            }
+        completed = len(samples["review"])
+        return {
+            "wall_seconds": round(wall, 2),
+            "completed_students": completed,
+            "total_rps": round(sum(s["requests"] for s in steps.values()) / wall, 2) if wall else 0.0,
+            "steps": steps,
+        }
+
+    # ----- reporting
+
+    def _meta(self, opts):
+        return {
+            "created_at": timezone.now().isoformat(),
+            "students": opts["students"],
+            "questions": opts["questions"],
+            "ramp": opts["ramp"],
+            "think": opts["think"],
+            "admission_cap": opts["admission_cap"],
+            "server": "external" if opts["external"] else f"{opts['mode']} x{opts['workers']}",
+            "database": settings.DATABASES["default"]["ENGINE"],
+            "cache_backend": settings.CACHES["default"]["BACKEND"],
+            "answer_store_backend": settings.ANSWER_STORE_BACKEND,
+        }
+
+    def _print(self, report):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n{report['completed_students']}/{report['meta']['students']} students finished in "
+            f"{report['wall_seconds']}s, {report['total_rps']} req/s overall"
+        ))
+        for step, r in report["steps"].items():
+            queries = "-" if r["queries_avg"] is None else f"{r['queries_avg']:.1f} (max {r['queries_max']})"
+            kinds = ", ".join(f"{kind}x{n}" for kind, n in sorted(r["error_kinds"].items()))
+            self.stdout.write(
+                f"  {step:<10} {r['requests']:>6} ok  {r['rps']:7.1f} req/s  "
+                f"p50 {r['p50_ms']:8.1f}  p95 {r['p95_ms']:8.1f}  p99 {r['p99_ms']:8.1f} ms  "
+                f"queries {queries:<12} errors {r['error_rate']:.1%}{f' ({kinds})' if kinds else ''}"
+            )
+
+    def _compare(self, baseline, report):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\nvs baseline {baseline['meta'].get('created_at', '?')} "
+            f"({baseline['meta'].get('students')} students, {baseline['meta'].get('server')})"
+        ))
+        for step, now in report["steps"].items():
+            was = baseline.get("steps", {}).get(step)
+            if not was:
+                continue
+            change = (now["p95_ms"] - was["p95_ms"]) / was["p95_ms"] * 100 if was["p95_ms"] else 0
+            style = self.style.ERROR if change > 10 else self.style.SUCCESS if change < -10 else str
+            self.stdout.write(style(
+                f"  {step:<10} p95 {was['p95_ms']:8.1f} -> {now['p95_ms']:8.1f} ms ({change:+.0f}%)  "
+                f"errors {was['error_rate']:.1%} -> {now['error_rate']:.1%}  "
+                f"queries {was['queries_avg']} -> {now['queries_avg']}"
+            ))
+
+
+async def _student(i, username, pin, urls, questions, samples, failures, session_keys, opts):
+    """One virtual student; stops at the first failed step, like a student stuck on an error page."""
+    conn = Connection("127.0.0.1", opts["port"])
+    rng = random.Random(i)
+
+    async def hit(step, method, path, fields=None, expect=(200,)):
+        headers, body = {}, b""
+        if method == "POST":
+            body = urlencode(fields or {}).encode()
+            headers = {
+                "Content-Type": "application/x-www-form-urlencoded",
+                "X-CSRFToken": conn.cookies.get(settings.CSRF_COOKIE_NAME, ""),
+            }
+        started = time.perf_counter()
+        try:
+            status, payload = await asyncio.wait_for(conn.request(method, path, headers, body), opts["timeout"])
+        except asyncio.TimeoutError:
+            kind = "timeout"
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+            kind = "connection"
+        else:
+            if status in expect:
+                queries = SERVER_TIMING_DB_RE.search(conn.headers.get("server-timing", ""))
+                samples[step].append((time.perf_counter() - started, int(queries.group(1)) if queries else None))
+                return payload
+            kind = str(status)
+        conn.close()
+        failures[step][kind] = failures[step].get(kind, 0) + 1
+        return None
+
+    async def think():
+        if opts["think"]:
+            await asyncio.sleep(rng.uniform(0, opts["think"]))
+
+    if opts["ramp"]:
+        await asyncio.sleep(opts["ramp"] * i / opts["students"])
+    try:
+        if await hit("login_page", "GET", urls["login"]) is None:
+            return
+        if await hit("login", "POST", urls["login"], {"username": username, "pin": pin}, expect=(302,)) is None:
+            return
+        if settings.SESSION_COOKIE_NAME in conn.cookies:
+            session_keys.append(conn.cookies[settings.SESSION_COOKIE_NAME])
+        await think()
+        if await hit("dashboard", "GET", urls["dashboard"]) is None:
+            return
+        await think()
+        if await hit("view", "GET", urls["view"]) is None:
+            return
+        await think()
+
+        # The first attempt page may be the waiting room: poll like its JS does
+        page = await hit("attempt", "GET", f"{urls['attempt']}?q=1")
+        while page is not None and b'id="position"' in page:
+            await asyncio.sleep(settings.ADMISSION_WINDOW_SECONDS)
+            if await hit("waiting", "GET", urls["admission"]) is None:
+                return
+            page = await hit("attempt", "GET", f"{urls['attempt']}?q=1")
+        if page is None:
+            return
+
+        for number, (question_id, option_ids) in enumerate(questions, start=1):
+            await think()
+            fields = {str(question_id): rng.choice(option_ids), "next": "Next page"}
+            if number == len(questions):
+                fields = {str(question_id): fields[str(question_id)]}
+            if await hit("answer", "POST", f"{urls['attempt']}?q={number}", fields, expect=(200, 302)) is None:
+                return
+            if number < len(questions):
+                if await hit("attempt", "GET", f"{urls['attempt']}?q={number + 1}") is None:
+                    return
+
+        await think()
+        if await hit("finish", "GET", urls["finish"]) is None:
+            return
+        if await hit("submit", "POST", urls["review"]) is None:
+            return
+        await hit("review", "GET", urls["review"])
+    finally:
+        conn.close()
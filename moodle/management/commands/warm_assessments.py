@@ -0,0 +1,122 @@
+import time
+from datetime import timedelta
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from moodle.image_derivatives import build_assessment_derivatives
+from moodle.models import AssessmentIndex, Assignment, Quiz, Exam, UserTable
+from moodle.question_nav import get_question_nav, warm_question_bundle
+from moodle.system_config import get_system_config
+
+
+MODEL_MAP = {"ASSIGNMENT": Assignment, "QUIZ": Quiz, "EXAM": Exam}
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-warms assessments that open within the next --lead minutes: question "
+        "nav + bundle, the shared test header fragment, image derivatives and the "
+        "DB connection. With --loop it keeps running as a scheduler."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lead", type=int, default=10,
+                            help="Warm assessments opening within this many minutes.")
+        parser.add_argument("--kind", action="append", choices=sorted(MODEL_MAP),
+                            help="Assessment kinds to warm (default: QUIZ and EXAM).")
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep polling every --interval seconds.")
+        parser.add_argument("--interval", type=int, default=60)
+        parser.add_argument("--base-url", default="",
+                            help="Also GET each test page here (e.g. https://iitpcep.online) "
+                                 "so the web workers open DB connections and load templates.")
+        parser.add_argument("--hits", type=int, default=4,
+                            help="Requests per assessment with --base-url (≈ number of workers).")
+
+    def handle(self, *args, **opts):
+        kinds = opts["kind"] or ["QUIZ", "EXAM"]
+        warmed = set()
+
+        while True:
+            for item in self._upcoming(kinds, opts["lead"]):
+                # Warm each (assessment, open_date) once per process
+                marker = (item.kind, item.object_id, item.open_date)
+                if marker in warmed:
+                    continue
+                self._warm(item, opts)
+                warmed.add(marker)
+
+            if not opts["loop"]:
+                break
+            time.sleep(opts["interval"])
+
+    def _upcoming(self, kinds, lead):
+        now = timezone.now()
+        return list(
+            AssessmentIndex.objects.filter(
+                # auto_live ones stay is_live=False until the scheduler opens them
+                Q(is_live=True) | Q(auto_live=True),
+                kind__in=kinds,
+                open_date__gte=now,
+                open_date__lte=now + timedelta(minutes=lead),
+            ).order_by("open_date")
+        )
+
+    def _warm(self, item, opts):
+        timings = {}
+        started = time.perf_counter()
+
+        def step(name, fn):
+            t0 = time.perf_counter()
+            result = fn()
+            timings[name] = (time.perf_counter() - t0) * 1000
+            return result
+
+        obj = MODEL_MAP[item.kind].objects.select_related("course").get(pk=item.object_id)
+
+        step("db", self._touch_db)
+        step("config", get_system_config)
+        nav = step("nav", lambda: get_question_nav(item.kind, item.object_id))
+        bundled = step("bundle", lambda: warm_question_bundle(item.kind, item.object_id))
+        step("fragment", lambda: render_to_string(
+            "_test_header.html", {"test": obj, "test_type": item.kind.capitalize()}
+        ))
+        images = step("images", lambda: build_assessment_derivatives(item.kind, item.object_id))
+        if opts["base_url"]:
+            step("http", lambda: self._hit_workers(opts["base_url"], item, opts["hits"]))
+
+        total_ms = (time.perf_counter() - started) * 1000
+        lead_s = (item.open_date - timezone.now()).total_seconds()
+        students = UserTable.objects.filter(is_banned=False, is_admin=False).count()
+
+        breakdown = " ".join(f"{name}={ms:.0f}ms" for name, ms in timings.items())
+        self.stdout.write(
+            f"{item.kind} #{item.object_id} '{item.title}': {len(nav)} questions "
+            f"({bundled} bundled), {images} images | warmed in {total_ms:.0f}ms | "
+            f"opens in {lead_s:.0f}s for up to {students} students | {breakdown}"
+        )
+        if lead_s < 0:
+            self.stdout.write(self.style.WARNING(
+                f"  ⚠️ Warming finished {-lead_s:.0f}s after open — increase --lead."
+            ))
+
+    def _touch_db(self):
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+    def _hit_workers(self, base_url, item, hits):
+        url = base_url.rstrip("/") + reverse("test_detail", args=[item.model_name_lower, item.object_id])
+        for _ in range(hits):
+            try:
+                urlopen(url, timeout=10).read()
+            except URLError as exc:
+                self.stdout.write(self.style.WARNING(f"  ⚠️ {url}: {exc}"))
+                break
@@ -0,0 +1,250 @@
+import glob
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+
+# --------------------------------------------------
+# 📈 METRICS (Prometheus text format at /metrics)
+# --------------------------------------------------
+# Counters and histograms are plain per-thread dicts: a thread only ever
+# writes its own shard, so recording takes no lock. Shards of threads that
+# exited (ASGI runs many short-lived ones) are folded into one retired
+# total, so the shard list stays as long as the live thread count. Every
+# METRICS_WRITE_SECONDS a worker dumps the sum of its shards to
+# METRICS_DIR/<pid>.json (atomic rename). The worker that answers /metrics
+# adds up every file, like prometheus_client's multiprocess mode: counters
+# of workers that exited are kept, gauges only count live workers.
+# Exam takers and session counts are read from the DB at scrape time.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    "iitpcep_http_requests_total": ("counter", "Requests by view, method and status."),
+    "iitpcep_http_request_duration_seconds": ("histogram", "Request latency by view."),
+    "iitpcep_http_requests_in_flight": ("gauge", "Requests being handled right now."),
+    "iitpcep_db_queries_total": ("counter", "DB queries run by view."),
+    "iitpcep_db_query_seconds_total": ("counter", "Time spent in DB queries by view."),
+    "iitpcep_db_pool_wait_seconds": ("histogram", "Time waited for a pooled DB connection (db_pool.py)."),
+    "iitpcep_db_pool_checkouts_total": ("counter", "Pool checkouts by result (new/reused/recycled/discarded/timeout)."),
+    "iitpcep_db_pool_in_use": ("gauge", "Pooled DB connections checked out right now."),
+    "iitpcep_write_queue_wait_seconds": ("histogram", "Time a write spent queued for the writer thread (write_queue.py)."),
+    "iitpcep_write_queue_batches_total": ("counter", "Coalesced writes flushed by the writer thread, by kind."),
+    "iitpcep_cache_requests_total": ("counter", "Cache reads by cache alias and result (hit/miss)."),
+    "iitpcep_active_exam_takers": ("gauge", "Attempts in progress and before their deadline, by assessment."),
+    "iitpcep_sessions": ("gauge", "Rows in the session store, by state (active/expired)."),
+}
+
+_shards = {}  # thread -> shard
+_retired = {}  # summed shards of exited threads
+_shards_lock = threading.Lock()
+_local = threading.local()
+_last_write = time.monotonic()
+
+
+def _retire_dead_shards():
+    """Caller holds _shards_lock. A dead thread can't write, so its shard is final."""
+    for thread in [thread for thread in _shards if not thread.is_alive()]:
+        for key, value in _shards.pop(thread).items():
+            _retired[key] = _retired.get(key, 0) + value
+
+
+def _shard():
+    shard = getattr(_local, "shard", None)
+    if shard is None:
+        shard = {}
+        # Once per thread
+        with _shards_lock:
+            _retire_dead_shards()
+            _shards[threading.current_thread()] = shard
+        _local.shard = shard
+    return shard
+
+
+def inc(name, labels=(), value=1):
+    """labels: tuple of (name, value) pairs, always in the same order."""
+    shard = _shard()
+    key = (name, labels)
+    shard[key] = shard.get(key, 0) + value
+
+
+def observe(name, labels, seconds):
+    shard = _shard()
+    bound = next((b for b in LATENCY_BUCKETS if seconds <= b), "+Inf")
+    key = (f"{name}_bucket", labels + (("le", bound),))
+    shard[key] = shard.get(key, 0) + 1
+    key = (f"{name}_sum", labels)
+    shard[key] = shard.get(key, 0) + seconds
+    key = (f"{name}_count", labels)
+    shard[key] = shard.get(key, 0) + 1
+
+
+def record_request(view, method, status, seconds, timer):
+    view_label = (("view", view),)
+    inc("iitpcep_http_requests_total", view_label + (("method", method), ("status", str(status))))
+    observe("iitpcep_http_request_duration_seconds", view_label, seconds)
+    inc("iitpcep_db_queries_total", view_label, timer.db_count)
+    inc("iitpcep_db_query_seconds_total", view_label, timer.db_ms / 1000)
+
+
+def record_cache(alias, hits, misses):
+    if hits:
+        inc("iitpcep_cache_requests_total", (("cache", alias), ("result", "hit")), hits)
+    if misses:
+        inc("iitpcep_cache_requests_total", (("cache", alias), ("result", "miss")), misses)
+
+
+# ----- multiprocess snapshots
+
+def _process_samples():
+    with _shards_lock:
+        _retire_dead_shards()
+        totals = dict(_retired)
+        shards = list(_shards.values())
+    for shard in shards:
+        # dict() copies under the GIL; the owning thread may keep writing
+        for key, value in dict(shard).items():
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+def write_snapshot():
+    global _last_write
+    _last_write = time.monotonic()
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = os.path.join(settings.METRICS_DIR, f"{os.getpid()}.json")
+    samples = [[name, [list(pair) for pair in labels], value] for (name, labels), value in _process_samples().items()]
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump({"pid": os.getpid(), "samples": samples}, fh)
+    os.replace(tmp, path)
+
+
+def maybe_write_snapshot():
+    if time.monotonic() - _last_write >= settings.METRICS_WRITE_SECONDS:
+        write_snapshot()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _base_name(sample_name):
+    for suffix in ("_bucket", "_sum", "_count"):
+        if sample_name.endswith(suffix) and sample_name[:-len(suffix)] in METRICS:
+            return sample_name[:-len(suffix)]
+    return sample_name
+
+
+def collect_workers():
+    """{(name, labels): value} summed over every worker's snapshot."""
+    write_snapshot()
+    totals = {}
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, "*.json")):
+        try:
+            with open(path) as fh:
+                snapshot = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        alive = _alive(snapshot["pid"])
+        for name, labels, value in snapshot["samples"]:
+            if not alive and METRICS.get(_base_name(name), ("counter",))[0] == "gauge":
+                continue
+            key = (name, tuple(tuple(pair) for pair in labels))
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+# ----- scrape-time gauges
+
+def collect_db_gauges():
+    from django.contrib.sessions.models import Session
+    from .models import Attempt
+
+    now = timezone.now()
+    totals = {}
+    active = (
+        Attempt.objects.filter(status="IN_PROGRESS", deadline__gt=now)
+        .values_list("kind", "object_id").annotate(n=Count("id")).order_by()
+    )
+    for kind, object_id, n in active:
+        totals[("iitpcep_active_exam_takers", (("kind", kind), ("id", str(object_id))))] = n
+
+    # Only the DB-backed engines have a table to count
+    if settings.SESSION_ENGINE.endswith((".db", ".cached_db")):
+        live = Session.objects.filter(expire_date__gt=now).count()
+        totals[("iitpcep_sessions", (("state", "active"),))] = live
+        totals[("iitpcep_sessions", (("state", "expired"),))] = Session.objects.count() - live
+    return totals
+
+
+# ----- text exposition
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value) if value != int(value) else f"{int(value)}"
+    return str(value)
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def render(samples):
+    """Prometheus text format 0.0.4; histogram buckets are made cumulative here."""
+    by_metric = {}
+    for (name, labels), value in samples.items():
+        by_metric.setdefault(_base_name(name), []).append((name, labels, value))
+
+    lines = []
+    for metric in sorted(by_metric):
+        kind, help_text = METRICS.get(metric, ("untyped", ""))
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        rows = by_metric[metric]
+        if kind == "histogram":
+            lines += _histogram_lines(metric, rows)
+        else:
+            lines += [f"{name}{_labels(labels)} {_format_value(value)}" for name, labels, value in sorted(rows)]
+    return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(metric, rows):
+    series = {}
+    for name, labels, value in rows:
+        if name.endswith("_bucket"):
+            base = tuple(pair for pair in labels if pair[0] != "le")
+            le = dict(labels)["le"]
+            series.setdefault(base, {}).setdefault("buckets", {})[le] = value
+        else:
+            series.setdefault(labels, {})[name[len(metric):]] = value
+
+    lines = []
+    for labels in sorted(series):
+        data = series[labels]
+        buckets = data.get("buckets", {})
+        running = 0
+        for bound in LATENCY_BUCKETS:
+            running += buckets.get(bound, 0)
+            lines.append(f"{metric}_bucket{_labels(labels + (('le', bound),))} {running}")
+        lines.append(f"{metric}_bucket{_labels(labels + (('le', '+Inf'),))} {data.get('_count', 0)}")
+        lines.append(f"{metric}_sum{_labels(labels)} {_format_value(data.get('_sum', 0))}")
+        lines.append(f"{metric}_count{_labels(labels)} {data.get('_count', 0)}")
+    return lines
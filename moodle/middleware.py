@@ -1,5 +1,164 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
 from django.shortcuts import render, redirect
-from .models import SystemConfig
+from whitenoise.middleware import WhiteNoiseMiddleware
+from . import metrics, profiling, request_timing, scheduler, slow_queries
+from .system_config import get_system_config, aget_system_config
+
+
+# Both sync and async capable: under ASGI, async views (autosave, presence,
+# admission polls) then run without a thread hop per middleware.
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise, made async-capable (upstream is sync-only and would force the whole stack into threads)."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class RequestTimingMiddleware:
+    """
+    Times each request (see request_timing.py): Server-Timing header with
+    total/db/template/cache time (superusers, or SERVER_TIMING_HEADER), the per-route histograms, the
+    /metrics counters (metrics.py) and the slow-query log flush. Also
+    starts the process's scheduler thread (scheduler.py).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timer, token = request_timing.start(request)
+        metrics.inc("iitpcep_http_requests_in_flight")
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.inc("iitpcep_http_requests_in_flight", value=-1)
+            request_timing.stop(token)
+        self._finish(request, response, timer)
+        if request_timing.histograms.flush_due():
+            request_timing.histograms.flush()
+            slow_queries.flush()
+        metrics.maybe_write_snapshot()
+        scheduler.ensure_started()
+        return response
+
+    async def __acall__(self, request):
+        timer, token = request_timing.start(request)
+        metrics.inc("iitpcep_http_requests_in_flight")
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.inc("iitpcep_http_requests_in_flight", value=-1)
+            request_timing.stop(token)
+        self._finish(request, response, timer)
+        if request_timing.histograms.flush_due():
+            await sync_to_async(request_timing.histograms.flush)()
+            await sync_to_async(slow_queries.flush)()
+        metrics.maybe_write_snapshot()
+        scheduler.ensure_started()
+        return response
+
+    @staticmethod
+    def _finish(request, response, timer):
+        total_ms = timer.total_ms()
+        route = request_timing.route_name(request)
+        request_timing.histograms.record(route, timer, total_ms, response.status_code)
+        metrics.record_request(route, request.method, response.status_code, total_ms / 1000, timer)
+        if settings.SERVER_TIMING_HEADER or RequestTimingMiddleware._is_superuser(request):
+            response["Server-Timing"] = timer.header(total_ms)
+
+    @staticmethod
+    def _is_superuser(request):
+        # Only a user the view already loaded: no query, safe on the event loop
+        user = getattr(request, "_cached_user", None)
+        return bool(user and user.is_superuser)
+
+
+class ProfilerMiddleware:
+    """
+    ?_profile=1 / "X-Profile: 1" from a superuser: run the rest of the
+    stack under cProfile and save it (see profiling.py). Sits after
+    AuthenticationMiddleware, which it needs for request.user.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if not profiling.requested(request) or not profiling.allowed(request):
+            return self.get_response(request)
+        profiler = profiling.begin()
+        if profiler is None:
+            return self._busy(self.get_response(request))
+        try:
+            started = time.perf_counter()
+            response = profiler.runcall(self.get_response, request)
+            total_ms = (time.perf_counter() - started) * 1000
+            response["X-Profile-Id"] = profiling.save(request, response, profiler, total_ms)
+        finally:
+            profiling.end()
+        return response
+
+    async def __acall__(self, request):
+        if not profiling.requested(request) or not await sync_to_async(profiling.allowed)(request):
+            return await self.get_response(request)
+        profiler = profiling.begin()
+        if profiler is None:
+            return self._busy(await self.get_response(request))
+        # Profiles the event loop thread: work in sync_to_async threads only
+        # shows up as time spent waiting on it
+        try:
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.disable()
+            total_ms = (time.perf_counter() - started) * 1000
+            response["X-Profile-Id"] = await sync_to_async(profiling.save)(request, response, profiler, total_ms)
+        finally:
+            profiling.end()
+        return response
+
+    @staticmethod
+    def _busy(response):
+        response["X-Profile-Id"] = "busy"
+        return response
 
 
 class SystemStatusMiddleware:
@@ -7,27 +166,52 @@ class SystemStatusMiddleware:
     Middleware to show offline page when system_status = OFFLINE.
     Allows access only to /admin and static/media URLs.
     """
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
-    def __call__(self, request):
+    @staticmethod
+    def _exempt(request):
         # ✅ Allow admin, static, and media routes
-        if request.path.startswith("/admin") or request.path.startswith("/static") or request.path.startswith("/media"):
+        return request.path.startswith("/admin") or request.path.startswith("/static") or request.path.startswith("/media")
+
+    @staticmethod
+    def _offline_page(request):
+        return render(request, "offline.html", {"system_status": "OFFLINE"}, status=503)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if self._exempt(request):
             return self.get_response(request)
 
         # ✅ Get system configuration
-        config = SystemConfig.objects.first()
+        config = get_system_config()
 
         # ✅ If system is OFFLINE
         if config and config.system_status == "OFFLINE":
             # Redirect any non-root URL to home
             # Render offline page at root
-            return render(request, "offline.html", {"system_status": "OFFLINE"}, status=503)
+            return self._offline_page(request)
 
         # ✅ Otherwise continue normally
         return self.get_response(request)
 
+    async def __acall__(self, request):
+        if self._exempt(request):
+            return await self.get_response(request)
+
+        config = await aget_system_config()
+        if config and config.system_status == "OFFLINE":
+            return await sync_to_async(self._offline_page)(request)
+
+        return await self.get_response(request)
+
 
 # moodle/middleware.py
 from django.shortcuts import render
@@ -74,29 +258,41 @@ class CustomAdminAccessMiddleware:
 
 
 from django.utils import timezone
-from .models import UserTable
-from django.core.cache import cache
+from . import write_queue
+from django.core.cache import caches
 
 
 class ActiveUserMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         response = self.get_response(request)
+        self._touch(request)
+        return response
 
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        # request.user is a lazy DB lookup: resolve it off the event loop
+        await sync_to_async(self._touch)(request)
+        return response
+
+    def _touch(self, request):
         if request.user.is_authenticated:
             # Cache key to prevent database spam (update once per minute)
             cache_key = f'last_seen_{request.user.id}'
-            if not cache.get(cache_key):
-                try:
-                    # Update the UserTable entry
-                    user_profile = UserTable.objects.get(username=request.user.username)
-                    user_profile.update_activity()  # Updates timestamp
-
-                    # Set cache for 60 seconds
-                    cache.set(cache_key, timezone.now(), 60)
-                except UserTable.DoesNotExist:
-                    pass
-
-        return response
\ No newline at end of file
+            presence = caches['presence']
+            if not presence.get(cache_key):
+                # Update the UserTable entry, if any (queued, see write_queue.py)
+                write_queue.touch(request.user.username)
+
+                # Set cache for 60 seconds
+                presence.set(cache_key, timezone.now(), 60)
\ No newline at end of file
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moodle', '0008_alter_usertable_is_online_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='calendarevent',
+            name='date',
+            field=models.DateField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moodle', '0009_calendarevent_date_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['is_live', 'open_date'], name='assignment_live_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['is_live', 'close_date'], name='assignment_live_close_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['open_date'], name='assignment_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['close_date'], name='assignment_close_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['course', 'open_date'], name='assignment_course_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['is_live', 'open_date'], name='exam_live_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['is_live', 'close_date'], name='exam_live_close_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['open_date'], name='exam_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['close_date'], name='exam_close_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['course', 'open_date'], name='exam_course_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['is_live', 'open_date'], name='quiz_live_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['is_live', 'close_date'], name='quiz_live_close_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['open_date'], name='quiz_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['close_date'], name='quiz_close_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['course', 'open_date'], name='quiz_course_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usertable',
+            index=models.Index(fields=['last_active'], name='usertable_last_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usertable',
+            index=models.Index(fields=['created_at'], name='usertable_created_at_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_assessment_index(apps, schema_editor):
+    AssessmentIndex = apps.get_model("moodle", "AssessmentIndex")
+    Question = apps.get_model("moodle", "Question")
+
+    rows = []
+    for model_name in ("Assignment", "Quiz", "Exam"):
+        kind = model_name.upper()
+        for obj in apps.get_model("moodle", model_name).objects.all():
+            rows.append(AssessmentIndex(
+                kind=kind,
+                object_id=obj.pk,
+                course_id=obj.course_id,
+                title=obj.title,
+                description=obj.description,
+                open_date=obj.open_date,
+                close_date=obj.close_date,
+                is_live=obj.is_live,
+                question_count=Question.objects.filter(parent_type=kind, parent_id=obj.pk).count(),
+            ))
+    AssessmentIndex.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moodle', '0010_assessment_and_user_activity_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssessmentIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ASSIGNMENT', 'Assignment'), ('QUIZ', 'Quiz'), ('EXAM', 'Exam')], max_length=20)),
+                ('object_id', models.PositiveIntegerField(help_text='ID of the Assignment/Quiz/Exam row.')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('open_date', models.DateTimeField()),
+                ('close_date', models.DateTimeField(blank=True, null=True)),
+                ('is_live', models.BooleanField(default=False)),
+                ('question_count', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assessment_index', to='moodle.course')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['close_date'], name='assessmentindex_close_idx'), models.Index(fields=['open_date'], name='assessmentindex_open_idx'), models.Index(fields=['course', 'open_date'], name='assessmentindex_course_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='assessmentindex',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='assessmentindex_kind_object_uniq'),
+        ),
+        migrations.RunPython(backfill_assessment_index, migrations.RunPython.noop),
+    ]
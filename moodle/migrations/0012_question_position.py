@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:45
+
+from django.db import migrations, models
+
+
+def number_existing_questions(apps, schema_editor):
+    Question = apps.get_model("moodle", "Question")
+
+    counters = {}
+    updated = []
+    for q in Question.objects.order_by("parent_type", "parent_id", "id").only("id", "parent_type", "parent_id"):
+        key = (q.parent_type.upper(), q.parent_id)
+        counters[key] = counters.get(key, 0) + 1
+        q.position = counters[key]
+        updated.append(q)
+    Question.objects.bulk_update(updated, ["position"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moodle', '0011_assessmentindex'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='position',
+            field=models.PositiveIntegerField(default=0, help_text='Order within the parent (1, 2, 3...).'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['parent_type', 'parent_id', 'position'], name='question_parent_pos_idx'),
+        ),
+        migrations.RunPython(number_existing_questions, migrations.RunPython.noop),
+    ]
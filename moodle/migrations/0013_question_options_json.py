@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:46
+
+from django.db import migrations, models
+
+
+def mirror_existing_options(apps, schema_editor):
+    Question = apps.get_model("moodle", "Question")
+    Option = apps.get_model("moodle", "Option")
+
+    inline = {}
+    for opt in Option.objects.order_by("question_id", "option_label"):
+        inline.setdefault(opt.question_id, []).append({
+            "id": opt.id,
+            "option_label": opt.option_label,
+            "text": opt.text,
+            "image": opt.image.name if opt.image else "",
+        })
+
+    updated = []
+    for q in Question.objects.filter(id__in=inline.keys()).only("id"):
+        q.options_json = inline[q.id]
+        updated.append(q)
+    Question.objects.bulk_update(updated, ["options_json"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moodle', '0012_question_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='options_json',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='[{id, option_label, text, image}] mirrored from Option rows.'),
+        ),
+        migrations.RunPython(mirror_existing_options, migrations.RunPython.noop),
+    ]
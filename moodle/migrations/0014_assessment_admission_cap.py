@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moodle', '0013_question_options_json'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='admission_cap',
+            field=models.PositiveIntegerField(default=0, help_text='Students admitted per admission window when many start at once (0 = use ADMISSION_DEFAULT_CAP; 0 there too = no waiting room).'),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='admission_cap',
+            field=models.PositiveIntegerField(default=0, help_text='Students admitted per admission window when many start at once (0 = use ADMISSION_DEFAULT_CAP; 0 there too = no waiting room).'),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='admission_cap',
+            field=models.PositiveIntegerField(default=0, help_text='Students admitted per admission window when many start at once (0 = use ADMISSION_DEFAULT_CAP; 0 there too = no waiting room).'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:56
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moodle', '0015_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LiveTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ASSIGNMENT', 'Assignment'), ('QUIZ', 'Quiz'), ('EXAM', 'Exam')], max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('is_live', models.BooleanField(help_text='The value is_live was set to.')),
+                ('scheduled_at', models.DateTimeField()),
+                ('applied_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-applied_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='auto_live',
+            field=models.BooleanField(default=False, help_text='Go live automatically at the open date and stop at the close date.'),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='auto_live',
+            field=models.BooleanField(default=False, help_text='Go live automatically at the open date and stop at the close date.'),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='auto_live',
+            field=models.BooleanField(default=False, help_text='Go live automatically at the open date and stop at the close date.'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moodle', '0016_live_schedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Attempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ASSIGNMENT', 'Assignment'), ('QUIZ', 'Quiz'), ('EXAM', 'Exam')], max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('number', models.PositiveSmallIntegerField(help_text='1..max_attempts')),
+                ('status', models.CharField(choices=[('IN_PROGRESS', 'In progress'), ('SUBMITTED', 'Submitted'), ('EXPIRED', 'Auto-submitted')], default='IN_PROGRESS', max_length=12)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('deadline', models.DateTimeField(help_text='started_at + duration, capped at close_date.')),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('session_key', models.CharField(blank=True, default='', max_length=40)),
+                ('answers', models.JSONField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='moodle.usertable')),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['status', 'deadline'], name='attempt_status_deadline_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='attempt',
+            constraint=models.UniqueConstraint(fields=('user', 'kind', 'object_id', 'number'), name='attempt_user_test_number_uniq'),
+        ),
+    ]
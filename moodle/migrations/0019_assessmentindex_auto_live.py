@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+def backfill_auto_live(apps, schema_editor):
+    AssessmentIndex = apps.get_model("moodle", "AssessmentIndex")
+    for model_name in ("Assignment", "Quiz", "Exam"):
+        auto_ids = apps.get_model("moodle", model_name).objects.filter(auto_live=True).values("id")
+        AssessmentIndex.objects.filter(kind=model_name.upper(), object_id__in=auto_ids).update(auto_live=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moodle', '0018_admission_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assessmentindex',
+            name='auto_live',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(backfill_auto_live, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,10 @@
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 from datetime import timedelta
 
+from .availability import is_live_now
+
 
 # --------------------------------------------------
 # 🧑 USER MODEL (PIN-BASED LOGIN SYSTEM)
@@ -21,6 +24,14 @@ class UserTable(models.Model):
     last_active = models.DateTimeField(default=timezone.now)
     is_online = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # admin_dashboard online count: last_active >= now - 5 min
+            models.Index(fields=["last_active"], name="usertable_last_active_idx"),
+            # growth chart (created_at ranges) + "-created_at" user listing
+            models.Index(fields=["created_at"], name="usertable_created_at_idx"),
+        ]
+
     def __str__(self):
         return self.username
 
@@ -92,11 +103,36 @@ class BaseAssessment(models.Model):
         help_text="If enabled, this assessment becomes visible and attemptable by users."
     )
 
+    # ✅ Scheduler-controlled Live toggle (see live_schedule.py)
+    auto_live = models.BooleanField(
+        default=False,
+        help_text="Go live automatically at the open date and stop at the close date."
+    )
+
+    # ✅ Waiting room: max new attempts started per admission window
+    admission_cap = models.PositiveIntegerField(
+        default=0,
+        help_text="Students admitted per admission window when many start at once "
+                  "(0 = use ADMISSION_DEFAULT_CAP; 0 there too = no waiting room)."
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         abstract = True
+        indexes = [
+            # dashboard live filter: is_live=True AND open_date <= now
+            models.Index(fields=["is_live", "open_date"], name="%(class)s_live_open_idx"),
+            # availability index: next close_date among live rows
+            models.Index(fields=["is_live", "close_date"], name="%(class)s_live_close_idx"),
+            # calendar month ranges + admin_dashboard "-open_date" listing
+            models.Index(fields=["open_date"], name="%(class)s_open_idx"),
+            # timeline (close_date >= now ORDER BY close_date) + calendar ranges
+            models.Index(fields=["close_date"], name="%(class)s_close_idx"),
+            # course_detail_view: course=... ORDER BY open_date
+            models.Index(fields=["course", "open_date"], name="%(class)s_course_open_idx"),
+        ]
 
     @property
     def duration_display(self):
@@ -123,8 +159,12 @@ class BaseAssessment(models.Model):
 
     def is_available(self):
         """
-        Returns True if within open/close time AND is_live = True
+        Returns True if within open/close time AND is_live = True.
+        Saved rows are answered from the cached availability index.
         """
+        if self.pk is not None:
+            return is_live_now(self)
+
         now = timezone.now()
         return (
             self.is_live
@@ -161,6 +201,52 @@ class Exam(BaseAssessment):
         return f"Exam: {self.title}"
 
 
+# --------------------------------------------------
+# 🗂️ ASSESSMENT INDEX (one row per Assignment / Quiz / Exam)
+# --------------------------------------------------
+class AssessmentIndex(models.Model):
+    """
+    Denormalized copy of every assessment so cross-type listings
+    (timeline, calendar, course page) are one sorted query.
+    Kept in sync by signals.py — never edit rows by hand.
+    """
+    KIND_CHOICES = [("ASSIGNMENT", "Assignment"), ("QUIZ", "Quiz"), ("EXAM", "Exam")]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField(help_text="ID of the Assignment/Quiz/Exam row.")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="assessment_index")
+
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True, null=True)
+    open_date = models.DateTimeField()
+    close_date = models.DateTimeField(blank=True, null=True)
+    is_live = models.BooleanField(default=False)
+    auto_live = models.BooleanField(default=False)
+    question_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="assessmentindex_kind_object_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["close_date"], name="assessmentindex_close_idx"),
+            models.Index(fields=["open_date"], name="assessmentindex_open_idx"),
+            models.Index(fields=["course", "open_date"], name="assessmentindex_course_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
+
+    @property
+    def model_name(self):
+        """'Assignment' / 'Quiz' / 'Exam' — same as the source model's class name."""
+        return self.get_kind_display()
+
+    @property
+    def model_name_lower(self):
+        return self.kind.lower()
+
+
 # --------------------------------------------------
 # ❓ QUESTION MODEL (For MCQ, Coding, Image)
 # --------------------------------------------------
@@ -177,6 +263,7 @@ class Question(models.Model):
         default="QUIZ"
     )
     parent_id = models.PositiveIntegerField(help_text="ID of the parent Assignment/Quiz/Exam.")
+    position = models.PositiveIntegerField(default=0, help_text="Order within the parent (1, 2, 3...).")
     question_type = models.CharField(max_length=10, choices=QUESTION_TYPES, default="MCQ")
 
     text = models.TextField(blank=True, null=True)
@@ -195,9 +282,50 @@ class Question(models.Model):
         help_text="Correct option label for MCQ."
     )
 
+    # ✅ Inline copy of the Option rows (kept in sync by signals.py)
+    options_json = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        help_text="[{id, option_label, text, image}] mirrored from Option rows."
+    )
+
+    class Meta:
+        indexes = [
+            # attempt page: nav strip + single-question fetch by position
+            models.Index(fields=["parent_type", "parent_id", "position"], name="question_parent_pos_idx"),
+        ]
+
     def __str__(self):
         return f"Q{self.id}: {self.text[:40]}..." if self.text else f"Question {self.id}"
 
+    def get_options(self):
+        """
+        Options A–D for display. With QUESTION_INLINE_OPTIONS the list is
+        built from options_json (no extra query); otherwise from the
+        Option table (prefetch "options" to avoid N+1).
+        """
+        if getattr(settings, "QUESTION_INLINE_OPTIONS", False):
+            return [Option(question_id=self.id, **data) for data in self.options_json]
+        return list(self.options.all())
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # signals.py also refreshes the old parent when a question moves
+        loaded = dict(zip(field_names, values))
+        instance._loaded_parent = (loaded.get("parent_type"), loaded.get("parent_id"))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # New questions go to the end of their assessment
+        if not self.position:
+            last = Question.objects.filter(
+                parent_type=self.parent_type, parent_id=self.parent_id
+            ).aggregate(models.Max("position"))["position__max"]
+            self.position = (last or 0) + 1
+        super().save(*args, **kwargs)
+
 
 # --------------------------------------------------
 # 🧩 OPTIONS (For MCQ QUESTIONS)
@@ -214,6 +342,15 @@ class Option(models.Model):
     def __str__(self):
         return f"{self.option_label}: {self.text[:30] if self.text else 'Image Option'}"
 
+    def to_inline(self):
+        """Compact dict stored in Question.options_json."""
+        return {
+            "id": self.id,
+            "option_label": self.option_label,
+            "text": self.text,
+            "image": self.image.name if self.image else "",
+        }
+
     class Meta:
         ordering = ["option_label"]
 
@@ -223,7 +360,7 @@ class Option(models.Model):
 # --------------------------------------------------
 class CalendarEvent(models.Model):
     title = models.CharField(max_length=200)
-    date = models.DateField(default=timezone.now)
+    date = models.DateField(default=timezone.now, db_index=True)
     description = models.TextField(blank=True, null=True)
 
     related_course = models.ForeignKey(Course, on_delete=models.SET_NULL, null=True, blank=True)
@@ -241,3 +378,125 @@ class CalendarEvent(models.Model):
 
     def __str__(self):
         return f"{self.title} ({self.event_type})"
+
+
+# --------------------------------------------------
+# 📝 ATTEMPTS (server-side max_attempts + deadline, see attempts.py)
+# --------------------------------------------------
+class Attempt(models.Model):
+    STATUS_CHOICES = [
+        ("IN_PROGRESS", "In progress"),
+        ("SUBMITTED", "Submitted"),
+        ("EXPIRED", "Auto-submitted"),
+    ]
+
+    user = models.ForeignKey(UserTable, on_delete=models.CASCADE, related_name="attempts")
+    kind = models.CharField(max_length=20, choices=AssessmentIndex.KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    number = models.PositiveSmallIntegerField(help_text="1..max_attempts")
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default="IN_PROGRESS")
+
+    started_at = models.DateTimeField(default=timezone.now)
+    deadline = models.DateTimeField(help_text="started_at + duration, capped at close_date.")
+    submitted_at = models.DateTimeField(null=True, blank=True)
+
+    # Lets the auto-submit job find the answers of a student who walked away
+    session_key = models.CharField(max_length=40, blank=True, default="")
+    answers = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+        constraints = [
+            # Two concurrent "start" requests can't both become attempt #n
+            models.UniqueConstraint(fields=["user", "kind", "object_id", "number"], name="attempt_user_test_number_uniq"),
+        ]
+        indexes = [
+            # auto-submit: status=IN_PROGRESS AND deadline < now
+            models.Index(fields=["status", "deadline"], name="attempt_status_deadline_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.kind} #{self.object_id} attempt {self.number} ({self.status})"
+
+
+# --------------------------------------------------
+# ⏱️ LIVE SCHEDULE LOG (see live_schedule.py)
+# --------------------------------------------------
+class LiveTransition(models.Model):
+    """One scheduler-applied is_live flip: when it was due vs. when it ran."""
+    kind = models.CharField(max_length=20, choices=AssessmentIndex.KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    is_live = models.BooleanField(help_text="The value is_live was set to.")
+    scheduled_at = models.DateTimeField()
+    applied_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ["-applied_at"]
+
+    def __str__(self):
+        action = "opened" if self.is_live else "closed"
+        return f"{self.kind} #{self.object_id} {action} at {self.applied_at:%Y-%m-%d %H:%M:%S}"
+
+    @property
+    def lag_seconds(self):
+        return (self.applied_at - self.scheduled_at).total_seconds()
+
+
+# --------------------------------------------------
+# ⏳ BACKGROUND JOBS (see jobs.py, drained by scheduler.py / run_jobs)
+# --------------------------------------------------
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ("QUEUED", "Queued"),
+        ("RUNNING", "Running"),
+        ("DONE", "Done"),
+        ("FAILED", "Failed"),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="QUEUED")
+
+    progress = models.PositiveSmallIntegerField(default=0, help_text="0-100")
+    progress_message = models.CharField(max_length=255, blank=True, default="")
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True, default="")
+
+    created_by = models.CharField(max_length=150, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            # worker poll: status=QUEUED AND run_after <= now ORDER BY run_after
+            models.Index(fields=["status", "run_after"], name="job_status_run_after_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.name} ({self.status})"
+
+    def set_progress(self, percent, message=""):
+        """Cheap UPDATE so the admin panel can follow a running job."""
+        self.progress = max(0, min(100, int(percent)))
+        self.progress_message = message[:255]
+        Job.objects.filter(pk=self.pk).update(progress=self.progress, progress_message=self.progress_message)
+
+
+# --------------------------------------------------
+# 🚦 ADMISSION COUNTERS (see admission.py)
+# --------------------------------------------------
+class AdmissionCounter(models.Model):
+    """Waiting-room counter, for deployments whose cache has no atomic incr (file cache)."""
+    key = models.CharField(max_length=150, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
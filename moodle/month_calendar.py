@@ -0,0 +1,176 @@
+import calendar
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.urls import reverse
+
+from .models import AssessmentIndex, CalendarEvent
+
+
+# --------------------------------------------------
+# 🗓️ MONTH CALENDAR SERVICE
+# --------------------------------------------------
+# The week/event matrix for a month only changes when an assessment,
+# calendar event or course is saved/deleted. We cache it per (year, month)
+# under a version number that signals.py bumps on every relevant change.
+
+CALENDAR_VERSION_KEY = "calendar:version"
+CALENDAR_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_calendar_version():
+    version = cache.get(CALENDAR_VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(CALENDAR_VERSION_KEY, version, None)
+    return version
+
+
+def bump_calendar_version():
+    """Invalidate every cached month in one step."""
+    try:
+        cache.incr(CALENDAR_VERSION_KEY)
+    except ValueError:
+        cache.set(CALENDAR_VERSION_KEY, 2, None)
+
+
+def month_bounds(year, month):
+    """Half-open [start, end) datetimes for a month (index-friendly)."""
+    start = datetime(year, month, 1)
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def _course_data(course):
+    if not course:
+        return None
+    return {"id": course.id, "code": course.code, "title": course.title}
+
+
+def _build_month(year, month):
+    start, end = month_bounds(year, month)
+
+    in_month = (Q(open_date__gte=start, open_date__lt=end) |
+                Q(close_date__gte=start, close_date__lt=end))
+
+    events_by_day = {}
+
+    def add_to_dict(day, event_data):
+        events_by_day.setdefault(day, []).append(event_data)
+
+    for item in AssessmentIndex.objects.filter(in_month).select_related("course"):
+        model_name = item.model_name
+        url = reverse("test_detail", kwargs={"test_type": item.model_name_lower, "test_id": item.object_id})
+
+        # 1. Handle "Opens" Date
+        if start <= item.open_date < end:
+            add_to_dict(item.open_date.day, {
+                "id": item.object_id,
+                "title": item.title,
+                "type": "opens",
+                "model": model_name,
+                "model_name_lower": item.model_name_lower,
+                "start_date": item.open_date,
+                "course": _course_data(item.course),
+                "url": url,
+                "is_active": True,
+            })
+
+        # 2. Handle "Closes" Date
+        if item.close_date and start <= item.close_date < end:
+            add_to_dict(item.close_date.day, {
+                "id": item.object_id,
+                "title": item.title,
+                "type": "closes",
+                "model": model_name,
+                "model_name_lower": item.model_name_lower,
+                "start_date": item.close_date,
+                "course": _course_data(item.course),
+                "url": url,
+                "is_active": True,
+            })
+
+    other_events = CalendarEvent.objects.filter(
+        date__gte=start.date(), date__lt=end.date()
+    ).select_related("related_course")
+    for event in other_events:
+        add_to_dict(event.date.day, {
+            "id": event.id,
+            "title": event.title,
+            "type": event.get_event_type_display(),
+            "model": "calendarevent",
+            "model_name_lower": "calendarevent",
+            # Promote to datetime so events of one day sort together
+            "start_date": datetime.combine(event.date, datetime.min.time()),
+            "course": _course_data(event.related_course),
+            "url": reverse("test_detail", kwargs={"test_type": "calendarevent", "test_id": event.id}),
+            "is_active": False,
+        })
+
+    cal = calendar.Calendar(firstweekday=calendar.MONDAY)
+    weeks = []
+    for week in cal.monthdayscalendar(year, month):
+        processed_week = []
+        for day_index, day_num in enumerate(week):
+            if day_num == 0:
+                processed_week.append({"day_num": 0, "events": [], "classes": "dayblank"})
+                continue
+
+            day_events = sorted(events_by_day.get(day_num, []), key=lambda x: x["start_date"])
+
+            day_classes = ["day", "text-sm-center", "text-md-left", "clickable"]
+            if day_events:
+                day_classes.append("hasevent")
+            # Weekend (Sat=5, Sun=6)
+            if day_index >= 5:
+                day_classes.append("weekend")
+
+            processed_week.append({
+                "day_num": day_num,
+                "events": day_events,
+                "classes": " ".join(day_classes),
+            })
+        weeks.append(processed_week)
+    return weeks
+
+
+def _neighbour(date_obj):
+    return {
+        "year": date_obj.year,
+        "month_num": date_obj.month,
+        "month_name": date_obj.strftime("%B"),
+    }
+
+
+def get_month_calendar(year, month, today=None):
+    """
+    Returns the calendar context for a month:
+    weeks (with events), month name and prev/next navigation data.
+    Only the week/event matrix is cached; the "today" marker is applied
+    per call so a cached month never goes stale at midnight.
+    """
+    key = f"calendar:month:v{get_calendar_version()}:{year}-{month:02d}"
+    weeks = cache.get(key)
+    if weeks is None:
+        weeks = _build_month(year, month)
+        cache.set(key, weeks, CALENDAR_CACHE_TIMEOUT)
+
+    if today and today.year == year and today.month == month:
+        weeks = [
+            [
+                dict(day, classes=day["classes"] + " today") if day["day_num"] == today.day else day
+                for day in week
+            ]
+            for week in weeks
+        ]
+
+    start, end = month_bounds(year, month)
+    return {
+        "weeks": weeks,
+        "month_name": start.strftime("%B"),
+        "year": year,
+        "month_num": month,
+        "prev_month": _neighbour(start - timedelta(days=1)),
+        "next_month": _neighbour(end),
+    }
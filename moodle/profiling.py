@@ -0,0 +1,147 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+
+from . import request_timing
+
+
+# --------------------------------------------------
+# 🔬 REQUEST PROFILER (opt-in, superusers only)
+# --------------------------------------------------
+# Add ?_profile=1 to any URL (or send "X-Profile: 1") while logged in as a
+# superuser, and ProfilerMiddleware runs that request under cProfile. It
+# saves two files to PROFILE_DIR:
+#   <id>.prof  pstats dump (python -m pstats, snakeviz)
+#   <id>.json  request info, the SQL log and the top functions as text
+# The admin Performance tab lists the newest PROFILE_KEEP of them.
+# Other requests only pay a substring check on the query string and a
+# header lookup.
+
+TRIGGER_PARAM = "_profile"
+TRIGGER_HEADER = "HTTP_X_PROFILE"
+PROFILE_ID_RE = re.compile(r"^[\w-]+$")
+KINDS = ("prof", "json")
+
+# cProfile allows one active profiler per thread (per process on 3.12+),
+# and overlapping async requests share the event loop thread
+_busy = threading.Lock()
+
+
+def requested(request):
+    return TRIGGER_HEADER in request.META or (
+        TRIGGER_PARAM in request.META.get("QUERY_STRING", "") and TRIGGER_PARAM in request.GET
+    )
+
+
+def allowed(request):
+    user = getattr(request, "user", None)
+    return bool(user and user.is_superuser)
+
+
+def begin():
+    """-> Profile, or None when another profile is running in this process."""
+    if not _busy.acquire(blocking=False):
+        return None
+    timer = request_timing.current()
+    if timer is not None:
+        timer.queries = []
+    return cProfile.Profile()
+
+
+def end():
+    _busy.release()
+
+
+def save(request, response, profiler, total_ms):
+    """Write <id>.prof and <id>.json; returns the id."""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    route = request_timing.route_name(request)
+    # Microseconds first, so ids sort by age
+    profile_id = "{}-{}-{}".format(
+        datetime.now().strftime("%Y%m%d-%H%M%S-%f"), re.sub(r"\W+", "-", route).strip("-"), uuid.uuid4().hex[:6]
+    )
+    base = os.path.join(settings.PROFILE_DIR, profile_id)
+    profiler.dump_stats(f"{base}.prof")
+
+    top = io.StringIO()
+    pstats.Stats(profiler, stream=top).sort_stats("cumulative").print_stats(40)
+    timer = request_timing.current()
+    info = {
+        "id": profile_id,
+        "created": time.time(),
+        "method": request.method,
+        "path": request.get_full_path(),
+        "route": route,
+        "status": response.status_code,
+        "user": request.user.get_username(),
+        "student": request.session.get("username", ""),
+        "total_ms": round(total_ms, 1),
+        "db_ms": round(timer.db_ms, 1) if timer else None,
+        "template_ms": round(timer.template_ms, 1) if timer else None,
+        "cache_ms": round(timer.cache_ms, 1) if timer else None,
+        "queries": timer.queries if timer else [],
+        "top": top.getvalue(),
+    }
+    with open(f"{base}.json", "w") as fh:
+        json.dump(info, fh, indent=1, default=str)
+
+    _prune(settings.PROFILE_KEEP)
+    return profile_id
+
+
+def _prune(keep):
+    for profile_id in sorted(_profile_ids(), reverse=True)[keep:]:
+        delete(profile_id)
+
+
+def _profile_ids():
+    try:
+        names = os.listdir(settings.PROFILE_DIR)
+    except FileNotFoundError:
+        return []
+    return [name[:-5] for name in names if name.endswith(".json")]
+
+
+def recent_profiles(limit=50):
+    """Newest first, without the SQL log, for the admin panel."""
+    rows = []
+    for profile_id in sorted(_profile_ids(), reverse=True)[:limit]:
+        try:
+            with open(os.path.join(settings.PROFILE_DIR, f"{profile_id}.json")) as fh:
+                info = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        info["created"] = datetime.fromtimestamp(info["created"])
+        info["query_count"] = len(info.pop("queries"))
+        info.pop("top")
+        rows.append(info)
+    return rows
+
+
+def profile_path(profile_id, kind):
+    """Path of an existing profile file, or None (ids come from URLs: never trust them)."""
+    if kind not in KINDS or not PROFILE_ID_RE.match(profile_id):
+        return None
+    path = os.path.join(settings.PROFILE_DIR, f"{profile_id}.{kind}")
+    return path if os.path.exists(path) else None
+
+
+def delete(profile_id):
+    for kind in KINDS:
+        path = profile_path(profile_id, kind)
+        if path:
+            os.remove(path)
+
+
+def clear_profiles():
+    for profile_id in _profile_ids():
+        delete(profile_id)
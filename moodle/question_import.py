@@ -0,0 +1,79 @@
+from .models import Question, Option
+
+
+# --------------------------------------------------
+# 📥 BULK QUESTION IMPORT (pasted text format)
+# --------------------------------------------------
+# Shared by the Django admin "add questions" page and the import_questions job.
+
+
+def create_question_with_options(parent_type, parent_id, qtext, options, correct_label=None, allow_custom=False):
+    q = Question.objects.create(
+        parent_type=parent_type,
+        parent_id=parent_id,
+        question_type="MCQ" if options else "TEXT",
+        marks=1,
+        allow_custom_answer=allow_custom,
+        text=qtext.strip(),
+    )
+    if options:
+        for label, text in options:
+            Option.objects.create(
+                question=q,
+                option_label=label,
+                text=text.strip(),
+            )
+            if correct_label and label == correct_label:
+                q.correct_option = label  # correct_option stores the A-D label
+                q.save(update_fields=["correct_option"])
+    else:
+        q.correct_answer_text = ""  # optional
+        q.save()
+    return q
+
+
+def parse_bulk_payload(payload):
+    """
+    Parse the textarea content into list of entries:
+    Each entry becomes: { 'qtext': str, 'options': [(label, text),...], 'correct': 'B' or None, 'allow_custom': bool }
+    """
+    entries = []
+    block = []
+    lines = [ln.rstrip() for ln in payload.splitlines()]
+    lines.append("")  # sentinel to flush
+
+    def flush(block_lines):
+        if not block_lines:
+            return
+        qtext = ""
+        options = []
+        correct = None
+        allow_custom = False
+        # build
+        for ln in block_lines:
+            if ln.startswith("Q:"):
+                qtext = ln[2:].strip(": ").strip()
+            elif ln.upper().startswith("TEXT:"):
+                qtext = qtext or "(Short answer)"
+                allow_custom = True
+            elif len(ln) >= 3 and ln[1] == ")":  # like "A) something"
+                label = ln[0].upper()
+                text = ln[2:].strip()
+                if text.endswith("*"):
+                    text = text[:-1].rstrip()
+                    correct = label
+                options.append((label, text))
+        entries.append({
+            "qtext": qtext,
+            "options": options,
+            "correct": correct,
+            "allow_custom": allow_custom and not options,
+        })
+
+    for ln in lines:
+        if ln.strip() == "":
+            flush(block)
+            block = []
+        else:
+            block.append(ln)
+    return entries
@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+from .models import Question
+
+
+# --------------------------------------------------
+# 🧭 QUESTION NAVIGATION (attempt page)
+# --------------------------------------------------
+# The nav strip only needs ids + answer-key flags, so we fetch that
+# lightweight summary once per assessment (cached, dropped by signals.py
+# on question save/delete) and load just the current question by position.
+# Single questions are cached too; warm_assessments fills them in bulk.
+
+NAV_CACHE_TIMEOUT = 60 * 60
+
+
+def _nav_key(parent_type, parent_id):
+    return f"question_nav:{parent_type.upper()}:{parent_id}"
+
+
+def get_question_nav(parent_type, parent_id):
+    """
+    Ordered list of {"id", "position", "correct_option", "has_answer_key"}
+    for every question of one assessment.
+    """
+    key = _nav_key(parent_type, parent_id)
+    nav = cache.get(key)
+    if nav is None:
+        rows = (
+            Question.objects.filter(parent_type=parent_type.upper(), parent_id=parent_id)
+            .order_by("position", "id")
+            .values_list("id", "position", "correct_option", "correct_answer_text")
+        )
+        nav = [
+            {
+                "id": qid,
+                "position": position,
+                "correct_option": correct_option,
+                "has_answer_key": bool(correct_option or correct_answer_text),
+            }
+            for qid, position, correct_option, correct_answer_text in rows
+        ]
+        cache.set(key, nav, NAV_CACHE_TIMEOUT)
+    return nav
+
+
+def invalidate_question_nav(parent_type, parent_id):
+    cache.delete(_nav_key(parent_type or "", parent_id))
+
+
+def nav_with_state(nav, user_answers):
+    """Adds answered/flagged from the session answers to each nav entry."""
+    items = []
+    for entry in nav:
+        saved = user_answers.get(str(entry["id"]), {})
+        items.append(dict(
+            entry,
+            answered=bool(saved.get("answer")),
+            flagged=saved.get("flagged", False),
+        ))
+    return items
+
+
+def _question_key(question_id):
+    return f"question:{question_id}"
+
+
+def _question_queryset():
+    questions = Question.objects.all()
+    if not settings.QUESTION_INLINE_OPTIONS:
+        questions = questions.prefetch_related("options")
+    return questions
+
+
+def warm_question_bundle(parent_type, parent_id):
+    """Caches every question of an assessment (as get_question_at returns it); returns the count."""
+    questions = _question_queryset().filter(parent_type=parent_type.upper(), parent_id=parent_id)
+    bundle = {_question_key(q.id): q for q in questions}
+    cache.set_many(bundle, NAV_CACHE_TIMEOUT)
+    return len(bundle)
+
+
+def invalidate_question(question_id):
+    cache.delete(_question_key(question_id))
+
+
+def get_question_at(parent_type, parent_id, nav_entry):
+    """
+    Fetch the one question at a nav position (see Question.get_options).
+    Keyed by the entry's id: bulk-created rows may share a position.
+    Served from the question bundle when warm_assessments has pre-built it.
+    """
+    key = _question_key(nav_entry["id"])
+    question = cache.get(key)
+    if question is None:
+        question = get_object_or_404(_question_queryset(), id=nav_entry["id"])
+        cache.set(key, question, NAV_CACHE_TIMEOUT)
+
+    if question.parent_type != parent_type.upper() or str(question.parent_id) != str(parent_id):
+        raise Http404("Question does not belong to this test.")
+    return question
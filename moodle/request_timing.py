@@ -0,0 +1,347 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.memcached import PyMemcacheCache
+from django.core.cache.backends.redis import RedisCache
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.utils.functional import cached_property
+
+from . import metrics, slow_queries
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------
+# ⏱️ REQUEST TIMING (Server-Timing + per-route histograms)
+# --------------------------------------------------
+# RequestTimingMiddleware starts a RequestTimer for each request. DB
+# queries (execute wrapper on every connection), template renders
+# (TimedDjangoTemplates) and cache calls (the Timed*Cache backends) add to
+# it through a context variable, so async views and sync_to_async threads
+# are counted too. The middleware answers with a Server-Timing header and
+# adds the request to an in-process histogram for its route. Every
+# REQUEST_TIMING_FLUSH_SECONDS the histograms are merged into the
+# "metrics" cache, where the admin Performance panel reads all workers.
+
+TIMING_KEY = "request_timing"
+TIMING_LOCK_KEY = "request_timing:lock"
+# Upper bounds in ms; the last bucket is everything slower
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_current = ContextVar("request_timer", default=None)
+
+
+class RequestTimer:
+    __slots__ = ("request", "started", "db_ms", "db_count", "template_ms", "cache_ms", "cache_count", "queries",
+                 "_template_depth")
+
+    def __init__(self, request=None):
+        self.request = request
+        self.started = time.perf_counter()
+        self.db_ms = self.template_ms = self.cache_ms = 0.0
+        self.db_count = self.cache_count = 0
+        # A list only while the profiler (profiling.py) wants the SQL log
+        self.queries = None
+        self._template_depth = 0
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def header(self, total_ms):
+        # Template time includes queries that querysets run while rendering
+        return (
+            f'total;dur={total_ms:.1f}, '
+            f'db;dur={self.db_ms:.1f};desc="{self.db_count} queries", '
+            f'tpl;dur={self.template_ms:.1f}, '
+            f'cache;dur={self.cache_ms:.1f};desc="{self.cache_count} calls"'
+        )
+
+
+def start(request=None):
+    timer = RequestTimer(request)
+    return timer, _current.set(timer)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+# ----- DB: one execute wrapper per connection, installed on connect
+
+def _time_query(execute, sql, params, many, context):
+    # Queries outside requests (jobs, commands) are timed too, for the slow-query log
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        timer = _current.get()
+        if timer is not None:
+            timer.db_ms += elapsed_ms
+            timer.db_count += 1
+            if timer.queries is not None:
+                timer.queries.append({"sql": sql, "params": repr(params), "many": many, "ms": round(elapsed_ms, 3)})
+        if elapsed_ms >= settings.SLOW_QUERY_MS:
+            route = route_name(timer.request) if timer is not None and timer.request is not None else None
+            slow_queries.record(sql, params, many, elapsed_ms, context["connection"].alias, route)
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """connection_created handler (apps.py)."""
+    if _time_query not in connection.execute_wrappers:
+        # First, so execute_wrapper() blocks that pop() on exit never remove it
+        connection.execute_wrappers.insert(0, _time_query)
+
+
+# ----- Templates: settings.TEMPLATES uses this backend
+
+class _TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timer = _current.get()
+        if timer is None:
+            return super().render(context, request)
+        # Only the outermost render: render_to_string() inside a tag is part of it
+        timer._template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timer._template_depth -= 1
+            if not timer._template_depth:
+                timer.template_ms += (time.perf_counter() - started) * 1000
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return _TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return _TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+# ----- Cache: settings._cache() picks these instead of the stock backends
+
+@contextmanager
+def _cache_call():
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.cache_ms += (time.perf_counter() - started) * 1000
+        timer.cache_count += 1
+
+
+_MISSING = object()
+
+
+class TimedCacheMixin:
+    # The async variants of BaseCache call these through sync_to_async.
+    # Reads also feed the hit/miss counters in metrics.py.
+
+    @cached_property
+    def metrics_alias(self):
+        # KEY_PREFIX is "iitpcep:<namespace>" (settings._cache)
+        return self.key_prefix.rsplit(":", 1)[-1] or "default"
+
+    def get(self, key, default=None, version=None):
+        with _cache_call():
+            value = super().get(key, _MISSING, version)
+        hit = value is not _MISSING
+        metrics.record_cache(self.metrics_alias, int(hit), int(not hit))
+        return value if hit else default
+
+    def set(self, *args, **kwargs):
+        with _cache_call():
+            return super().set(*args, **kwargs)
+
+    def add(self, *args, **kwargs):
+        with _cache_call():
+            return super().add(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with _cache_call():
+            return super().delete(*args, **kwargs)
+
+    def touch(self, *args, **kwargs):
+        with _cache_call():
+            return super().touch(*args, **kwargs)
+
+    def incr(self, *args, **kwargs):
+        with _cache_call():
+            return super().incr(*args, **kwargs)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        with _cache_call():
+            found = super().get_many(keys, version)
+        metrics.record_cache(self.metrics_alias, len(found), len(keys) - len(found))
+        return found
+
+    def set_many(self, *args, **kwargs):
+        with _cache_call():
+            return super().set_many(*args, **kwargs)
+
+    def delete_many(self, *args, **kwargs):
+        with _cache_call():
+            return super().delete_many(*args, **kwargs)
+
+    def has_key(self, *args, **kwargs):
+        with _cache_call():
+            return super().has_key(*args, **kwargs)
+
+
+class TimedRedisCache(TimedCacheMixin, RedisCache):
+    pass
+
+
+class TimedPyMemcacheCache(TimedCacheMixin, PyMemcacheCache):
+    pass
+
+
+class TimedFileBasedCache(TimedCacheMixin, FileBasedCache):
+    pass
+
+
+class TimedLocMemCache(TimedCacheMixin, LocMemCache):
+    pass
+
+
+# ----- Per-route histograms
+
+def _empty_stats():
+    return {
+        "count": 0, "sum_ms": 0.0, "max_ms": 0.0, "errors": 0,
+        "db_ms": 0.0, "db_count": 0, "template_ms": 0.0, "cache_ms": 0.0,
+        "buckets": [0] * (len(BUCKETS_MS) + 1),
+    }
+
+
+def _merge(into, stats):
+    for field in ("count", "sum_ms", "errors", "db_ms", "db_count", "template_ms", "cache_ms"):
+        into[field] += stats[field]
+    into["max_ms"] = max(into["max_ms"], stats["max_ms"])
+    into["buckets"] = [a + b for a, b in zip(into["buckets"], stats["buckets"])]
+
+
+class RouteHistograms:
+    """This process's histograms since the last flush."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._last_flush = time.monotonic()
+
+    def record(self, route, timer, total_ms, status):
+        bucket = next((i for i, bound in enumerate(BUCKETS_MS) if total_ms <= bound), len(BUCKETS_MS))
+        with self._lock:
+            stats = self._routes.setdefault(route, _empty_stats())
+            stats["count"] += 1
+            stats["sum_ms"] += total_ms
+            stats["max_ms"] = max(stats["max_ms"], total_ms)
+            stats["errors"] += status >= 500
+            stats["db_ms"] += timer.db_ms
+            stats["db_count"] += timer.db_count
+            stats["template_ms"] += timer.template_ms
+            stats["cache_ms"] += timer.cache_ms
+            stats["buckets"][bucket] += 1
+
+    def flush_due(self):
+        return time.monotonic() - self._last_flush >= settings.REQUEST_TIMING_FLUSH_SECONDS
+
+    def flush(self):
+        """Merge into the shared cache entry; kept for the next flush if another worker holds the lock."""
+        with self._lock:
+            routes, self._routes = self._routes, {}
+            self._last_flush = time.monotonic()
+        if not routes:
+            return
+
+        cache = caches[settings.REQUEST_TIMING_CACHE]
+        if not cache.add(TIMING_LOCK_KEY, os.getpid(), 10):
+            self._restore(routes)
+            return
+        try:
+            shared = cache.get(TIMING_KEY) or {"since": time.time(), "routes": {}}
+            for route, stats in routes.items():
+                _merge(shared["routes"].setdefault(route, _empty_stats()), stats)
+            shared["updated"] = time.time()
+            cache.set(TIMING_KEY, shared, None)
+        finally:
+            cache.delete(TIMING_LOCK_KEY)
+
+        slowest = sorted(routes.items(), key=lambda item: -item[1]["sum_ms"] / item[1]["count"])[:5]
+        logger.info("request timing flush (pid %s): %s", os.getpid(), ", ".join(
+            f"{route} n={s['count']} avg={s['sum_ms'] / s['count']:.0f}ms max={s['max_ms']:.0f}ms"
+            for route, s in slowest
+        ))
+
+    def _restore(self, routes):
+        with self._lock:
+            for route, stats in routes.items():
+                _merge(self._routes.setdefault(route, _empty_stats()), stats)
+
+
+histograms = RouteHistograms()
+
+
+def route_name(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else "<unresolved>"
+
+
+def bucket_percentile(stats, pct):
+    """Upper bound (ms) of the bucket holding the pct-th request; max_ms for the overflow bucket."""
+    target = stats["count"] * pct / 100
+    seen = 0
+    for i, n in enumerate(stats["buckets"]):
+        seen += n
+        if n and seen >= target:
+            return min(BUCKETS_MS[i], stats["max_ms"]) if i < len(BUCKETS_MS) else stats["max_ms"]
+    return stats["max_ms"]
+
+
+def slowest_routes(limit=20):
+    """Rows for the admin Performance panel, slowest p95 first, plus when collection started."""
+    shared = caches[settings.REQUEST_TIMING_CACHE].get(TIMING_KEY) or {"routes": {}}
+    rows = []
+    for route, stats in shared["routes"].items():
+        n = stats["count"] or 1
+        rows.append({
+            "route": route,
+            "count": stats["count"],
+            "errors": stats["errors"],
+            "avg_ms": stats["sum_ms"] / n,
+            "p50_ms": bucket_percentile(stats, 50),
+            "p95_ms": bucket_percentile(stats, 95),
+            "max_ms": stats["max_ms"],
+            "db_ms": stats["db_ms"] / n,
+            "db_count": stats["db_count"] / n,
+            "template_ms": stats["template_ms"] / n,
+            "cache_ms": stats["cache_ms"] / n,
+        })
+    rows.sort(key=lambda row: (-row["p95_ms"], -row["avg_ms"]))
+    return rows[:limit], shared.get("since")
+
+
+def reset_timings():
+    caches[settings.REQUEST_TIMING_CACHE].delete(TIMING_KEY)
@@ -0,0 +1,101 @@
+import logging
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------
+# ⏰ IN-PROCESS SCHEDULER
+# --------------------------------------------------
+# render.yaml runs only the web service (no cron, no worker), so periodic
+# tasks run on a daemon thread in each web process, started by its first
+# request (RequestTimingMiddleware), i.e. after gunicorn's fork. A task
+# takes a cache lock for its interval before running, so one process runs
+# it per interval; an occasional double run is harmless, every task is a
+# set of conditional UPDATEs. SCHEDULER=False where cron or the commands'
+# --loop mode run them instead; an interval setting of 0 turns one task off.
+
+
+def _apply_live_schedule():
+    from .live_schedule import apply_live_schedule
+    apply_live_schedule()
+
+
+def _expire_attempts():
+    from .attempts import expire_attempts
+    expire_attempts()
+
+
+def _run_jobs():
+    from .jobs import drain
+    try:
+        drain(f"{socket.gethostname()}:{os.getpid()}:scheduler")
+    except Exception:
+        logger.exception("scheduler: run_jobs failed")
+    finally:
+        connections.close_all()
+
+
+def _drain_jobs():
+    # A job can take minutes (imports, deletions): drain on a thread of its
+    # own so the other tasks stay on time. Claims are atomic (jobs.py), so
+    # drains in several processes never run the same job.
+    global _jobs_thread
+    if _jobs_thread is None or not _jobs_thread.is_alive():
+        _jobs_thread = threading.Thread(target=_run_jobs, name="scheduler-jobs", daemon=True)
+        _jobs_thread.start()
+
+
+# (name, interval setting, function)
+TASKS = (
+    ("apply_live_schedule", "LIVE_SCHEDULE_INTERVAL_SECONDS", _apply_live_schedule),
+    ("expire_attempts", "EXPIRE_ATTEMPTS_INTERVAL_SECONDS", _expire_attempts),
+    ("run_jobs", "JOB_DRAIN_INTERVAL_SECONDS", _drain_jobs),
+)
+
+_jobs_thread = None
+_thread = None
+_thread_pid = None
+_thread_lock = threading.Lock()
+
+
+def run_due():
+    """Run every task whose interval lock is free; returns the names run."""
+    ran = []
+    for name, interval_setting, fn in TASKS:
+        interval = getattr(settings, interval_setting)
+        if not interval or not caches["default"].add(f"scheduler:{name}", os.getpid(), interval):
+            continue
+        try:
+            fn()
+            ran.append(name)
+        except Exception:
+            logger.exception("scheduler: %s failed", name)
+    return ran
+
+
+def _loop():
+    tick = min(getattr(settings, interval_setting) or 60 for _, interval_setting, _ in TASKS)
+    while True:
+        run_due()
+        # Don't hold a connection (or a pool slot) while sleeping
+        connections.close_all()
+        time.sleep(tick)
+
+
+def ensure_started():
+    global _thread, _thread_pid
+    if not settings.SCHEDULER or (_thread_pid == os.getpid() and _thread.is_alive()):
+        return
+    with _thread_lock:
+        if _thread_pid != os.getpid() or not _thread.is_alive():
+            _thread = threading.Thread(target=_loop, name="scheduler", daemon=True)
+            _thread_pid = os.getpid()
+            _thread.start()
@@ -0,0 +1,90 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import SystemConfig, Course, Assignment, Quiz, Exam, Question, Option, CalendarEvent, AssessmentIndex
+from .month_calendar import bump_calendar_version
+from .availability import invalidate_live_set
+from .assessment_index import sync_assessment, remove_assessment, refresh_question_count
+from .question_nav import invalidate_question_nav, invalidate_question
+from .system_config import invalidate_system_config
+
+
+# --------------------------------------------------
+# 🗓️ CALENDAR CACHE INVALIDATION
+# --------------------------------------------------
+# Assessments reach the calendar through AssessmentIndex, so invalidate
+# after the index row is written rather than on the source model save.
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=AssessmentIndex)
+@receiver(post_delete, sender=AssessmentIndex)
+@receiver(post_save, sender=CalendarEvent)
+@receiver(post_delete, sender=CalendarEvent)
+def invalidate_calendar(sender, **kwargs):
+    bump_calendar_version()
+
+
+# --------------------------------------------------
+# 🟢 AVAILABILITY INDEX INVALIDATION
+# --------------------------------------------------
+@receiver(post_save, sender=Assignment)
+@receiver(post_delete, sender=Assignment)
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+@receiver(post_save, sender=Exam)
+@receiver(post_delete, sender=Exam)
+def invalidate_availability(sender, **kwargs):
+    invalidate_live_set()
+
+
+# --------------------------------------------------
+# 🗂️ ASSESSMENT INDEX SYNC
+# --------------------------------------------------
+@receiver(post_save, sender=Assignment)
+@receiver(post_save, sender=Quiz)
+@receiver(post_save, sender=Exam)
+def index_assessment(sender, instance, **kwargs):
+    sync_assessment(instance)
+
+
+@receiver(post_delete, sender=Assignment)
+@receiver(post_delete, sender=Quiz)
+@receiver(post_delete, sender=Exam)
+def unindex_assessment(sender, instance, **kwargs):
+    remove_assessment(instance)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def update_question_count(sender, instance, **kwargs):
+    parents = {(instance.parent_type, instance.parent_id)}
+    # Moved to another assessment: the one it left changes too
+    loaded = getattr(instance, "_loaded_parent", (None, None))
+    if loaded[0] is not None:
+        parents.add(loaded)
+    for parent_type, parent_id in parents:
+        refresh_question_count(parent_type, parent_id)
+        invalidate_question_nav(parent_type, parent_id)
+    instance._loaded_parent = (instance.parent_type, instance.parent_id)
+    invalidate_question(instance.pk)
+
+
+# --------------------------------------------------
+# 🧩 INLINE OPTIONS (Question.options_json)
+# --------------------------------------------------
+@receiver(post_save, sender=Option)
+@receiver(post_delete, sender=Option)
+def mirror_options_inline(sender, instance, **kwargs):
+    # .update() so we don't re-enter Question post_save handlers
+    options = [opt.to_inline() for opt in Option.objects.filter(question_id=instance.question_id)]
+    Question.objects.filter(pk=instance.question_id).update(options_json=options)
+    invalidate_question(instance.question_id)
+
+
+# --------------------------------------------------
+# ⚙️ SYSTEM CONFIG CACHE INVALIDATION
+# --------------------------------------------------
+@receiver(post_save, sender=SystemConfig)
+@receiver(post_delete, sender=SystemConfig)
+def drop_system_config(sender, **kwargs):
+    invalidate_system_config()
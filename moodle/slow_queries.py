@@ -0,0 +1,188 @@
+import hashlib
+import logging
+import os
+import re
+import sys
+import time
+from collections import deque
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------
+# 🐢 SLOW-QUERY LOG
+# --------------------------------------------------
+# The request-timing execute wrapper (request_timing._time_query) hands
+# every query slower than SLOW_QUERY_MS to record(). Each entry has the
+# normalized SQL and its fingerprint, the call site (first frame in this
+# project's code), the route and a hash of the parameters; the log never
+# holds parameter values. Entries wait in a per-process deque until
+# flush() (with the route histograms, or when the admin page is opened).
+# flush() appends them to a ring of the newest SLOW_QUERY_BUFFER entries
+# in the "metrics" cache. If SLOW_QUERY_EXPLAIN is on, it also keeps one
+# EXPLAIN candidate per new fingerprint (raw SQL and JSON-safe params,
+# capped) under a separate key of that cache. flush(explain=True), from
+# the admin page and the job runner, plans them in whichever worker runs
+# it and drops them. The per-request flush never runs an EXPLAIN.
+
+SLOW_KEY = "slow_queries"
+SLOW_LOCK_KEY = "slow_queries:lock"
+CANDIDATES_KEY = "slow_queries:explain"
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_IN_LIST_RE = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)")
+_SKIP_DIRS = (os.sep + "site-packages" + os.sep, os.sep + "django" + os.sep)
+
+_pending = deque(maxlen=1000)
+# EXPLAIN candidates waiting in the shared cache, and their size limits
+CANDIDATES_MAX = 50
+CANDIDATE_SQL_MAX = 20000
+CANDIDATE_PARAMS_MAX = 500
+
+
+def normalize(sql):
+    """Placeholders and literals folded to ?, IN lists to (...): one shape per statement."""
+    return _LITERAL_RE.sub("?", _IN_LIST_RE.sub("(...)", sql)).replace("%s", "?")
+
+
+def fingerprint(normalized):
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+
+def _call_site():
+    base = str(settings.BASE_DIR) + os.sep
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(base) and not filename.endswith(("request_timing.py", "slow_queries.py")) \
+                and not any(part in filename for part in _SKIP_DIRS):
+            return f"{os.path.relpath(filename, base)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "-"
+
+
+def record(sql, params, many, elapsed_ms, alias, route):
+    """Called from the execute wrapper, on the query's thread: no I/O here."""
+    if sql.lstrip()[:7].upper() == "EXPLAIN":
+        return
+    normalized = normalize(sql)
+    explain = settings.SLOW_QUERY_EXPLAIN and not many and normalized.lstrip().upper().startswith(("SELECT", "WITH"))
+    _pending.append({
+        "fingerprint": fingerprint(normalized),
+        "sql": normalized,
+        "ms": round(elapsed_ms, 2),
+        "at": time.time(),
+        "site": _call_site(),
+        "route": route or "-",
+        "params": "executemany" if many else hashlib.sha1(repr(params).encode()).hexdigest()[:8],
+        "alias": alias,
+        # Only kept in this process, for EXPLAIN; dropped before the entry is shared
+        "_explain": (sql, params) if explain else None,
+    })
+
+
+def _explain(alias, sql, params):
+    conn = connections[alias]
+    # Savepoint: a failed EXPLAIN must not break the caller's transaction
+    # (Postgres). SQLite doesn't need one, and the tuned backend would open
+    # it with BEGIN IMMEDIATE, taking the write lock for a read.
+    block = nullcontext() if conn.vendor == "sqlite" else transaction.atomic(using=alias)
+    try:
+        with block, conn.cursor() as cursor:
+            cursor.execute(f"{conn.ops.explain_query_prefix()} {sql}", params)
+            # SQLite: (id, parent, notused, detail); Postgres: one text column
+            return "\n".join(str(row[-1]) for row in cursor.fetchall())
+    except DatabaseError as exc:
+        return f"EXPLAIN failed: {exc}"
+
+
+def _candidate(alias, sql, params):
+    """{"alias", "sql", "params"} any worker can EXPLAIN, or None if too big / not portable."""
+    if len(sql) > CANDIDATE_SQL_MAX or not isinstance(params, (list, tuple)) or len(params) > CANDIDATE_PARAMS_MAX:
+        return None
+    portable = []
+    for value in params:
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return None
+        # Dates, Decimals, UUIDs: their text form casts back on both backends
+        portable.append(value if value is None or isinstance(value, (bool, int, float, str)) else str(value))
+    return {"alias": alias, "sql": sql, "params": portable}
+
+
+def flush(explain=False):
+    """
+    Move this process's entries into the shared ring; kept for the next
+    flush if another worker holds the lock. explain=True also plans every
+    shared EXPLAIN candidate, whichever worker saw the query.
+    """
+    if not _pending and not explain:
+        return
+    entries = []
+    while _pending:
+        entries.append(_pending.popleft())
+
+    cache = caches[settings.REQUEST_TIMING_CACHE]
+    if not cache.add(SLOW_LOCK_KEY, os.getpid(), 10):
+        _pending.extendleft(reversed(entries))
+        return
+    try:
+        shared = cache.get(SLOW_KEY) or {"since": time.time(), "entries": [], "plans": {}}
+        candidates = cache.get(CANDIDATES_KEY) or {}
+        for entry in entries:
+            raw = entry.pop("_explain", None)
+            fp = entry["fingerprint"]
+            if raw and fp not in shared["plans"] and fp not in candidates and len(candidates) < CANDIDATES_MAX:
+                candidate = _candidate(entry["alias"], *raw)
+                if candidate:
+                    candidates[fp] = candidate
+        if explain:
+            for fp, candidate in candidates.items():
+                if fp not in shared["plans"]:
+                    shared["plans"][fp] = _explain(candidate["alias"], candidate["sql"], candidate["params"])
+            candidates = {}
+        shared["entries"] = (shared["entries"] + entries)[-settings.SLOW_QUERY_BUFFER:]
+        live = {entry["fingerprint"] for entry in shared["entries"]}
+        shared["plans"] = {fp: plan for fp, plan in shared["plans"].items() if fp in live}
+        cache.set(CANDIDATES_KEY, {fp: c for fp, c in candidates.items() if fp in live}, None)
+        cache.set(SLOW_KEY, shared, None)
+    finally:
+        cache.delete(SLOW_LOCK_KEY)
+
+    logger.info("slow queries flush (pid %s): %d over %sms", os.getpid(), len(entries), settings.SLOW_QUERY_MS)
+
+
+def slow_query_groups(limit=30):
+    """Entries grouped by fingerprint, most total time first, plus when collection started."""
+    flush(explain=True)
+    shared = caches[settings.REQUEST_TIMING_CACHE].get(SLOW_KEY) or {"entries": [], "plans": {}}
+    groups = {}
+    for entry in shared["entries"]:
+        group = groups.setdefault(entry["fingerprint"], {
+            "fingerprint": entry["fingerprint"], "sql": entry["sql"], "count": 0,
+            "total_ms": 0.0, "max_ms": 0.0, "sites": [], "routes": [], "params": set(),
+        })
+        group["count"] += 1
+        group["total_ms"] += entry["ms"]
+        group["max_ms"] = max(group["max_ms"], entry["ms"])
+        group["last_seen"] = entry["at"]
+        for field, value in (("sites", entry["site"]), ("routes", entry["route"])):
+            if value not in group[field] and len(group[field]) < 3:
+                group[field].append(value)
+        group["params"].add(entry["params"])
+
+    rows = sorted(groups.values(), key=lambda group: -group["total_ms"])[:limit]
+    for row in rows:
+        row["avg_ms"] = row["total_ms"] / row["count"]
+        row["distinct_params"] = len(row.pop("params"))
+        row["plan"] = shared["plans"].get(row["fingerprint"], "")
+    return rows, shared.get("since")
+
+
+def reset_slow_queries():
+    _pending.clear()
+    caches[settings.REQUEST_TIMING_CACHE].delete_many([SLOW_KEY, CANDIDATES_KEY])
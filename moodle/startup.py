@@ -0,0 +1,62 @@
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.template import engines
+from django.urls import get_resolver
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------
+# 🚀 STARTUP (cold starts)
+# --------------------------------------------------
+# Without this, the first request after a boot pays for importing every
+# view module (URLconf), compiling the templates and loading translations.
+# wsgi.py / asgi.py call warm_up() at import instead. With gunicorn's
+# preload_app (gunicorn.conf.py) that happens once in the master and the
+# forked workers share the result. No DB access here: connections must
+# not cross the fork.
+
+
+def _project_templates():
+    base = str(settings.BASE_DIR)
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            directory = str(directory)
+            # Django's own admin templates are only needed by /admin
+            if not directory.startswith(base) or os.sep + "site-packages" + os.sep in directory:
+                continue
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    if name.endswith(".html"):
+                        yield engine, os.path.relpath(os.path.join(root, name), directory)
+
+
+def warm_up():
+    """Import the URLconf, compile the project's templates, load translations; returns the template count."""
+    if not settings.WARM_UP_ON_BOOT:
+        return 0
+    started = time.perf_counter()
+
+    resolver = get_resolver()
+    resolver.url_patterns  # imports every view module
+    resolver.reverse_dict  # builds the reverse() lookup tables
+
+    compiled = 0
+    for engine, name in _project_templates():
+        try:
+            # The cached loader keeps the compiled template
+            engine.get_template(name)
+            compiled += 1
+        except Exception as exc:  # a broken template should fail its page, not the boot
+            logger.warning("warm-up: %s: %s", name, exc)
+
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext("Home")
+
+    logger.info("warm-up (pid %s): %d templates in %.0fms", os.getpid(), compiled,
+                (time.perf_counter() - started) * 1000)
+    return compiled
@@ -0,0 +1,161 @@
+import io
+import random
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .assessment_index import kind_of
+from .models import (
+    UserTable, Course, Assignment, Quiz, Exam, AssessmentIndex, Question, Option, CalendarEvent
+)
+
+
+# --------------------------------------------------
+# 🧪 SYNTHETIC DATASET (seed_data / bench_views)
+# --------------------------------------------------
+# Seeds realistic volumes with bulk_create. bulk_create skips signals, so
+# this module fills AssessmentIndex, Question.options_json and question
+# counts itself, then drops the content caches. Every synthetic row carries
+# a marker (username/calendar title prefix, course description), so
+# clear_synthetic() removes exactly what was seeded and nothing else.
+
+SYNTHETIC = "syn"
+SYNTHETIC_COURSE_DESCRIPTION = "Seeded by seed_data."
+# Course URLs need numeric codes; start far above hand-made ones
+SYNTHETIC_CODE_BASE = 70000000
+
+# assessments = per type per course; questions = per assessment;
+# media = fraction of questions that carry an image
+SCALES = {
+    "small": dict(users=100, courses=5, assessments=4, questions=20, options=4, events=50, media=0.0),
+    "medium": dict(users=2000, courses=20, assessments=10, questions=40, options=4, events=500, media=0.1),
+    "large": dict(users=20000, courses=50, assessments=20, questions=80, options=4, events=2000, media=0.1),
+}
+
+ASSESSMENT_MODELS = (Assignment, Quiz, Exam)
+BATCH_SIZE = 500
+
+
+def _image_name(label, size=(1600, 900)):
+    """One shared placeholder image per label, like re-used scans in a question bank."""
+    from PIL import Image
+
+    name = f"questions/{SYNTHETIC}-{label}.png"
+    if not default_storage.exists(name):
+        buffer = io.BytesIO()
+        Image.new("RGB", size, (random.randrange(256), 120, 200)).save(buffer, "PNG")
+        name = default_storage.save(name, ContentFile(buffer.getvalue()))
+    return name
+
+
+def seed(users, courses, assessments, questions, options=4, events=0, media=0.0, now=None, rng=None):
+    """Insert one synthetic dataset; returns {model name: rows created}."""
+    now = now or timezone.now()
+    rng = rng or random.Random(42)
+    labels = "ABCD"[:max(0, min(options, 4))]
+    created = {}
+
+    UserTable.objects.bulk_create([
+        UserTable(username=f"{SYNTHETIC}-student-{i}", last_active=now - timedelta(minutes=rng.randrange(60 * 24 * 7)))
+        for i in range(users)
+    ], batch_size=BATCH_SIZE)
+    created["UserTable"] = users
+
+    first_code = SYNTHETIC_CODE_BASE + Course.objects.filter(description=SYNTHETIC_COURSE_DESCRIPTION).count()
+    course_rows = Course.objects.bulk_create([
+        Course(title=f"Synthetic course {i + 1}", code=str(first_code + i + 1),
+               description=SYNTHETIC_COURSE_DESCRIPTION)
+        for i in range(courses)
+    ], batch_size=BATCH_SIZE)
+    created["Course"] = len(course_rows)
+
+    # Every third assessment is live now, the rest are spread over ±60 days
+    parents = []
+    for model in ASSESSMENT_MODELS:
+        rows = []
+        for course in course_rows:
+            for i in range(assessments):
+                offset = rng.randrange(-60, 60)
+                live = i % 3 == 0
+                rows.append(model(
+                    course=course,
+                    title=f"{model.__name__} {i + 1} ({course.code})",
+                    description="Synthetic assessment.",
+                    open_date=now - timedelta(days=1) if live else now + timedelta(days=offset),
+                    close_date=now + timedelta(days=rng.randrange(1, 30)) if live else now + timedelta(days=offset + 7),
+                    duration_minutes=60,
+                    is_live=live,
+                ))
+        rows = model.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        parents += [(kind_of(model), obj) for obj in rows]
+        created[model.__name__] = len(rows)
+
+    image = _image_name("question") if media else None
+    question_rows = Question.objects.bulk_create([
+        Question(
+            parent_type=kind,
+            parent_id=obj.pk,
+            position=i + 1,
+            text=f"Synthetic question {i + 1} of {obj.title}: " + "lorem ipsum " * rng.randrange(3, 30),
+            correct_option=rng.choice(labels) if labels else None,
+            image=image if image and rng.random() < media else None,
+        )
+        for kind, obj in parents for i in range(questions)
+    ], batch_size=BATCH_SIZE)
+    created["Question"] = len(question_rows)
+
+    option_rows = Option.objects.bulk_create([
+        Option(question=q, option_label=label, text=f"Option {label}: " + "dolor sit " * rng.randrange(1, 6))
+        for q in question_rows for label in labels
+    ], batch_size=BATCH_SIZE)
+    created["Option"] = len(option_rows)
+
+    # Signals would have mirrored the options inline; do it in bulk instead
+    inline = {}
+    for opt in option_rows:
+        inline.setdefault(opt.question_id, []).append(opt.to_inline())
+    for q in question_rows:
+        q.options_json = inline.get(q.pk, [])
+    Question.objects.bulk_update(question_rows, ["options_json"], batch_size=BATCH_SIZE)
+
+    AssessmentIndex.objects.bulk_create([
+        AssessmentIndex(
+            kind=kind, object_id=obj.pk, course_id=obj.course_id, title=obj.title,
+            description=obj.description, open_date=obj.open_date, close_date=obj.close_date,
+            is_live=obj.is_live, question_count=questions,
+        )
+        for kind, obj in parents
+    ], batch_size=BATCH_SIZE)
+
+    event_types = [choice for choice, _ in CalendarEvent._meta.get_field("event_type").choices]
+    CalendarEvent.objects.bulk_create([
+        CalendarEvent(
+            title=f"[{SYNTHETIC}] Event {i + 1}",
+            date=(now + timedelta(days=rng.randrange(-90, 90))).date(),
+            related_course=rng.choice(course_rows) if course_rows else None,
+            event_type=rng.choice(event_types),
+        )
+        for i in range(events)
+    ], batch_size=BATCH_SIZE)
+    created["CalendarEvent"] = events
+
+    # Live set, question navs, calendar months... all derived from what changed
+    caches["default"].clear()
+    return created
+
+
+def clear_synthetic():
+    """Delete every synthetic row; returns the number of rows deleted."""
+    deleted = 0
+    for model in ASSESSMENT_MODELS:
+        ids = model.objects.filter(course__description=SYNTHETIC_COURSE_DESCRIPTION).values("id")
+        deleted += Question.objects.filter(parent_type=kind_of(model), parent_id__in=ids).delete()[0]
+    # Cascades to assessments and their AssessmentIndex rows
+    deleted += Course.objects.filter(description=SYNTHETIC_COURSE_DESCRIPTION).delete()[0]
+    deleted += UserTable.objects.filter(username__startswith=f"{SYNTHETIC}-").delete()[0]
+    deleted += CalendarEvent.objects.filter(title__startswith=f"[{SYNTHETIC}]").delete()[0]
+    caches["default"].clear()
+    return deleted
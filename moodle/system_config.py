@@ -0,0 +1,37 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+
+from .models import SystemConfig
+
+
+# --------------------------------------------------
+# ⚙️ SYSTEM CONFIG CACHE
+# --------------------------------------------------
+# SystemStatusMiddleware and most student views read the single SystemConfig
+# row on every request. It is cached in the "config" alias and dropped on
+# save/delete (signals.py) and by the admin bulk actions.
+
+CONFIG_KEY = "system_config"
+
+
+def get_system_config():
+    """The SystemConfig row (or None if it has not been created yet)."""
+    config_cache = caches["config"]
+    config = config_cache.get(CONFIG_KEY)
+    if config is None:
+        config = SystemConfig.objects.first()
+        if config is not None:
+            config_cache.set(CONFIG_KEY, config)
+    return config
+
+
+async def aget_system_config():
+    """Async variant for async views/middleware: the DB is only touched on a miss."""
+    config = await caches["config"].aget(CONFIG_KEY)
+    if config is None:
+        config = await sync_to_async(get_system_config)()
+    return config
+
+
+def invalidate_system_config():
+    caches["config"].delete(CONFIG_KEY)
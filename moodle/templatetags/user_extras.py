@@ -1,4 +1,7 @@
 from django import template
+
+from moodle.image_derivatives import display_url as derivative_url
+
 register = template.Library()
 
 @register.filter
@@ -26,3 +29,12 @@ def to_chr(value):
         return builtins.chr(int(value))  # ✅ use the real chr()
     except Exception:
         return ''
+
+
+@register.filter(name="display_url")
+def display_url(field_file):
+    """
+    Web-sized derivative of an uploaded image if one was pre-built.
+    Example: <img src="{{ question.image|display_url }}">
+    """
+    return derivative_url(field_file)
@@ -30,12 +30,22 @@ urlpatterns = [
     path("moodle/mod/<str:test_type>/cmid=<int:test_id>/attempt.php", views.test_attempt_view, name="test_attempt"),
     path("moodle/mod/<str:test_type>/cmid=<int:test_id>/finish.php&attempt=1", views.test_finish_view, name="test_finish"),
     path('moodle/mod/<str:test_type>/cmid=<int:test_id>/review.php&attempt=1', views.test_review_view, name='test_review'),
+    # -- Waiting room poll (see admission.py)
+    path("moodle/mod/<str:test_type>/cmid=<int:test_id>/admission.json", views.admission_status_view, name="admission_status"),
+    # -- Async endpoints (see views.py "ASYNC ENDPOINTS")
+    path("moodle/mod/<str:test_type>/cmid=<int:test_id>/autosave.json", views.autosave_view, name="autosave"),
+    path("moodle/presence/", views.presence_view, name="presence"),
+    # -- Live status / timer stream (answered by iitpcep/asgi.py, see live_events.py)
+    path("moodle/events/", views.live_events_unavailable, name="live_events"),
+    # -- Prometheus scrape target (admins, allowlisted IPs or METRICS_TOKEN)
+    path("metrics", views.metrics_view, name="metrics"),
 
 
     # =========================================
     # 📅 CALENDAR / EVENTS / REMINDERS
     # =========================================
     path('calendar/', views.calendar_view, name='calendar_view'),
+    path('calendar/month.json', views.calendar_month_json, name='calendar_month_json'),
 
     # =========================================
     # ⚙️ FUTURE MODULES (Reports, Analytics, etc.)
@@ -14,6 +14,7 @@ from .models import (
     Option,
     CalendarEvent,
 )
+from . import write_queue
 
 
 # --------------------------------------------------
@@ -25,7 +26,7 @@ def login_view(request):
         pin = request.POST.get('pin', '').strip()
 
         # ✅ Get system configuration
-        system_config = SystemConfig.objects.first()
+        system_config = get_system_config()
         system_pin = system_config.system_pin if system_config else SYSTEM.get("SYSTEM_PIN", "4321")
         system_status = system_config.system_status if system_config else "ONLINE"
 
@@ -41,9 +42,7 @@ def login_view(request):
 
             # Save to session
             request.session['username'] = user.username
-            user.is_online = True
-            user.last_active = timezone.now()
-            user.save(update_fields=["is_online", "last_active"])
+            write_queue.touch(user.username)
 
             return redirect('dashboard')
         else:
@@ -52,7 +51,6 @@ def login_view(request):
     return render(request, "login.html")
 
 
-import calendar
 from datetime import datetime
 from django.db.models import Q
 from django.utils import timezone
@@ -61,8 +59,29 @@ from django.contrib import messages
 from .models import (
     UserTable, SystemConfig, Assignment, Quiz, Exam, Course, CalendarEvent
 )
-from itertools import chain
 from collections import defaultdict
+from django.core.paginator import Paginator
+from django.db.models import F
+from django.http import JsonResponse, HttpResponse
+from .models import AssessmentIndex
+from .month_calendar import get_month_calendar
+from .availability import live_queryset
+from .system_config import get_system_config
+
+
+TIMELINE_PAGE_SIZE = 50
+
+
+def _requested_month(request, now):
+    """Reads ?year=&month= from the query string, falling back to now."""
+    try:
+        year = int(request.GET.get('year', now.year))
+        month = int(request.GET.get('month', now.month))
+        datetime(year, month, 1)
+    except ValueError:
+        year = now.year
+        month = now.month
+    return year, month
 
 
 # --------------------------------------------------
@@ -70,7 +89,7 @@ from collections import defaultdict
 # --------------------------------------------------
 def dashboard(request):
     # ✅ 1. GET SYSTEM CONFIG & AUTH
-    config = SystemConfig.objects.first()
+    config = get_system_config()
     pin_required = True if not config else getattr(config, "pin_required", True)
     username = request.session.get("username")
 
@@ -87,9 +106,7 @@ def dashboard(request):
             messages.error(request, "🚫 Your account is banned.")
             request.session.flush()
             return redirect("login")
-        user.is_online = True
-        user.last_active = timezone.now()
-        user.save(update_fields=["is_online", "last_active"])
+        write_queue.touch(user.username)
 
     # ✅ 4. HANDLE SYSTEM OFFLINE
     if config and config.system_status == "OFFLINE":
@@ -101,15 +118,10 @@ def dashboard(request):
     # --------------------------------------------------
     # 🗓️ 5. LIVE ASSESSMENTS (for main dashboard cards)
     # --------------------------------------------------
-    live_now_filter = Q(
-        is_live=True,
-        open_date__lte=now
-    ) & (
-                              Q(close_date__gte=now) | Q(close_date__isnull=True)
-                      )
-    live_assignments = Assignment.objects.filter(live_now_filter)
-    live_quizzes = Quiz.objects.filter(live_now_filter)
-    live_exams = Exam.objects.filter(live_now_filter)
+    # Live set is cached until the next open/close boundary (availability.py)
+    live_assignments = live_queryset(Assignment)
+    live_quizzes = live_queryset(Quiz)
+    live_exams = live_queryset(Exam)
 
     # --------------------------------------------------
     # 🗓️ 6. TIMELINE LOGIC
@@ -120,157 +132,37 @@ def dashboard(request):
             Q(close_date__gte=now) | Q(close_date__isnull=True)
     )
 
-    all_activities = sorted(
-        list(chain(
-            Assignment.objects.filter(timeline_filter).select_related('course'),
-            Quiz.objects.filter(timeline_filter).select_related('course'),
-            Exam.objects.filter(timeline_filter).select_related('course')
-        )),
-        # Sort by close date, put "Open Indefinitely" (None) at the very end
-        key=lambda x: x.close_date or datetime(9999, 1, 1, tzinfo=timezone.utc)
+    # One sorted query over all three types; "Open Indefinitely" (NULL) last
+    all_activities = AssessmentIndex.objects.filter(timeline_filter).select_related('course').order_by(
+        F('close_date').asc(nulls_last=True), 'id'
     )
+    timeline_page = Paginator(all_activities, TIMELINE_PAGE_SIZE).get_page(request.GET.get('timeline_page'))
 
     # --- Pre-process the data for the template ---
     timeline_events = []
-    for activity in all_activities:
+    for activity in timeline_page:
         date_group = "Open Indefinitely"
         if activity.close_date:
             date_group = activity.close_date.date()
 
         timeline_events.append({
-            "id": activity.id,
+            "id": activity.object_id,
             "title": activity.title,
             "course": activity.course,
             "close_date": activity.close_date,
-            "model_name": activity.__class__.__name__,
-            "model_name_lower": activity.__class__.__name__.lower(),
+            "model_name": activity.model_name,
+            "model_name_lower": activity.model_name_lower,
             "close_date_group": date_group,
             "is_live": activity.is_live,  # ✅ Added this so you can show a 'Draft' badge in HTML
         })
 
     # --------------------------------------------------
-    # 🗓️ 7. CALENDAR LOGIC (Updated for Modal Data)
+    # 🗓️ 7. CALENDAR LOGIC (cached per month, see month_calendar.py)
     # --------------------------------------------------
-    try:
-        year = int(request.GET.get('year', now.year))
-        month = int(request.GET.get('month', now.month))
-    except ValueError:
-        year = now.year
-        month = now.month
-
-    current_date = datetime(year, month, 1)
+    year, month = _requested_month(request, now)
     today = timezone.now().date()
-    cal = calendar.Calendar(firstweekday=calendar.MONDAY)
-    calendar_matrix = cal.monthdayscalendar(year, month)
+    month_data = get_month_calendar(year, month, today=today)
 
-    first_day_of_month = current_date.replace(day=1)
-    last_day_prev_month = first_day_of_month - timezone.timedelta(days=1)
-    first_day_next_month = (first_day_of_month + timezone.timedelta(days=32)).replace(day=1)
-
-    prev_month_data = {
-        "year": last_day_prev_month.year,
-        "month_num": last_day_prev_month.month,
-        "month_name": last_day_prev_month.strftime('%B')
-    }
-    next_month_data = {
-        "year": first_day_next_month.year,
-        "month_num": first_day_next_month.month,
-        "month_name": first_day_next_month.strftime('%B')
-    }
-
-    month_filter = Q(open_date__year=year, open_date__month=month) | \
-                   Q(close_date__year=year, close_date__month=month)
-
-    cal_assignments = Assignment.objects.filter(month_filter).select_related('course')
-    cal_quizzes = Quiz.objects.filter(month_filter).select_related('course')
-    cal_exams = Exam.objects.filter(month_filter).select_related('course')
-    other_events = CalendarEvent.objects.filter(date__year=year, date__month=month)
-
-    events_by_day = {}
-
-    def add_to_dict(day, event_data):
-        if day not in events_by_day:
-            events_by_day[day] = []
-        events_by_day[day].append(event_data)
-
-    # --- UPDATED LOOP: PASSING FULL DATA FOR MODAL ---
-    for item in list(cal_assignments) + list(cal_quizzes) + list(cal_exams):
-        model_name = item.__class__.__name__  # e.g. "Quiz"
-
-        # 1. Handle "Opens" Date
-        if item.open_date.month == month:
-            add_to_dict(item.open_date.day, {
-                "id": item.id,
-                "title": item.title,
-                "type": "opens",
-                "model": model_name,
-                "model_name_lower": model_name.lower(),  # Required for {% url %}
-                "start_date": item.open_date,  # Required for date format
-                "course": item.course,  # Required for Course Code/Title
-                "is_active": True  # Logic to show/hide button
-            })
-
-        # 2. Handle "Closes" Date
-        if item.close_date and item.close_date.month == month:
-            add_to_dict(item.close_date.day, {
-                "id": item.id,
-                "title": item.title,
-                "type": "closes",
-                "model": model_name,
-                "model_name_lower": model_name.lower(),
-                "start_date": item.close_date,
-                "course": item.course,
-                "is_active": True
-            })
-
-    # --- UPDATED OTHER EVENTS ---
-    for event in other_events:
-        add_to_dict(event.date.day, {
-            "id": event.id,
-            "title": event.title,
-            "type": event.get_event_type_display(),  # e.g. "Course Event"
-            "model": "calendarevent",
-            "model_name_lower": "calendarevent",
-            "start_date": event.date,
-            "course": None,  # CalendarEvents might not have courses
-            "is_active": False
-        })
-
-    # --- PROCESS WEEKS (Mostly the same) ---
-    calendar_weeks_with_events = []
-    for week in calendar_matrix:
-        processed_week = []
-        day_index = 0
-        for day_num in week:
-            if day_num == 0:
-                processed_week.append({"day_num": 0, "events": [], "classes": "dayblank"})
-            else:
-                day_events = events_by_day.get(day_num, [])
-
-                # Sort events by time if possible
-                day_events.sort(key=lambda x: x['start_date'])
-
-                day_classes = ["day", "text-sm-center", "text-md-left", "clickable"]
-
-                # Check Today
-                if day_num == today.day and month == today.month and year == today.year:
-                    day_classes.append("today")
-
-                # Check Events
-                if day_events:
-                    day_classes.append("hasevent")
-
-                # Check Weekend (Sat=5, Sun=6)
-                if day_index >= 5:
-                    day_classes.append("weekend")
-
-                processed_week.append({
-                    "day_num": day_num,
-                    "events": day_events,
-                    "classes": " ".join(day_classes)
-                })
-            day_index += 1
-        calendar_weeks_with_events.append(processed_week)
     # --------------------------------------------------
     # 8. COMBINE ALL CONTEXT & RENDER
     # --------------------------------------------------
@@ -282,20 +174,47 @@ def dashboard(request):
         "system_status": config.system_status if config else "ONLINE",
         "pin_required": pin_required,
         "courses": courses,
-        "calendar_weeks": calendar_weeks_with_events,
-        "current_month_name": current_date.strftime('%B'),
+        "calendar_weeks": month_data["weeks"],
+        "current_month_name": month_data["month_name"],
         "current_year": year,
         "current_month_num": month,
-        "prev_month": prev_month_data,
-        "next_month": next_month_data,
+        "prev_month": month_data["prev_month"],
+        "next_month": month_data["next_month"],
         "today": today,
 
         # Pass the correctly named list
         "timeline_activities": timeline_events,
+        "timeline_page": timeline_page,
     }
 
     return render(request, "dashboard.html", context)
 
+# --------------------------------------------------
+# 🗓️ CALENDAR MONTH JSON (month navigation without full re-render)
+# --------------------------------------------------
+def calendar_month_json(request):
+    if not request.session.get("username"):
+        config = get_system_config()
+        if not config or config.pin_required:
+            return JsonResponse({"error": "Login required."}, status=403)
+
+    now = timezone.now()
+    year, month = _requested_month(request, now)
+    month_data = get_month_calendar(year, month, today=now.date())
+
+    weeks = []
+    for week in month_data["weeks"]:
+        weeks.append([
+            dict(day, events=[
+                dict(event, start_date=event["start_date"].isoformat())
+                for event in day["events"]
+            ])
+            for day in week
+        ])
+
+    return JsonResponse(dict(month_data, weeks=weeks))
+
+
 # --------------------------------------------------
 # 🧩 ASSESSMENT VIEW (Assignment, Quiz, Exam)
 # --------------------------------------------------
@@ -361,11 +280,10 @@ def calendar_view(request):
     if not username:
         return redirect("login")
 
-    events = CalendarEvent.objects.all().order_by('-date')
-    return render(request, "calendar.html", {
-        "events": events,
-        "username": username,
-    })
+    # There is no standalone calendar page (calendar.html never existed):
+    # send students to the dashboard's month calendar, keeping ?month=
+    query = f"?{request.GET.urlencode()}" if request.GET else ""
+    return redirect(f"{reverse('dashboard')}{query}#calendar-month-dynamic-1")
 
 def mycourses_view(request):
     # Fetch all courses (you can later filter by user enrollment)
@@ -381,15 +299,24 @@ def mycourses_view(request):
 def course_detail_view(request, course_code):
     course = get_object_or_404(Course, code=course_code)
 
-    assignments = Assignment.objects.filter(course=course).order_by("open_date")
-    quizzes = Quiz.objects.filter(course=course).order_by("open_date")
-    exams = Exam.objects.filter(course=course).order_by("open_date")
+    # One query over the index, split per type for the three page sections
+    activities = {"ASSIGNMENT": [], "QUIZ": [], "EXAM": []}
+    for row in AssessmentIndex.objects.filter(course=course).order_by("open_date", "id"):
+        activities[row.kind].append({
+            "id": row.object_id,
+            "title": row.title,
+            "description": row.description,
+            "open_date": row.open_date,
+            "close_date": row.close_date,
+            "is_live": row.is_live,
+            "question_count": row.question_count,
+        })
 
     return render(request, "course_page.html", {
         "course": course,
-        "assignments": assignments,
-        "quizzes": quizzes,
-        "exams": exams,
+        "assignments": activities["ASSIGNMENT"],
+        "quizzes": activities["QUIZ"],
+        "exams": activities["EXAM"],
     })
 
 def test_detail_view(request, test_type, test_id):
@@ -430,6 +357,18 @@ def test_detail_view(request, test_type, test_id):
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse
 from .models import Assignment, Quiz, Exam, Question, Option
+from .question_nav import get_question_nav, get_question_at, nav_with_state
+from .answer_store import AnswerStore
+from .admission import check_admission, admission_status
+from .attempts import (
+    AttemptLimitReached, begin_attempt, current_attempt, finish_attempt, is_expired, seconds_left
+)
+from .models import UserTable
+from django.conf import settings
+from django.core.cache import caches
+from asgiref.sync import sync_to_async
+import hmac
+from . import metrics
 
 
 def test_attempt_view(request, test_type, test_id):
@@ -453,6 +392,51 @@ def test_attempt_view(request, test_type, test_id):
     model = model_map[test_type]
     test_obj = get_object_or_404(model, id=test_id)
 
+    # ✅ Per-test answer store (see answer_store.py)
+    store = AnswerStore(request, test_type, test_id)
+
+    # ✅ Outside the open/close window: no new attempt (and no ticket). A
+    # running one carries on until its deadline, which close_date caps.
+    attempt = current_attempt(request, test_type, test_id)
+    if attempt is None and not test_obj.is_available():
+        return render(request, "attempt_blocked.html", {
+            "test": test_obj,
+            "test_type": test_type,
+            "message": f"This {test_type.lower()} is not open for attempts right now.",
+        }, status=403)
+
+    # ✅ Waiting room: only students who have not started yet are gated
+    if not store.load():
+        admitted, position = check_admission(request, test_type, test_obj)
+        if not admitted:
+            return render(request, "waiting_room.html", {
+                "test": test_obj,
+                "position": position,
+                "status_url": reverse("admission_status", args=[test_type.lower(), test_id]),
+                "attempt_url": reverse("test_attempt", args=[test_type.lower(), test_id]),
+                "retry_seconds": settings.ADMISSION_WINDOW_SECONDS,
+            })
+
+    # ✅ Server-side attempt: resume, or start the next one within max_attempts
+    if attempt is None:
+        username = request.session.get("username")
+        user = UserTable.objects.filter(username=username).first() if username else None
+        if user is None:
+            return redirect("login")
+        try:
+            attempt = begin_attempt(request, user, test_type, test_obj)
+        except AttemptLimitReached:
+            return render(request, "attempt_blocked.html", {
+                "test": test_obj,
+                "test_type": test_type,
+                "message": f"You have used all {test_obj.max_attempts} attempt(s) allowed for this {test_type.lower()}.",
+            }, status=403)
+
+    # ✅ Deadline passed (checked from the session, no query): submit what was saved
+    if is_expired(attempt):
+        finish_attempt(request, test_type, test_id, store.finish())
+        return redirect(reverse("test_review", args=[test_type.lower(), test_id]))
+
     # ✅ Fetch related course (if it exists)
     course_obj = getattr(test_obj, "course", None)
 
@@ -468,15 +452,11 @@ def test_attempt_view(request, test_type, test_id):
         elif code:
             course_name = code
 
-    # ✅ Fetch all questions
-    questions = list(
-        Question.objects.filter(parent_type__iexact=test_type, parent_id=test_id)
-        .prefetch_related("options")
-        .order_by("id")
-    )
-    total = len(questions)
+    # ✅ Lightweight nav summary (ids + answer-key flags), cached per assessment
+    nav = get_question_nav(test_type, test_id)
+    total = len(nav)
 
-    if not questions:
+    if not nav:
         return render(request, "attempt.html", {
             "test": test_obj,
             "test_type": test_type,
@@ -491,26 +471,19 @@ def test_attempt_view(request, test_type, test_id):
         q_index = 0
     q_index = max(0, min(q_index, total - 1))
 
-    question = questions[q_index]
-    options = list(question.options.all())
+    # ✅ Fetch only the current question
+    question = get_question_at(test_type, test_id, nav[q_index])
+    options = question.get_options()
 
-    # ✅ Initialize session for answers
-    if "user_answers" not in request.session:
-        request.session["user_answers"] = {}
-    user_answers = request.session["user_answers"]
+    user_answers = store.load()
 
     # ✅ Handle submission
     if request.method == "POST":
         selected = request.POST.get(str(question.id))
         flagged = request.POST.get(f"q{question.id}_flagged") == "1"
 
-        # Save in session
-        user_answers[str(question.id)] = {
-            "answer": selected,
-            "flagged": flagged,
-        }
-        request.session["user_answers"] = user_answers
-        request.session.modified = True
+        # Only this test's answers are written, and only if they changed
+        user_answers = store.save_answer(question.id, selected, flagged)
 
         # Navigation
         if "next" in request.POST and q_index + 1 < total:
@@ -554,7 +527,7 @@ def test_attempt_view(request, test_type, test_id):
         opt.is_selected = (str(opt.id) == str(question.user_answer))
 
     courses = Course.objects.all()
-    config = SystemConfig.objects.first()
+    config = get_system_config()
     show_answer_value = config.show_answer
 
     # ✅ Context for template
@@ -567,17 +540,116 @@ def test_attempt_view(request, test_type, test_id):
         "total": total,
         "q_index": q_index + 1,
         "page_title": f"{test_obj.title} (page {q_index + 1} of {total})",
-        "questions_list": questions,
+        "questions_list": nav_with_state(nav, user_answers),
         "correct_option": correct_option_id,
         "correct_text": correct_answer_text,
         "courses":courses,
         "show_answer":show_answer_value,
+        "time_left_seconds": seconds_left(attempt),
     }
 
     return render(request, "attempt.html", context)
 
 
 from django.shortcuts import render, get_object_or_404
+# --------------------------------------------------
+# ⚡ ASYNC ENDPOINTS (high-frequency, I/O-bound)
+# --------------------------------------------------
+# Under ASGI these run on the event loop. Under WSGI Django runs them
+# synchronously, so both deployments keep working. The session is the
+# only lazy DB read, so it is loaded once, off the loop.
+
+async def aload_session(request):
+    await sync_to_async(request.session.keys)()
+
+
+async def admission_status_view(request, test_type, test_id):
+    """Cheap poll for the waiting room: session plus the admission counters."""
+    await aload_session(request)
+    # Counters are DB rows or cache calls (admission.py): both block
+    admitted, position = await sync_to_async(admission_status)(request, test_type.capitalize(), test_id)
+    return JsonResponse({
+        "admitted": admitted,
+        "position": position,
+        "retry_after": settings.ADMISSION_WINDOW_SECONDS,
+    })
+
+
+async def autosave_view(request, test_type, test_id):
+    """
+    Background autosave for the attempt page: POST question_id plus the
+    same fields as the attempt form ("<question_id>", "q<question_id>_flagged").
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required."}, status=405)
+
+    test_type = test_type.capitalize()
+    await aload_session(request)
+    attempt = current_attempt(request, test_type, test_id)
+    if attempt is None:
+        return JsonResponse({"error": "No attempt in progress."}, status=409)
+    if is_expired(attempt):
+        # The next page load submits it (test_attempt_view)
+        return JsonResponse({
+            "expired": True,
+            "redirect": reverse("test_attempt", args=[test_type.lower(), test_id]),
+        }, status=410)
+
+    question_id = request.POST.get("question_id", "")
+    nav = await sync_to_async(get_question_nav)(test_type, test_id)
+    if not question_id.isdigit() or int(question_id) not in {q["id"] for q in nav}:
+        return JsonResponse({"error": "Unknown question."}, status=400)
+
+    store = AnswerStore(request, test_type, test_id)
+    answers = await store.asave_answer(
+        question_id,
+        request.POST.get(question_id),
+        request.POST.get(f"q{question_id}_flagged") == "1",
+    )
+    return JsonResponse({"saved": len(answers), "time_left": seconds_left(attempt)})
+
+
+async def presence_view(request):
+    """GET heartbeat from open pages; writes last_active at most once a minute per student."""
+    await aload_session(request)
+    username = request.session.get("username")
+    if not username:
+        return HttpResponse(status=204)
+
+    presence = caches["presence"]
+    key = f"student_seen:{username}"
+    if not await presence.aget(key):
+        await write_queue.atouch(username)
+        await presence.aset(key, 1, 60)
+    return HttpResponse(status=204)
+
+
+def live_events_unavailable(request):
+    """
+    Live events are served by the ASGI app (iitpcep/asgi.py). Under plain
+    WSGI, 204 tells EventSource to stop reconnecting, and pages keep working without live updates.
+    """
+    return HttpResponse(status=204)
+
+
+# --------------------------------------------------
+# 📈 METRICS (Prometheus scrape target, see metrics.py)
+# --------------------------------------------------
+def metrics_view(request):
+    """Superusers, METRICS_ALLOWED_IPS, or a matching bearer token; 403 for everyone else."""
+    token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    allowed = (
+        request.user.is_superuser
+        or request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+        or (settings.METRICS_TOKEN and hmac.compare_digest(token, settings.METRICS_TOKEN))
+    )
+    if not allowed:
+        return HttpResponse("Forbidden", status=403, content_type="text/plain")
+
+    samples = {**metrics.collect_workers(), **metrics.collect_db_gauges()}
+    return HttpResponse(metrics.render(samples), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 from django.urls import reverse
 from .models import Assignment, Quiz, Exam, Question, Course
 
@@ -614,32 +686,32 @@ def test_finish_view(request, test_type, test_id):
         elif code:
             course_name = code
 
-    # ✅ Fetch all questions (same query as test_attempt_view)
-    questions = list(
-        Question.objects.filter(parent_type__iexact=test_type, parent_id=test_id)
-        .prefetch_related("options")
-        .order_by("id")
-    )
+    # ✅ Same nav summary as test_attempt_view (no full question fetch)
+    nav = get_question_nav(test_type, test_id)
 
-    # ✅ Get user answers from session
-    user_answers = request.session.get("user_answers", {})
+    # ✅ Get this test's answers
+    store = AnswerStore(request, test_type, test_id)
+    user_answers = store.load()
+
+    # ✅ Deadline check from the session (no query)
+    attempt = current_attempt(request, test_type, test_id)
+    if attempt and is_expired(attempt):
+        finish_attempt(request, test_type, test_id, store.finish())
+        return redirect(reverse("test_review", args=[test_type.lower(), test_id]))
 
     # ✅ Build question summary list
     questions_summary = []
-    for idx, q in enumerate(questions, start=1):
-        user_data = user_answers.get(str(q.id), {})
-        is_answered = bool(user_data.get("answer"))
-        is_flagged = user_data.get("flagged", False)
+    for idx, q in enumerate(nav_with_state(nav, user_answers), start=1):
         questions_summary.append({
             "index": idx,
-            "id": q.id,
-            "status": "Answer saved" if is_answered else "Not yet answered",
-            "answered": is_answered,
-            "flagged": is_flagged,
+            "id": q["id"],
+            "status": "Answer saved" if q["answered"] else "Not yet answered",
+            "answered": q["answered"],
+            "flagged": q["flagged"],
         })
 
 
-    config = SystemConfig.objects.first()
+    config = get_system_config()
     show_answer_value = config.show_answer
 
     context = {
@@ -647,13 +719,15 @@ def test_finish_view(request, test_type, test_id):
         "test_type": test_type,
         "course_name": course_name,
         "questions_list": questions_summary,  # ✅ same variable name your template expects
-        "total": len(questions),
+        "total": len(nav),
         "show_answer":show_answer_value,
+        "time_left_seconds": seconds_left(attempt) if attempt else 0,
     }
 
     return render(request, "finish.html", context)
 
 
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
 from .models import Assignment, Quiz, Exam, Question
 
@@ -677,22 +751,23 @@ def test_review_view(request, test_type, test_id):
     test_obj = get_object_or_404(model, id=test_id)
 
     # ✅ Fetch all questions for the test
-    questions = list(
-        Question.objects.filter(parent_type__iexact=test_type, parent_id=test_id)
-        .prefetch_related("options")
-        .order_by("id")
-    )
+    questions = Question.objects.filter(parent_type=test_type.upper(), parent_id=test_id).order_by("position", "id")
+    if not settings.QUESTION_INLINE_OPTIONS:
+        questions = questions.prefetch_related("options")
+    questions = list(questions)
 
     # Debugging: Check if questions are being fetched
     if not questions:
         print(f"No questions found for test: {test_type} with ID: {test_id}")
 
-    # ✅ Get saved answers from session
-    user_answers = request.session.get("user_answers", {})
-
-    # Initialize user_answers if not present
-    if not user_answers:
-        user_answers = {}
+    # ✅ "Submit all and finish" POSTs here: close the attempt and keep
+    # the submitted copy; plain GETs show the running or last submitted answers
+    store = AnswerStore(request, test_type, test_id)
+    if request.method == "POST":
+        user_answers = store.finish()
+        finish_attempt(request, test_type, test_id, user_answers)
+    else:
+        user_answers = store.load() or store.submitted()
 
     # ✅ Prepare question data with user answers and correct answers
     question_data = []
@@ -701,7 +776,7 @@ def test_review_view(request, test_type, test_id):
         user_answer = user_answers.get(str(q.id), {}).get("answer")
 
         # Prepare the question options and correct answer
-        options = list(q.options.all())
+        options = q.get_options()
         correct_option_id = None
         correct_answer_text = None
 
@@ -726,7 +801,7 @@ def test_review_view(request, test_type, test_id):
             "correct_answer_text": correct_answer_text,
         })
 
-    config = SystemConfig.objects.first()
+    config = get_system_config()
     show_answer_value = config.show_answer
 
     context = {
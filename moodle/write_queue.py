@@ -0,0 +1,143 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.db import OperationalError, connection, connections
+from django.utils import timezone
+
+from . import metrics
+
+
+# --------------------------------------------------
+# 🖊️ SINGLE-WRITER QUEUE (SQLite)
+# --------------------------------------------------
+# SQLite takes one writer at a time. Instead of every request thread
+# queuing on the file lock, each process hands its hot writes to one
+# writer thread:
+#   run(fn)          — attempt start/finish (attempts.py); the caller
+#                      waits for the result, errors are re-raised
+#   touch(username)  — presence (is_online/last_active); fire and forget,
+#                      all students touched meanwhile share one UPDATE
+# Other processes still compete, which busy_timeout + BEGIN IMMEDIATE
+# (db_backends/sqlite3_tuned) cover. With WRITE_QUEUE off (Postgres, the
+# test run) both run inline in the calling thread.
+
+_queue = queue.Queue()
+_presence = set()
+_presence_lock = threading.Lock()
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+
+class WriteQueueTimeout(OperationalError):
+    pass
+
+
+def _mark_online(usernames):
+    from .models import UserTable
+    return UserTable.objects.filter(username__in=usernames).update(is_online=True, last_active=timezone.now())
+
+
+def _flush_presence():
+    with _presence_lock:
+        usernames = list(_presence)
+        _presence.clear()
+    if usernames:
+        _mark_online(usernames)
+        metrics.inc("iitpcep_write_queue_batches_total", (("kind", "presence"),))
+
+
+def _loop():
+    while True:
+        if _queue.empty():
+            # Idle: don't hold a connection (or a pool slot) until the next write
+            connections.close_all()
+        future, fn, args, kwargs, queued_at = _queue.get()
+        metrics.observe("iitpcep_write_queue_wait_seconds", (), time.perf_counter() - queued_at)
+        if not future.set_running_or_notify_cancel():
+            continue
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Don't carry a broken connection into the next write
+            connections.close_all()
+        finally:
+            _queue.task_done()
+
+
+def _ensure_writer():
+    global _writer, _writer_pid
+    # A forked worker inherits the variable, not the thread
+    if _writer is not None and _writer_pid == os.getpid() and _writer.is_alive():
+        return
+    with _writer_lock:
+        if _writer is None or _writer_pid != os.getpid() or not _writer.is_alive():
+            _writer = threading.Thread(target=_loop, name="write-queue", daemon=True)
+            _writer_pid = os.getpid()
+            _writer.start()
+
+
+def _inline():
+    # A caller inside atomic() must see its own writes: the writer's
+    # connection could not (and would wait on the caller's lock)
+    return (not settings.WRITE_QUEUE or threading.current_thread() is _writer
+            or connection.in_atomic_block)
+
+
+def submit(fn, *args, **kwargs):
+    """Queue fn(*args, **kwargs) for the writer thread; returns a concurrent Future."""
+    _ensure_writer()
+    future = Future()
+    _queue.put((future, fn, args, kwargs, time.perf_counter()))
+    return future
+
+
+def run(fn, *args, **kwargs):
+    """
+    fn(*args, **kwargs) on the writer thread. Gives up if it is still queued
+    after WRITE_QUEUE_TIMEOUT; once it has started, waits for its result.
+    """
+    if _inline():
+        return fn(*args, **kwargs)
+    future = submit(fn, *args, **kwargs)
+    try:
+        return future.result(timeout=settings.WRITE_QUEUE_TIMEOUT)
+    except FutureTimeout:
+        if not future.cancel():
+            # Already running: the write is happening, so report its outcome
+            return future.result()
+        raise WriteQueueTimeout(f"Write not done after {settings.WRITE_QUEUE_TIMEOUT}s ({_queue.qsize()} queued).")
+
+
+def touch(username):
+    """Mark a student online now. Queued: returns at once, no DB access in the caller."""
+    if not settings.WRITE_QUEUE:
+        _mark_online([username])
+        return
+    with _presence_lock:
+        first = not _presence
+        _presence.add(username)
+    if first:
+        # Later touches join this batch until the writer gets to it
+        submit(_flush_presence)
+
+
+async def atouch(username):
+    """touch() for async views."""
+    if not settings.WRITE_QUEUE:
+        from .models import UserTable
+        await UserTable.objects.filter(username=username).aupdate(is_online=True, last_active=timezone.now())
+        return
+    touch(username)
+
+
+def drain(timeout=None):
+    """Block until everything queued so far is written (tests, shutdown)."""
+    if settings.WRITE_QUEUE:
+        submit(lambda: None).result(timeout)